@@ -0,0 +1,22 @@
+-- migrate:up
+
+-- get_active_allocs() and delete_stale_active_allocs()
+CREATE INDEX IF NOT EXISTS idx_active_allocs_scoring_period_end ON active_allocs (scoring_period_end);
+
+-- rate_limit_exceeded(), on every api request
+CREATE INDEX IF NOT EXISTS idx_logs_key_created_at ON logs (key, created_at);
+
+-- get_miner_responses() - filtered by miner uid and / or creation time (by request uid through the primary key)
+CREATE INDEX IF NOT EXISTS idx_allocations_miner_uid_created_at ON allocations (miner_uid, created_at);
+CREATE INDEX IF NOT EXISTS idx_allocations_created_at ON allocations (created_at);
+
+-- get_request_info() - filtered by creation time (by request uid through the primary key)
+CREATE INDEX IF NOT EXISTS idx_allocation_requests_created_at ON allocation_requests (created_at);
+
+-- migrate:down
+
+DROP INDEX IF EXISTS idx_active_allocs_scoring_period_end;
+DROP INDEX IF EXISTS idx_logs_key_created_at;
+DROP INDEX IF EXISTS idx_allocations_miner_uid_created_at;
+DROP INDEX IF EXISTS idx_allocations_created_at;
+DROP INDEX IF EXISTS idx_allocation_requests_created_at;
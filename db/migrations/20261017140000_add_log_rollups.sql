@@ -0,0 +1,16 @@
+-- migrate:up
+
+-- daily totals of the api requests made with each api key, which old request logs are rolled up into
+CREATE TABLE IF NOT EXISTS log_rollups (
+    key TEXT,
+    day DATE,
+    endpoint TEXT,
+    requests INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, day, endpoint),
+    FOREIGN KEY(key) REFERENCES api_keys(key) ON DELETE CASCADE
+);
+
+-- migrate:down
+
+DROP TABLE IF EXISTS log_rollups;
@@ -53,6 +53,8 @@ from sturdy.utils.misc import get_synapse_from_body
 
 # api key db
 from sturdy.validator import forward, sql
+from sturdy.validator.api_usage import ApiUsageLedger
+from sturdy.validator.async_sql import get_async_db
 from sturdy.validator.forward import query_top_n_miners
 
 
@@ -89,6 +91,7 @@ class Validator(BaseValidatorNeuron):
 
 # API
 app = FastAPI(debug=False)
+api_usage = ApiUsageLedger(get_async_db())
 
 
 def _get_api_key(request: Request) -> Any:
@@ -114,8 +117,7 @@ async def api_key_validator(request, call_next) -> Response:
             content={"detail": "API key is missing"},
         )
 
-    with sql.get_db_connection() as conn:
-        api_key_info = sql.get_api_key_info(conn, api_key)
+    api_key_info = await api_usage.get_api_key_info(api_key)
 
     if api_key_info is None:
         return JSONResponse(status_code=HTTP_401_UNAUTHORIZED, content={"detail": "Invalid API key"})
@@ -132,22 +134,17 @@ async def api_key_validator(request, call_next) -> Response:
         )
 
     # Now check rate limiting
-    with sql.get_db_connection() as conn:
-        rate_limit_exceeded = sql.rate_limit_exceeded(conn, api_key_info)
-        if rate_limit_exceeded:
-            return JSONResponse(
-                status_code=HTTP_429_TOO_MANY_REQUESTS,
-                content={"detail": "Rate limit exceeded - sorry!"},
-            )
+    if api_usage.rate_limit_exceeded(api_key_info):
+        return JSONResponse(
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Rate limit exceeded - sorry!"},
+        )
 
     response: Response = await call_next(request)
 
     bt.logging.debug(f"response: {response}")
     if response.status_code == 200:
-        with sql.get_db_connection() as conn:
-            sql.update_requests_and_credits(conn, api_key_info, credits_required)
-            sql.log_request(conn, api_key_info, request.url.path, credits_required)
-            conn.commit()
+        api_usage.charge(api_key_info, request.url.path, credits_required)
     return response
 
 
@@ -268,17 +265,15 @@ async def allocate(body: AllocateAssetsRequest) -> AllocateAssetsResponse | None
 
     metadata = {}
 
-    with sql.get_db_connection() as conn:
-        sql.log_allocations(
-            conn,
-            to_log.request_uuid,
-            core_validator.metagraph.hotkeys,
-            synapse.assets_and_pools,
-            metadata,
-            to_log.allocations,
-            axon_times,
-            REQUEST_TYPES.ORGANIC,
-        )
+    await get_async_db().log_allocations(
+        to_log.request_uuid,
+        core_validator.metagraph.hotkeys,
+        synapse.assets_and_pools,
+        metadata,
+        to_log.allocations,
+        axon_times,
+        REQUEST_TYPES.ORGANIC,
+    )
 
     return ret
 
@@ -291,8 +286,7 @@ async def get_allocations(
     to_ts: int | None = None,
     db_dir: str = DB_DIR,
 ) -> list[dict]:
-    with sql.get_db_connection(db_dir) as conn:
-        allocations = sql.get_miner_responses(conn, request_uid, miner_uid, from_ts, to_ts)
+    allocations = await get_async_db(db_dir).get_miner_responses(request_uid, miner_uid, from_ts, to_ts)
     if not allocations:
         raise HTTPException(status_code=404, detail="No allocations found")
     return allocations
@@ -305,8 +299,7 @@ async def request_info(
     to_ts: int | None = None,
     db_dir: str = DB_DIR,
 ) -> list[dict]:
-    with sql.get_db_connection(db_dir) as conn:
-        info = sql.get_request_info(conn, request_uid, from_ts, to_ts)
+    info = await get_async_db(db_dir).get_request_info(request_uid, from_ts, to_ts)
     if not info:
         raise HTTPException(status_code=404, detail="No request info found")
     return info
@@ -334,8 +327,7 @@ async def get_api_key_info(
     if not api_key:
         raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="API key is missing")
 
-    with sql.get_db_connection(db_dir) as conn:
-        api_key_info = sql.get_api_key_info(conn, api_key)
+    api_key_info = await get_async_db(db_dir).get_api_key_info(api_key)
 
     if api_key_info is None:
         raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid API key")
@@ -409,18 +401,16 @@ async def allocate_bt(body: BTAlphaPoolRequest) -> AllocateAssetsResponse | None
 
     ret = AllocateAssetsResponse(allocations=to_ret, request_uuid=request_uuid)
 
-    with sql.get_db_connection() as conn:
-        sql.log_allocations(
-            conn,
-            ret.request_uuid,
-            core_validator.metagraph.hotkeys,
-            assets_and_pools,
-            {},  # Empty metadata
-            ret.allocations,
-            axon_times,
-            REQUEST_TYPES.ORGANIC,
-            None,  # No scoring period
-        )
+    await get_async_db().log_allocations(
+        ret.request_uuid,
+        core_validator.metagraph.hotkeys,
+        assets_and_pools,
+        {},  # Empty metadata
+        ret.allocations,
+        axon_times,
+        REQUEST_TYPES.ORGANIC,
+        None,  # No scoring period
+    )
 
     return ret
 
@@ -434,7 +424,11 @@ async def main() -> None:
         server = uvicorn.Server(config)
 
         async with core_validator:
-            await server.serve()
+            try:
+                await server.serve()
+            finally:
+                # write out the api usage which is still pending
+                await api_usage.close()
 
     except KeyboardInterrupt:
         bt.logging.info("Shutting down...")
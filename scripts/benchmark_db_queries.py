@@ -0,0 +1,190 @@
+"""
+Benchmarks the validator's hot database queries before and after the indexes added by the
+`*_add_query_indexes.sql` migration.
+
+A database is created from the migrations in db/migrations, and filled with synthetic traffic: allocation requests
+answered by every miner, and api requests from a handful of api keys. The query plan and median latency of each query
+are printed, then the index migration is applied and they are measured again.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_db_queries.py [--days 365] [--requests-per-day 24] [--miners 64]
+        [--api-keys 8] [--api-requests-per-day 2000] [--repeats 20]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sturdy.validator.async_sql import BatchConnection
+from sturdy.validator.sql import (
+    close_db_connections,
+    delete_stale_active_allocs,
+    get_active_allocs,
+    get_db_connection,
+    get_miner_responses,
+    get_request_info,
+    rate_limit_exceeded,
+)
+
+MIGRATIONS_DIR = Path(__file__).parent / "../db/migrations"
+INDEX_MIGRATION = "_add_query_indexes.sql"
+POOL = "0x0669091F451142b3228171aE6aD794cF98288124"
+
+
+def migrate_up(conn: sqlite3.Connection, migration: Path) -> None:
+    up = migration.read_text().split("-- migrate:down")[0]
+    conn.executescript(up.replace("-- migrate:up", ""))
+
+
+def fill_db(
+    conn: sqlite3.Connection, days: int, requests_per_day: int, miners: int, api_keys: int, api_requests_per_day: int
+) -> None:
+    now = datetime.utcnow()
+    start = now - timedelta(days=days)
+    rng = random.Random(0)  # noqa: S311
+
+    keys = [f"key-{idx}" for idx in range(api_keys)]
+    conn.executemany(
+        "INSERT INTO api_keys VALUES (?, ?, ?, ?, ?)", [(key, key, 1e9, 60, start.isoformat(" ")) for key in keys]
+    )
+
+    num_requests = days * requests_per_day
+    request_step = timedelta(days=1) / requests_per_day
+    assets_and_pools = json.dumps({"total_assets": int(1e18), "pools": {POOL: {"pool_type": "STURDY_SILO"}}})
+    for idx in range(num_requests):
+        created_at = start + idx * request_step
+        request_uid = f"request-{idx}"
+        conn.execute(
+            "INSERT INTO allocation_requests VALUES (?, json(?), ?, ?, json(?))",
+            (request_uid, assets_and_pools, created_at.isoformat(" "), 1, "{}"),
+        )
+        # stale active allocations are purged by every forward pass - only the recent ones are still around
+        if now - created_at < timedelta(days=1):
+            conn.execute(
+                "INSERT INTO active_allocs VALUES (?, ?, ?, json(?))",
+                (request_uid, (created_at + timedelta(hours=12)).isoformat(" "), created_at.isoformat(" "), "[]"),
+            )
+        conn.executemany(
+            "INSERT INTO allocations VALUES (?, ?, json(?), ?, ?)",
+            [
+                (request_uid, str(uid), json.dumps({POOL: int(1e18)}), created_at.isoformat(" "), rng.random())
+                for uid in range(miners)
+            ],
+        )
+
+    num_logs = days * api_requests_per_day
+    log_step = timedelta(days=1) / api_requests_per_day
+    conn.executemany(
+        "INSERT INTO logs VALUES (?, ?, ?, ?, ?)",
+        ((rng.choice(keys), "/allocate", 1.0, 1e9, (start + idx * log_step).isoformat(" ")) for idx in range(num_logs)),
+    )
+    conn.commit()
+
+
+def without_commit(func: Callable) -> Callable:
+    """Runs a query which writes to the database, and rolls it back so it can be repeated."""
+
+    def query(conn: sqlite3.Connection) -> None:
+        conn.execute("BEGIN")
+        try:
+            func(BatchConnection(conn))
+        finally:
+            conn.rollback()
+
+    return query
+
+
+def get_queries() -> dict[str, Callable]:
+    now_ms = int(datetime.utcnow().timestamp() * 1000)
+    day_ms = 24 * 3600 * 1000
+    return {
+        "rate_limit_exceeded": lambda conn: rate_limit_exceeded(conn, {"key": "key-0", "rate_limit_per_minute": 60}),
+        "get_active_allocs": get_active_allocs,
+        "delete_stale_active_allocs": without_commit(delete_stale_active_allocs),
+        "get_miner_responses(miner_uid)": lambda conn: get_miner_responses(conn, miner_uid="7"),
+        "get_miner_responses(last day)": lambda conn: get_miner_responses(conn, from_ts=now_ms - day_ms, to_ts=now_ms),
+        "get_request_info(last day)": lambda conn: get_request_info(conn, from_ts=now_ms - day_ms, to_ts=now_ms),
+    }
+
+
+def get_query_plans(conn: sqlite3.Connection, query: Callable) -> list[str]:
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        query(conn)
+    finally:
+        conn.set_trace_callback(None)
+
+    plans = []
+    for statement in statements:
+        if statement.lstrip().upper().startswith(("SELECT", "DELETE")):
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+            plans.extend(row["detail"] for row in rows)
+    return plans
+
+
+def time_query(conn: sqlite3.Connection, query: Callable, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        query(conn)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def benchmark(conn: sqlite3.Connection, repeats: int) -> dict[str, tuple[list[str], float]]:
+    return {name: (get_query_plans(conn, query), time_query(conn, query, repeats)) for name, query in get_queries().items()}
+
+
+def main(args: argparse.Namespace) -> None:
+    migrations = sorted(MIGRATIONS_DIR.glob("*.sql"))
+    index_migration = next(migration for migration in migrations if migration.name.endswith(INDEX_MIGRATION))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_dir = str(Path(tmp_dir) / "benchmark.db")
+        with get_db_connection(db_dir) as conn:
+            for migration in migrations:
+                if migration != index_migration:
+                    migrate_up(conn, migration)
+
+            start = time.perf_counter()
+            fill_db(conn, args.days, args.requests_per_day, args.miners, args.api_keys, args.api_requests_per_day)
+            num_allocations = conn.execute("SELECT COUNT(*) FROM allocations").fetchone()[0]
+            num_logs = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+            print(
+                f"Filled database with {num_allocations} allocations and {num_logs} api request logs "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+            before = benchmark(conn, args.repeats)
+            migrate_up(conn, index_migration)
+            after = benchmark(conn, args.repeats)
+        close_db_connections(db_dir)
+
+    print(f"\n{'query':<32} | {'before (ms)':>11} | {'after (ms)':>10} | {'speedup':>8}")
+    for name, (_, before_ms) in before.items():
+        after_ms = after[name][1]
+        print(f"{name:<32} | {before_ms:>11.3f} | {after_ms:>10.3f} | {before_ms / after_ms:>7.1f}x")
+
+    for name, (before_plans, _) in before.items():
+        print(f"\n{name}")
+        print(f"  before: {'; '.join(before_plans)}")
+        print(f"  after:  {'; '.join(after[name][0])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--requests-per-day", type=int, default=24)
+    parser.add_argument("--miners", type=int, default=64)
+    parser.add_argument("--api-keys", type=int, default=8)
+    parser.add_argument("--api-requests-per-day", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=20)
+    main(parser.parse_args())
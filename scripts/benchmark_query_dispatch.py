@@ -0,0 +1,88 @@
+"""
+Benchmarks the per-request overhead of dispatching miner queries through a thread pool (the old
+process_single_request path) versus awaiting query_single_axon directly on the event loop.
+
+MockDendrite answers immediately, so the timings are pure dispatch overhead.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_query_dispatch.py [--uids 64 256 1024] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import statistics
+import time
+
+import bittensor as bt
+from bittensor_wallet.mock import get_mock_wallet
+
+from sturdy.constants import ALLOC_QUERY_TIMEOUT
+from sturdy.mock import MockDendrite
+from sturdy.protocol import QueryMinerType
+from sturdy.validator.request import Request
+from sturdy.validator.utils.axon import query_single_axon
+
+
+def make_requests(wallet, n: int) -> list[Request]:
+    axon = bt.AxonInfo(
+        version=0,
+        ip="127.0.0.1",
+        port=8091,
+        ip_type=4,
+        hotkey=wallet.hotkey.ss58_address,
+        coldkey=wallet.coldkeypub.ss58_address,
+    )
+    return [Request(uid=uid, axon=axon, synapse=QueryMinerType()) for uid in range(n)]
+
+
+async def executor_dispatch(thread_pool, dendrite: MockDendrite, request: Request) -> Request:
+    # what process_single_request used to do: hop to a worker thread just to create the coroutine
+    response = await asyncio.get_event_loop().run_in_executor(
+        thread_pool,
+        lambda: query_single_axon(dendrite, request, query_timeout=ALLOC_QUERY_TIMEOUT),
+    )
+    return await response
+
+
+async def direct_dispatch(_thread_pool, dendrite: MockDendrite, request: Request) -> Request:
+    return await query_single_axon(dendrite, request, query_timeout=ALLOC_QUERY_TIMEOUT)
+
+
+async def time_dispatch(dispatch, thread_pool, dendrite: MockDendrite, requests: list[Request]) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(dispatch(thread_pool, dendrite, request) for request in requests))
+    return time.perf_counter() - start
+
+
+async def main(uid_counts: list[int], rounds: int) -> None:
+    wallet = get_mock_wallet()
+    dendrite = MockDendrite(wallet=wallet)
+    thread_pool = concurrent.futures.ThreadPoolExecutor()
+
+    # warm up
+    await time_dispatch(direct_dispatch, thread_pool, dendrite, make_requests(wallet, 8))
+    await time_dispatch(executor_dispatch, thread_pool, dendrite, make_requests(wallet, 8))
+
+    print(f"{'uids':>6} | {'executor (ms)':>14} | {'direct (ms)':>12} | {'saved / request (us)':>21}")
+    for n in uid_counts:
+        executor_times = []
+        direct_times = []
+        for _ in range(rounds):
+            executor_times.append(await time_dispatch(executor_dispatch, thread_pool, dendrite, make_requests(wallet, n)))
+            direct_times.append(await time_dispatch(direct_dispatch, thread_pool, dendrite, make_requests(wallet, n)))
+
+        executor_ms = statistics.median(executor_times) * 1e3
+        direct_ms = statistics.median(direct_times) * 1e3
+        saved_us = (executor_ms - direct_ms) * 1e3 / n
+        print(f"{n:>6} | {executor_ms:>14.2f} | {direct_ms:>12.2f} | {saved_us:>21.2f}")
+
+    thread_pool.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uids", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.uids, args.rounds))
@@ -0,0 +1,84 @@
+"""
+Benchmarks the allocation reward pipeline (apy binning, similarity penalties, bin normalization) on synthetic miners.
+
+A fraction of the miners copy the allocations of others, with or without a bit of noise, to exercise the similarity
+penalties the same way copycat miners do on mainnet. Exits with a non-zero status if a run takes longer than
+--max-seconds, so it can be used to catch performance regressions.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_reward_pipeline.py [--miners 256 1024 4096] [--pools 10] [--max-seconds 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from sturdy.validator.apy_binning import calculate_bin_rewards, create_apy_bins, sort_bins_by_processing_time
+
+TOTAL_ASSETS = int(1_000_000e18)
+
+
+def make_miners(rng: np.random.RandomState, num_miners: int, num_pools: int) -> tuple[dict, dict, dict]:
+    pools = {f"0x{idx:040x}": None for idx in range(num_pools)}
+    originals = [rng.dirichlet(np.ones(num_pools)) * TOTAL_ASSETS for _ in range(max(1, num_miners // 20))]
+
+    apys_and_allocations = {}
+    axon_times = {}
+    for uid in range(num_miners):
+        match uid % 3:
+            case 0:
+                amounts = originals[rng.randint(len(originals))]
+            case 1:
+                base = originals[rng.randint(len(originals))]
+                amounts = np.clip(base + rng.normal(0, TOTAL_ASSETS * 1e-5, num_pools), 0, None)
+            case _:
+                amounts = rng.dirichlet(np.ones(num_pools)) * TOTAL_ASSETS
+        allocations = {pool: int(amount) for pool, amount in zip(pools, amounts, strict=True)}
+        # miners with the same allocations get the same apy
+        apy = int(sum(amounts[:3]) // 10**12)
+        apys_and_allocations[str(uid)] = {"apy": apy, "allocations": allocations}
+        axon_times[str(uid)] = float(rng.uniform(0.1, 10))
+
+    return apys_and_allocations, axon_times, {"total_assets": TOTAL_ASSETS, "pools": pools}
+
+
+def run_pipeline(apys_and_allocations: dict, axon_times: dict, assets_and_pools: dict) -> None:
+    apys = {uid: info["apy"] for uid, info in apys_and_allocations.items()}
+    apy_bins = sort_bins_by_processing_time(create_apy_bins(apys), axon_times)
+    calculate_bin_rewards(apy_bins, apys_and_allocations, assets_and_pools, axon_times)
+
+
+def main(miner_counts: list[int], num_pools: int, rounds: int, max_seconds: float | None) -> int:
+    rng = np.random.RandomState(42)
+    exceeded = False
+
+    print(f"{'miners':>7} | {'median (ms)':>12} | {'max (ms)':>9}")
+    for num_miners in miner_counts:
+        miners = make_miners(rng, num_miners, num_pools)
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run_pipeline(*miners)
+            times.append(time.perf_counter() - start)
+
+        print(f"{num_miners:>7} | {statistics.median(times) * 1e3:>12.1f} | {max(times) * 1e3:>9.1f}")
+        if max_seconds is not None and statistics.median(times) > max_seconds:
+            exceeded = True
+
+    if exceeded:
+        print(f"Reward pipeline took longer than {max_seconds}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--miners", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--pools", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+    sys.exit(main(args.miners, args.pools, args.rounds, args.max_seconds))
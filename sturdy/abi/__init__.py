@@ -0,0 +1,14 @@
+import json
+from functools import cache
+from pathlib import Path
+
+ABI_DIR = Path(__file__).parent
+
+
+@cache
+def load_abi(name: str) -> list[dict]:
+    """
+    Loads the abi `sturdy/abi/<name>.json`. Each abi is only read and parsed once, later calls return the same object - so
+    it must not be modified.
+    """
+    return json.loads((ABI_DIR / f"{name}.json").read_text())
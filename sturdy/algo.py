@@ -10,6 +10,7 @@ from sturdy.pools import (
     BittensorAlphaTokenPool,
     PoolFactory,
     get_minimum_allocation,
+    sync_pools,
 )
 from sturdy.protocol import AllocateAssets, AlphaTokenPoolAllocation
 
@@ -47,8 +48,9 @@ async def naive_algorithm(self: BaseMinerNeuron, synapse: AllocateAssets) -> dic
     rates = {}
 
     # sync pool parameters by calling smart contracts on chain
-    for pool in pools.values():
-        await pool.sync(self.pool_data_providers[pool.pool_data_provider_type])
+    for err in await sync_pools(pools.values(), self.pool_data_providers):
+        if err is not None:
+            raise err
     bt.logging.debug("synced pools")
 
     # check the amounts that have been borrowed from the pools - and account for them
@@ -1,6 +1,5 @@
 import argparse
 import asyncio
-import concurrent.futures
 import copy
 import os
 import time
@@ -11,15 +10,23 @@ import numpy.typing as npt
 from dotenv import load_dotenv
 
 from sturdy.base.neuron import BaseNeuron
-from sturdy.constants import MINER_TYPE_QUERY_TIMEOUT, QUERY_FREQUENCY, UNISWAP_V3_LP_QUERY_FREQUENCY
+from sturdy.constants import (
+    DB_ARCHIVE_BATCH_SIZE,
+    QUERY_FREQUENCY,
+    UNISWAP_V3_LP_QUERY_FREQUENCY,
+    VALI_EPOCH_STORE_FILENAME,
+)
 from sturdy.mock import MockDendrite
-from sturdy.protocol import QueryMinerType
 from sturdy.providers import POOL_DATA_PROVIDER_TYPE, PoolProviderFactory
+from sturdy.utils.bt_alpha import ValiEpochStore
 from sturdy.utils.config import add_validator_args
 from sturdy.utils.misc import normalize_numpy
 from sturdy.utils.wandb import init_wandb_validator, reinit_wandb, should_reinit_wandb
 from sturdy.utils.weight_utils import process_weights_for_netuid
+from sturdy.validator.async_sql import close_async_dbs, get_async_db
 from sturdy.validator.forward import uniswap_v3_lp_forward
+from sturdy.validator.sql import close_db_connections
+from sturdy.validator.utils.axon import MinerTypeCacheEntry, get_stale_miner_type_uids, query_miner_types
 
 
 class BaseValidatorNeuron(BaseNeuron):
@@ -35,9 +42,6 @@ class BaseValidatorNeuron(BaseNeuron):
         add_validator_args(cls, parser)
 
     async def _init_async(self, config=None) -> None:
-        # Initialize thread_pool first before any potential early returns
-        self.thread_pool = None
-
         await super()._init_async(config=config)
         load_dotenv()
 
@@ -45,6 +49,7 @@ class BaseValidatorNeuron(BaseNeuron):
         self.last_query_time = 0
         # Add separate query time for uniswap v3 lp forward
         self.last_uniswap_v3_lp_query_time = 0
+        self.last_db_compaction_time = 0
 
         # init wandb
         self.wandb_run_log_count = 0
@@ -85,6 +90,12 @@ class BaseValidatorNeuron(BaseNeuron):
             ),
         }
 
+        # the sampled dividends and stake of validators, shared by all the scoring passes
+        vali_epoch_store_path = self.config.validator.vali_epoch_store_path or os.path.join(  # noqa: PTH118
+            self.config.neuron.full_path, VALI_EPOCH_STORE_FILENAME.format(network=self.config.subtensor.network)
+        )
+        self.vali_epoch_store = ValiEpochStore(path=vali_epoch_store_path)
+
         # Dendrite lets us send messages to other nodes (axons) in the network.
         if self.config.mock:
             self.dendrite = MockDendrite(wallet=self.wallet)
@@ -100,6 +111,8 @@ class BaseValidatorNeuron(BaseNeuron):
         self.sorted_apys = {}
         self.sorted_axon_times = {}
         self.miner_types = {}
+        # hotkey -> last successfully queried miner type
+        self.miner_type_cache: dict[str, MinerTypeCacheEntry] = {}
 
         # Load state
         bt.logging.info("load_state()")
@@ -119,19 +132,14 @@ class BaseValidatorNeuron(BaseNeuron):
         self._tasks = []
         self.last_query_time = 0
         self.last_uniswap_v3_lp_query_time = 0
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.config.validator.max_workers)
-
-    def __del__(self) -> None:
-        if self.thread_pool:
-            # Shutdown the thread pool when the object is deleted
-            bt.logging.info("Shutting down thread pool...")
-            self.thread_pool.shutdown(wait=True)
 
     async def start(self) -> None:
         """Start validator tasks"""
         self._tasks.append(asyncio.create_task(self.run_main_loop()))
         # Add the uniswap v3 lp loop as a separate task
         self._tasks.append(asyncio.create_task(self.run_uniswap_v3_lp_loop()))
+        # Prune old allocations and api request logs in the background
+        self._tasks.append(asyncio.create_task(self.run_db_compaction_loop()))
 
     async def stop(self) -> None:
         """Stop all validator tasks"""
@@ -148,6 +156,9 @@ class BaseValidatorNeuron(BaseNeuron):
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         await self.stop()
+        # commit any queued writes before closing the connections
+        await close_async_dbs()
+        close_db_connections()
         if self.wandb:
             self.wandb.finish()
 
@@ -212,6 +223,46 @@ class BaseValidatorNeuron(BaseNeuron):
         except Exception as e:
             bt.logging.exception(f"Error in uniswap v3 lp loop: {e}")
 
+    async def compact_db(self) -> None:
+        """
+        Rolls old api request logs up into daily totals, and moves old allocations to the archive - in batches, so that
+        other database writes aren't held up for long.
+        """
+        db = get_async_db(self.config.db_dir)
+        rolled_up = await db.rollup_logs(self.config.validator.log_retention_days)
+
+        archived = 0
+        while not self._stop_event.is_set():
+            num_archived = await db.archive_allocations(
+                self.config.validator.db_archive_dir,
+                self.config.validator.allocation_retention_days,
+                DB_ARCHIVE_BATCH_SIZE,
+            )
+            archived += num_archived
+            if num_archived < DB_ARCHIVE_BATCH_SIZE:
+                break
+
+        bt.logging.info(f"Compacted database: rolled up {rolled_up} api request logs, archived {archived} allocation requests")
+
+    async def run_db_compaction_loop(self) -> None:
+        """Database compaction loop running in parallel"""
+        try:
+            while not self._stop_event.is_set():
+                current_time = time.time()
+
+                if current_time - self.last_db_compaction_time > self.config.validator.db_compaction_interval:
+                    try:
+                        await self.compact_db()
+                    except Exception as e:
+                        bt.logging.exception(f"Error in compact_db: {e}")
+
+                    self.last_db_compaction_time = current_time
+
+                await asyncio.sleep(1)
+
+        except Exception as e:
+            bt.logging.exception(f"Error in db compaction loop: {e}")
+
     def log_metrics(self) -> None:
         """Log metrics to wandb"""
         if self.config.wandb.off:
@@ -331,25 +382,40 @@ class BaseValidatorNeuron(BaseNeuron):
         # Sync the metagraph.
         await self.metagraph.sync(subtensor=self.subtensor)
 
-        # Query miners to check what kind of miners they are
-        synapse = QueryMinerType()
-        responses = [
-            await self.dendrite.call(
-                target_axon=axon,
-                synapse=synapse.model_copy(),
-                timeout=MINER_TYPE_QUERY_TIMEOUT,
-                deserialize=False,
-            )
-            for axon in self.metagraph.axons
-        ]
+        # Query miners to check what kind of miners they are - only new hotkeys, hotkeys which moved to a different axon,
+        # and hotkeys whose cached type has expired are queried
+        axons = self.metagraph.axons
+        now = time.time()
+        stale_uids = get_stale_miner_type_uids(
+            self.miner_type_cache, axons, ttl=self.config.validator.miner_type_cache_ttl, now=now
+        )
+        bt.logging.debug(f"Querying miner types of {len(stale_uids)}/{len(axons)} uids")
+        responses = await query_miner_types(
+            self.dendrite,
+            {uid: axons[uid] for uid in stale_uids},
+            max_concurrent_queries=self.config.validator.max_concurrent_queries,
+        )
 
         old_miner_types = copy.deepcopy(self.miner_types)
 
         bt.logging.debug(f"Responses from miners: {responses}")
 
-        # update self.miner_types based on responses
-        for uid, response in enumerate(responses):
+        # update self.miner_types based on responses, falling back to the cached type for miners which weren't queried.
+        # failed queries are not cached so those miners are queried again on the next resync
+        for uid, response in responses.items():
+            if response.is_success:
+                self.miner_type_cache[axons[uid].hotkey] = MinerTypeCacheEntry(
+                    miner_type=response.miner_type, axon=(axons[uid].ip, axons[uid].port), probed_at=now
+                )
             self.miner_types[uid] = response.miner_type
+        for uid, axon in enumerate(axons):
+            if uid not in responses:
+                self.miner_types[uid] = self.miner_type_cache[axon.hotkey].miner_type
+
+        # forget hotkeys which are no longer registered
+        registered_hotkeys = {axon.hotkey for axon in axons}
+        for hotkey in set(self.miner_type_cache) - registered_hotkeys:
+            del self.miner_type_cache[hotkey]
 
         bt.logging.debug(f"Updated miner types: {self.miner_types}")
 
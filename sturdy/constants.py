@@ -4,6 +4,9 @@ QUERY_FREQUENCY = 600  # time in seconds between validator queries
 ALLOC_QUERY_TIMEOUT = 3  # timeout for challenge requests to miners (seconds)
 LP_QUERY_TIMEOUT = 10  # timeout for lp miners
 MINER_TYPE_QUERY_TIMEOUT = 3  # timeout for miner type queries (seconds)
+MINER_TYPE_CACHE_TTL = 3600  # time in seconds a miner's reported type is trusted before it is queried again
+MAX_CONCURRENT_QUERIES = 64  # max. number of miner queries in flight at once
+QUERY_DEADLINE_BUFFER = 1  # extra time (seconds) on top of the query timeout before a miner query is abandoned
 MINER_SYNC_FREQUENCY = 300  # time in seconds between miner syncs
 
 UNISWAP_V3_LP_QUERY_FREQUENCY = 3600  # time in seconds between Uniswap V3 LP queries
@@ -32,6 +35,12 @@ SCORING_WINDOW = 420  # scoring window
 TOTAL_ALLOC_THRESHOLD = 0.98
 ALLOCATION_SIMILARITY_THRESHOLD = 1e-4  # similarity threshold for plagiarism checking
 MIN_DELEGATE_STAKE = 10000.0  # minimum amount of nominator alpha stake to be considered a valid delegate
+MAX_CONCURRENT_YIELDS = 32  # max. number of miner yields to calculate at once when scoring
+SUBTENSOR_READ_CACHE_SIZE = 16384  # max. number of subtensor reads (per kind of read) to cache
+SUBNETS_SNAPSHOT_CACHE_SIZE = 32  # max. number of blocks to keep the dynamic info of all the subnets at
+# file (in the neuron directory, per subtensor network) the sampled dividends and stake of validators are persisted to
+VALI_EPOCH_STORE_FILENAME = "vali_epoch_store_{network}.json"
+VALI_EPOCH_STORE_MAX_BLOCK_AGE = 50400  # samples more than this many blocks (~a week) behind the newest one are dropped
 
 # Constants for APY-based binning and rewards
 APY_BIN_THRESHOLD_FALLBACK = 1e-5  # Fallback threshold: 0.00001 difference in APY to create new bin
@@ -41,6 +50,23 @@ TOP_PERFORMERS_COUNT = 10  # Number of top performers to receive bonus
 NORM_EXP_POW = 16
 
 DB_DIR = "validator_database.db"  # default validator database dir
+DB_BUSY_TIMEOUT = 10.0  # max. time to wait for a lock on the database, in seconds
+DB_SYNCHRONOUS = "NORMAL"  # safe with WAL - only the last commits may be lost on power loss, never corrupting the db
+DB_CACHE_SIZE_KIB = 32768  # page cache size of each database connection, in KiB
+DB_STATEMENT_CACHE_SIZE = 256  # max. number of prepared statements to keep around per database connection
+DB_MAX_IDLE_READERS = 4  # max. number of idle read-only database connections to keep open
+DB_MAX_WRITE_BATCH = 256  # max. number of queued database writes to commit at once
+DB_COMPACTION_INTERVAL = 3600  # time in seconds between database compactions
+DB_ARCHIVE_DIR = "validator_database_archive"  # default dir which archived allocations are written to
+DB_ARCHIVE_BATCH_SIZE = 500  # max. number of allocation requests to archive per write
+LOG_RETENTION_DAYS = 30  # api request logs older than this are rolled up into daily totals per key (0 to keep them all)
+ALLOCATION_RETENTION_DAYS = 30  # allocations older than this are moved to the archive (0 to keep them all)
+
+# api
+API_KEY_CACHE_TTL = 30.0  # how often the cached api keys are reloaded from the database, in seconds
+API_RATE_LIMIT_WINDOW = 60.0  # window which the per minute rate limits of api keys are enforced over, in seconds
+API_USAGE_FLUSH_INTERVAL = 1.0  # how often api credit debits and request logs are written to the database, in seconds
+API_USAGE_MAX_PENDING = 1000  # number of pending api request logs which triggers an early write
 
 MIN_TOTAL_ASSETS_AMOUNT = int(1000e6)  # min total assets required in a request to query miners
 
@@ -49,6 +75,25 @@ MIN_TOTAL_ASSETS_AMOUNT = int(1000e6)  # min total assets required in a request
 RESERVE_FACTOR_START_BIT_POSITION = 64
 RESERVE_FACTOR_MASK = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF0000FFFFFFFFFFFFFFFF
 
+# multicall3 - deployed at the same address on most evm chains, see: https://github.com/mds1/multicall
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL_BATCH_SIZE = 500  # max. number of calls to aggregate into a single eth_call
+
+POOL_SYNC_CONCURRENCY = 16  # max. number of pools to sync at once
+
+# scheduling of the requests made to each rpc provider
+RPC_RATE_LIMIT = 25.0  # average number of requests per second
+RPC_BURST = 50  # max. number of requests which can be made at once after being idle
+RPC_MAX_CONCURRENT_REQUESTS = 16  # max. number of requests in flight at once
+RPC_MAX_RETRIES = 5  # max. number of times to retry a request which was rate limited
+RPC_BACKOFF_BASE_DELAY = 0.1  # delay before the first retry, in seconds - doubled on each retry
+RPC_BACKOFF_MAX_DELAY = 60  # max. delay between retries, in seconds
+
+# eth_call responses made at a specific block are cached by the web3 providers
+ETH_CALL_CACHE_SIZE = 8192  # max. number of cached eth_call responses
+ETH_CALL_CACHE_MAX_BLOCK_AGE = 32  # responses more than this many blocks behind the newest cached block are evicted
+CONTRACT_CACHE_SIZE = 1024  # max. number of contract instances to keep around, across all the web3 providers
+
 # yearn finance
 APR_ORACLE = (
     "0x27aD2fFc74F74Ed27e1C0A19F1858dD0963277aE"  # https://docs.yearn.fi/developers/smart-contracts/V3/periphery/AprOracle
@@ -288,6 +288,18 @@ class MockDendrite(bt.dendrite):
 
         return await query_all_axons(streaming)
 
+    async def call(
+        self,
+        target_axon: bt.AxonInfo | bt.axon,
+        synapse: bt.Synapse = bt.Synapse(),  # noqa: B008
+        timeout: float = ALLOC_QUERY_TIMEOUT,  # noqa: ASYNC109
+        deserialize: bool = True,
+    ) -> bt.Synapse:
+        """Mocks a single axon query, so that code which uses `call()` (i.e. query_single_axon) does not hit the network."""
+        if isinstance(target_axon, bt.axon):
+            target_axon = target_axon.info()
+        return await self.forward(axons=target_axon, synapse=synapse, timeout=timeout, deserialize=deserialize)
+
     def __str__(self) -> str:
         """
         Returns a string representation of the Dendrite object.
@@ -15,11 +15,11 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-import json
+import asyncio
 import math
+from collections.abc import Iterable
 from decimal import Decimal
 from enum import Enum
-from pathlib import Path
 from typing import Any, ClassVar, Literal
 
 import bittensor as bt
@@ -30,19 +30,21 @@ from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_valid
 from web3 import AsyncWeb3
 from web3.constants import ADDRESS_ZERO
 from web3.contract.async_contract import AsyncContract
-from web3.types import BlockData
+from web3.types import BlockIdentifier
 
 from sturdy.constants import *
 from sturdy.pool_registry.pool_registry import POOL_REGISTRY
 from sturdy.providers import POOL_DATA_PROVIDER_TYPE
+from sturdy.utils.bt_alpha import fetch_subnets_snapshot
+from sturdy.utils.contracts import get_contract
 from sturdy.utils.ethmath import wei_div
 from sturdy.utils.misc import (
     async_retry_with_backoff,
     generate_random_partition_np,
     getReserveFactor,
     rayMul,
-    retry_with_backoff,
 )
+from sturdy.utils.multicall import ReadRounds, get_multicall3_contract, run_read_rounds
 
 
 class POOL_TYPES(str, Enum):
@@ -200,8 +202,15 @@ class ChainBasedPoolModel(BaseModel):
     async def pool_init(self, **args: Any) -> None:
         raise NotImplementedError("pool_init() has not been implemented!")
 
-    async def sync(self, **args: Any) -> None:
-        raise NotImplementedError("sync() has not been implemented!")
+    async def sync(self, web3_provider: AsyncWeb3, block_identifier: BlockIdentifier = "latest") -> None:
+        """Syncs with chain - all of the pool's state is read at `block_identifier`"""
+        (err,) = await multicall_sync_pools([self], web3_provider, block_identifier=block_identifier)
+        if err is not None:
+            raise err
+
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:
+        """Yields the rounds of on-chain reads needed to sync the pool, and updates the pool with their results"""
+        raise NotImplementedError("sync_reads() has not been implemented!")
 
     async def supply_rate(self, **args: Any) -> int:
         raise NotImplementedError("supply_rate() has not been implemented!")
@@ -245,10 +254,10 @@ class BittensorAlphaTokenPool(BaseModel):
     async def pool_init(self, subtensor: bt.AsyncSubtensor) -> None:
         await self.sync(subtensor)
 
-    # TODO: use async subtensor interface
-    async def sync(self, subtensor: bt.AsyncSubtensor) -> None:
+    async def sync(self, subtensor: bt.AsyncSubtensor, dynamic_info: bt.DynamicInfo | None = None) -> None:
+        """Syncs the pool from the given dynamic info of its subnet (i.e. from a snapshot of all subnets), or reads it."""
         try:
-            self._dynamic_info = await subtensor.subnet(netuid=self.netuid)
+            self._dynamic_info = dynamic_info if dynamic_info is not None else await subtensor.subnet(netuid=self.netuid)
             self._price_rao = self._dynamic_info.price.rao
         except Exception as err:
             bt.logging.error("Failed to sync alpha token pool!")
@@ -324,40 +333,19 @@ class AaveV3DefaultInterestRateV2Pool(ChainBasedPoolModel):
             bt.logging.error(err)  # type: ignore[]
 
         try:
-            atoken_abi_file_path = Path(__file__).parent / "abi/AToken.json"
-            atoken_abi_file = atoken_abi_file_path.open()
-            atoken_abi = json.load(atoken_abi_file)
-            atoken_abi_file.close()
-            atoken_contract = web3_provider.eth.contract(abi=atoken_abi, decode_tuples=True)
-            self._atoken_contract = retry_with_backoff(
-                atoken_contract,
-                address=self.contract_address,
-            )
-
-            pool_abi_file_path = Path(__file__).parent / "abi/Pool.json"
-            pool_abi_file = pool_abi_file_path.open()
-            pool_abi = json.load(pool_abi_file)
-            pool_abi_file.close()
+            self._atoken_contract = get_contract(web3_provider, "AToken", self.contract_address, decode_tuples=True)
 
             atoken_contract = self._atoken_contract
             pool_address = await async_retry_with_backoff(atoken_contract.functions.POOL().call)
 
-            pool_contract = web3_provider.eth.contract(abi=pool_abi, decode_tuples=True)
-            self._pool_contract = retry_with_backoff(pool_contract, address=pool_address)
+            self._pool_contract = get_contract(web3_provider, "Pool", pool_address, decode_tuples=True)
 
             self._underlying_asset_address = await async_retry_with_backoff(
                 self._atoken_contract.functions.UNDERLYING_ASSET_ADDRESS().call,
             )
 
-            erc20_abi_file_path = Path(__file__).parent / "abi/IERC20.json"
-            erc20_abi_file = erc20_abi_file_path.open()
-            erc20_abi = json.load(erc20_abi_file)
-            erc20_abi_file.close()
-
-            underlying_asset_contract = web3_provider.eth.contract(abi=erc20_abi, decode_tuples=True)
-            self._underlying_asset_contract = retry_with_backoff(
-                underlying_asset_contract,
-                address=self._underlying_asset_address,
+            self._underlying_asset_contract = get_contract(
+                web3_provider, "IERC20", self._underlying_asset_address, decode_tuples=True
             )
 
             self._total_supplied_assets = await async_retry_with_backoff(self._atoken_contract.functions.totalSupply().call)
@@ -368,91 +356,53 @@ class AaveV3DefaultInterestRateV2Pool(ChainBasedPoolModel):
             bt.logging.error("Failed to load contract!")
             bt.logging.error(err)  # type: ignore[]
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:
         """Syncs with chain"""
-        if not self._initted:
-            await self.pool_init(web3_provider)
         try:
-            pool_abi_file_path = Path(__file__).parent / "abi/Pool.json"
-            pool_abi_file = pool_abi_file_path.open()
-            pool_abi = json.load(pool_abi_file)
-            pool_abi_file.close()
-
-            atoken_contract_onchain = self._atoken_contract
-            pool_address = await async_retry_with_backoff(atoken_contract_onchain.functions.POOL().call)
-
-            pool_contract = web3_provider.eth.contract(abi=pool_abi, decode_tuples=True)
-            self._pool_contract = retry_with_backoff(pool_contract, address=pool_address)
-
-            self._underlying_asset_address = await async_retry_with_backoff(
-                self._atoken_contract.functions.UNDERLYING_ASSET_ADDRESS().call,
-            )
-
-            self._reserve_data = await async_retry_with_backoff(
-                self._pool_contract.functions.getReserveData(self._underlying_asset_address).call,
+            user_address = AsyncWeb3.to_checksum_address(self.user_address)
+            results = yield {
+                "reserve_data": self._pool_contract.functions.getReserveData(self._underlying_asset_address),
+                "decimals": self._underlying_asset_contract.functions.decimals(),
+                "user_deposits": self._atoken_contract.functions.balanceOf(user_address),
+                "user_asset_balance": self._underlying_asset_contract.functions.balanceOf(user_address),
+                "yield_index": self._pool_contract.functions.getReserveNormalizedIncome(self._underlying_asset_address),
+                "total_supplied_assets": self._atoken_contract.functions.totalSupply(),
+            }
+            self._reserve_data = results["reserve_data"]
+            self._decimals = results["decimals"]
+            self._total_supplied_assets = results["total_supplied_assets"]
+            self._user_deposits = results["user_deposits"]
+            self._user_asset_balance = results["user_asset_balance"]
+            self._yield_index = results["yield_index"]
+
+            self._strategy_contract = get_contract(
+                web3_provider, "IReserveInterestRateStrategy", self._reserve_data.interestRateStrategyAddress
             )
 
-            reserve_strat_abi_file_path = Path(__file__).parent / "abi/IReserveInterestRateStrategy.json"
-            reserve_strat_abi_file = reserve_strat_abi_file_path.open()
-            reserve_strat_abi = json.load(reserve_strat_abi_file)
-            reserve_strat_abi_file.close()
-
-            strategy_contract = web3_provider.eth.contract(abi=reserve_strat_abi)
-            self._strategy_contract = retry_with_backoff(
-                strategy_contract,
-                address=self._reserve_data.interestRateStrategyAddress,
+            stable_debt_token_contract = get_contract(
+                web3_provider, "IStableDebtToken", self._reserve_data.stableDebtTokenAddress
             )
 
-            stable_debt_token_abi_file_path = Path(__file__).parent / "abi/IStableDebtToken.json"
-            stable_debt_token_abi_file = stable_debt_token_abi_file_path.open()
-            stable_debt_token_abi = json.load(stable_debt_token_abi_file)
-            stable_debt_token_abi_file.close()
-
-            stable_debt_token_contract = web3_provider.eth.contract(abi=stable_debt_token_abi)
-            stable_debt_token_contract = retry_with_backoff(
-                stable_debt_token_contract,
-                address=self._reserve_data.stableDebtTokenAddress,
+            self._variable_debt_token_contract = get_contract(
+                web3_provider, "IVariableDebtToken", self._reserve_data.variableDebtTokenAddress
             )
 
+            results = yield {
+                "supply_data": stable_debt_token_contract.functions.getSupplyData(),
+                "scaled_variable_debt": self._variable_debt_token_contract.functions.scaledTotalSupply(),
+            }
             (
                 _,
                 self._nextTotalStableDebt,
                 self._nextAvgStableBorrowRate,
                 _,
-            ) = await async_retry_with_backoff(stable_debt_token_contract.functions.getSupplyData().call)
-
-            variable_debt_token_abi_file_path = Path(__file__).parent / "abi/IVariableDebtToken.json"
-            variable_debt_token_abi_file = variable_debt_token_abi_file_path.open()
-            variable_debt_token_abi = json.load(variable_debt_token_abi_file)
-            variable_debt_token_abi_file.close()
-
-            variable_debt_token_contract = web3_provider.eth.contract(abi=variable_debt_token_abi)
-            self._variable_debt_token_contract = retry_with_backoff(
-                variable_debt_token_contract,
-                address=self._reserve_data.variableDebtTokenAddress,
-            )
+            ) = results["supply_data"]
 
             nextVariableBorrowIndex = self._reserve_data.variableBorrowIndex
-
-            nextScaledVariableDebt = await async_retry_with_backoff(
-                self._variable_debt_token_contract.functions.scaledTotalSupply().call
-            )
-            self._totalVariableDebt = rayMul(nextScaledVariableDebt, nextVariableBorrowIndex)
+            self._totalVariableDebt = rayMul(results["scaled_variable_debt"], nextVariableBorrowIndex)
 
             reserveConfiguration = self._reserve_data.configuration
             self._reserveFactor = getReserveFactor(reserveConfiguration)
-            self._decimals = await async_retry_with_backoff(self._underlying_asset_contract.functions.decimals().call)
-            self._user_deposits = await async_retry_with_backoff(
-                self._atoken_contract.functions.balanceOf(AsyncWeb3.to_checksum_address(self.user_address)).call
-            )
-
-            self._user_asset_balance = await async_retry_with_backoff(
-                self._underlying_asset_contract.functions.balanceOf(AsyncWeb3.to_checksum_address(self.user_address)).call
-            )
-
-            self._yield_index = await async_retry_with_backoff(
-                self._pool_contract.functions.getReserveNormalizedIncome(self._underlying_asset_address).call
-            )
 
         except Exception as err:
             bt.logging.error("Failed to sync to chain!")
@@ -537,40 +487,19 @@ class AaveV3RateTargetBaseInterestRatePool(ChainBasedPoolModel):
             bt.logging.error(err)  # type: ignore[]
 
         try:
-            atoken_abi_file_path = Path(__file__).parent / "abi/AToken.json"
-            atoken_abi_file = atoken_abi_file_path.open()
-            atoken_abi = json.load(atoken_abi_file)
-            atoken_abi_file.close()
-            atoken_contract = web3_provider.eth.contract(abi=atoken_abi, decode_tuples=True)
-            self._atoken_contract = retry_with_backoff(
-                atoken_contract,
-                address=self.contract_address,
-            )
-
-            pool_abi_file_path = Path(__file__).parent / "abi/Pool.json"
-            pool_abi_file = pool_abi_file_path.open()
-            pool_abi = json.load(pool_abi_file)
-            pool_abi_file.close()
+            self._atoken_contract = get_contract(web3_provider, "AToken", self.contract_address, decode_tuples=True)
 
             atoken_contract = self._atoken_contract
             pool_address = await async_retry_with_backoff(atoken_contract.functions.POOL().call)
 
-            pool_contract = web3_provider.eth.contract(abi=pool_abi, decode_tuples=True)
-            self._pool_contract = retry_with_backoff(pool_contract, address=pool_address)
+            self._pool_contract = get_contract(web3_provider, "Pool", pool_address, decode_tuples=True)
 
             self._underlying_asset_address = await async_retry_with_backoff(
                 self._atoken_contract.functions.UNDERLYING_ASSET_ADDRESS().call,
             )
 
-            erc20_abi_file_path = Path(__file__).parent / "abi/IERC20.json"
-            erc20_abi_file = erc20_abi_file_path.open()
-            erc20_abi = json.load(erc20_abi_file)
-            erc20_abi_file.close()
-
-            underlying_asset_contract = web3_provider.eth.contract(abi=erc20_abi, decode_tuples=True)
-            self._underlying_asset_contract = retry_with_backoff(
-                underlying_asset_contract,
-                address=self._underlying_asset_address,
+            self._underlying_asset_contract = get_contract(
+                web3_provider, "IERC20", self._underlying_asset_address, decode_tuples=True
             )
 
             self._total_supplied_assets = await async_retry_with_backoff(self._atoken_contract.functions.totalSupply().call)
@@ -581,91 +510,53 @@ class AaveV3RateTargetBaseInterestRatePool(ChainBasedPoolModel):
             bt.logging.error("Failed to load contract!")
             bt.logging.error(err)  # type: ignore[]
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:
         """Syncs with chain"""
-        if not self._initted:
-            await self.pool_init(web3_provider)
         try:
-            pool_abi_file_path = Path(__file__).parent / "abi/Pool.json"
-            pool_abi_file = pool_abi_file_path.open()
-            pool_abi = json.load(pool_abi_file)
-            pool_abi_file.close()
-
-            atoken_contract_onchain = self._atoken_contract
-            pool_address = await async_retry_with_backoff(atoken_contract_onchain.functions.POOL().call)
-
-            pool_contract = web3_provider.eth.contract(abi=pool_abi, decode_tuples=True)
-            self._pool_contract = retry_with_backoff(pool_contract, address=pool_address)
-
-            self._underlying_asset_address = await async_retry_with_backoff(
-                self._atoken_contract.functions.UNDERLYING_ASSET_ADDRESS().call,
-            )
-
-            self._reserve_data = await async_retry_with_backoff(
-                self._pool_contract.functions.getReserveData(self._underlying_asset_address).call,
+            user_address = AsyncWeb3.to_checksum_address(self.user_address)
+            results = yield {
+                "reserve_data": self._pool_contract.functions.getReserveData(self._underlying_asset_address),
+                "decimals": self._underlying_asset_contract.functions.decimals(),
+                "user_deposits": self._atoken_contract.functions.balanceOf(user_address),
+                "user_asset_balance": self._underlying_asset_contract.functions.balanceOf(user_address),
+                "yield_index": self._pool_contract.functions.getReserveNormalizedIncome(self._underlying_asset_address),
+                "total_supplied_assets": self._atoken_contract.functions.totalSupply(),
+            }
+            self._reserve_data = results["reserve_data"]
+            self._decimals = results["decimals"]
+            self._total_supplied_assets = results["total_supplied_assets"]
+            self._user_deposits = results["user_deposits"]
+            self._user_asset_balance = results["user_asset_balance"]
+            self._yield_index = results["yield_index"]
+
+            self._strategy_contract = get_contract(
+                web3_provider, "RateTargetBaseInterestRateStrategy", self._reserve_data.interestRateStrategyAddress
             )
 
-            reserve_strat_abi_file_path = Path(__file__).parent / "abi/RateTargetBaseInterestRateStrategy.json"
-            reserve_strat_abi_file = reserve_strat_abi_file_path.open()
-            reserve_strat_abi = json.load(reserve_strat_abi_file)
-            reserve_strat_abi_file.close()
-
-            strategy_contract = web3_provider.eth.contract(abi=reserve_strat_abi)
-            self._strategy_contract = retry_with_backoff(
-                strategy_contract,
-                address=self._reserve_data.interestRateStrategyAddress,
+            stable_debt_token_contract = get_contract(
+                web3_provider, "IStableDebtToken", self._reserve_data.stableDebtTokenAddress
             )
 
-            stable_debt_token_abi_file_path = Path(__file__).parent / "abi/IStableDebtToken.json"
-            stable_debt_token_abi_file = stable_debt_token_abi_file_path.open()
-            stable_debt_token_abi = json.load(stable_debt_token_abi_file)
-            stable_debt_token_abi_file.close()
-
-            stable_debt_token_contract = web3_provider.eth.contract(abi=stable_debt_token_abi)
-            stable_debt_token_contract = retry_with_backoff(
-                stable_debt_token_contract,
-                address=self._reserve_data.stableDebtTokenAddress,
+            self._variable_debt_token_contract = get_contract(
+                web3_provider, "IVariableDebtToken", self._reserve_data.variableDebtTokenAddress
             )
 
+            results = yield {
+                "supply_data": stable_debt_token_contract.functions.getSupplyData(),
+                "scaled_variable_debt": self._variable_debt_token_contract.functions.scaledTotalSupply(),
+            }
             (
                 _,
                 self._nextTotalStableDebt,
                 self._nextAvgStableBorrowRate,
                 _,
-            ) = await async_retry_with_backoff(stable_debt_token_contract.functions.getSupplyData().call)
-
-            variable_debt_token_abi_file_path = Path(__file__).parent / "abi/IVariableDebtToken.json"
-            variable_debt_token_abi_file = variable_debt_token_abi_file_path.open()
-            variable_debt_token_abi = json.load(variable_debt_token_abi_file)
-            variable_debt_token_abi_file.close()
-
-            variable_debt_token_contract = web3_provider.eth.contract(abi=variable_debt_token_abi)
-            self._variable_debt_token_contract = retry_with_backoff(
-                variable_debt_token_contract,
-                address=self._reserve_data.variableDebtTokenAddress,
-            )
+            ) = results["supply_data"]
 
             nextVariableBorrowIndex = self._reserve_data.variableBorrowIndex
-
-            nextScaledVariableDebt = await async_retry_with_backoff(
-                self._variable_debt_token_contract.functions.scaledTotalSupply().call
-            )
-            self._totalVariableDebt = rayMul(nextScaledVariableDebt, nextVariableBorrowIndex)
+            self._totalVariableDebt = rayMul(results["scaled_variable_debt"], nextVariableBorrowIndex)
 
             reserveConfiguration = self._reserve_data.configuration
             self._reserveFactor = getReserveFactor(reserveConfiguration)
-            self._decimals = await async_retry_with_backoff(self._underlying_asset_contract.functions.decimals().call)
-            self._user_deposits = await async_retry_with_backoff(
-                self._atoken_contract.functions.balanceOf(AsyncWeb3.to_checksum_address(self.user_address)).call
-            )
-
-            self._user_asset_balance = await async_retry_with_backoff(
-                self._underlying_asset_contract.functions.balanceOf(AsyncWeb3.to_checksum_address(self.user_address)).call
-            )
-
-            self._yield_index = await async_retry_with_backoff(
-                self._pool_contract.functions.getReserveNormalizedIncome(self._underlying_asset_address).call
-            )
 
         except Exception as err:
             bt.logging.error("Failed to sync to chain!")
@@ -721,7 +612,7 @@ class VariableInterestSturdySiloStrategy(ChainBasedPoolModel):
     _current_rate_info = PrivateAttr()
     _rate_prec: int = PrivateAttr()
 
-    _block: BlockData = PrivateAttr()
+    _block_timestamp: int = PrivateAttr()
 
     _decimals: int = PrivateAttr()
     _asset: AsyncContract = PrivateAttr()
@@ -749,71 +640,54 @@ class VariableInterestSturdySiloStrategy(ChainBasedPoolModel):
             bt.logging.error(err)  # type: ignore[]
 
         try:
-            silo_strategy_abi_file_path = Path(__file__).parent / "abi/SturdySiloStrategy.json"
-            silo_strategy_abi_file = silo_strategy_abi_file_path.open()
-            silo_strategy_abi = json.load(silo_strategy_abi_file)
-            silo_strategy_abi_file.close()
-
-            silo_strategy_contract = web3_provider.eth.contract(abi=silo_strategy_abi, decode_tuples=True)
-            self._silo_strategy_contract = retry_with_backoff(silo_strategy_contract, address=self.contract_address)
-
-            pair_abi_file_path = Path(__file__).parent / "abi/SturdyPair.json"
-            pair_abi_file = pair_abi_file_path.open()
-            pair_abi = json.load(pair_abi_file)
-            pair_abi_file.close()
+            self._silo_strategy_contract = get_contract(
+                web3_provider, "SturdySiloStrategy", self.contract_address, decode_tuples=True
+            )
 
             pair_contract_address = await async_retry_with_backoff(self._silo_strategy_contract.functions.pair().call)
-            pair_contract = web3_provider.eth.contract(abi=pair_abi, decode_tuples=True)
-            self._pair_contract = retry_with_backoff(pair_contract, address=pair_contract_address)
-
-            rate_model_abi_file_path = Path(__file__).parent / "abi/VariableInterestRate.json"
-            rate_model_abi_file = rate_model_abi_file_path.open()
-            rate_model_abi = json.load(rate_model_abi_file)
-            rate_model_abi_file.close()
+            self._pair_contract = get_contract(web3_provider, "SturdyPair", pair_contract_address, decode_tuples=True)
 
             rate_model_contract_address = await async_retry_with_backoff(self._pair_contract.functions.rateContract().call)
-            rate_model_contract = web3_provider.eth.contract(abi=rate_model_abi, decode_tuples=True)
-            self._rate_model_contract = retry_with_backoff(rate_model_contract, address=rate_model_contract_address)
+            self._rate_model_contract = get_contract(
+                web3_provider, "VariableInterestRate", rate_model_contract_address, decode_tuples=True
+            )
             self._decimals = await async_retry_with_backoff(self._pair_contract.functions.decimals().call)
 
-            erc20_abi_file_path = Path(__file__).parent / "abi/IERC20.json"
-            erc20_abi_file = erc20_abi_file_path.open()
-            erc20_abi = json.load(erc20_abi_file)
-            erc20_abi_file.close()
-
             asset_address = await async_retry_with_backoff(self._pair_contract.functions.asset().call)
-            asset_contract = web3_provider.eth.contract(abi=erc20_abi, decode_tuples=True)
-            self._asset = retry_with_backoff(asset_contract, address=asset_address)
+            self._asset = get_contract(web3_provider, "IERC20", asset_address, decode_tuples=True)
 
             self._initted = True
 
         except Exception as e:
             bt.logging.error(e)  # type: ignore[]
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:
         """Syncs with chain"""
-        if not self._initted:
-            await self.pool_init(web3_provider)
-
-        user_shares = await async_retry_with_backoff(self._pair_contract.functions.balanceOf(self.contract_address).call)
-        self._user_deposits = await async_retry_with_backoff(self._pair_contract.functions.convertToAssets(user_shares).call)
-
-        constants = await async_retry_with_backoff(self._pair_contract.functions.getConstants().call)
+        results = yield {
+            "user_shares": self._pair_contract.functions.balanceOf(self.contract_address),
+            "constants": self._pair_contract.functions.getConstants(),
+            "total_supplied_assets": self._pair_contract.functions.totalAssets(),
+            "total_borrow": self._pair_contract.functions.totalBorrow(),
+            "block_timestamp": get_multicall3_contract(web3_provider).functions.getCurrentBlockTimestamp(),
+            "current_rate_info": self._pair_contract.functions.currentRateInfo(),
+            "rate_prec": self._rate_model_contract.functions.RATE_PREC(),
+            "user_asset_balance": self._asset.functions.balanceOf(self.user_address),
+            # get current price per share
+            "yield_index": self._pair_contract.functions.pricePerShare(),
+        }
+        constants = results["constants"]
         self._util_prec = constants[2]
         self._fee_prec = constants[3]
-        self._total_supplied_assets: Any = await async_retry_with_backoff(self._pair_contract.functions.totalAssets().call)
-        self._totalBorrow: Any = (await async_retry_with_backoff(self._pair_contract.functions.totalBorrow().call)).amount
-
-        self._block = await web3_provider.eth.get_block("latest")
-
-        self._current_rate_info = await async_retry_with_backoff(self._pair_contract.functions.currentRateInfo().call)
+        self._total_supplied_assets = results["total_supplied_assets"]
+        self._totalBorrow = results["total_borrow"].amount
+        self._block_timestamp = results["block_timestamp"]
+        self._current_rate_info = results["current_rate_info"]
+        self._rate_prec = results["rate_prec"]
+        self._user_asset_balance = results["user_asset_balance"]
+        self._yield_index = results["yield_index"]
 
-        self._rate_prec = await async_retry_with_backoff(self._rate_model_contract.functions.RATE_PREC().call)
-
-        self._user_asset_balance = await async_retry_with_backoff(self._asset.functions.balanceOf(self.user_address).call)
-
-        # get current price per share
-        self._yield_index = await async_retry_with_backoff(self._pair_contract.functions.pricePerShare().call)
+        results = yield {"user_deposits": self._pair_contract.functions.convertToAssets(results["user_shares"])}
+        self._user_deposits = results["user_deposits"]
 
     # last 256 unique calls to this will be cached for the next 60 seconds
     @alru_cache(maxsize=512, ttl=60)
@@ -825,7 +699,7 @@ class VariableInterestSturdySiloStrategy(ChainBasedPoolModel):
         util_rate = int((self._util_prec * self._totalBorrow) // (self._total_supplied_assets + delta))
 
         last_update_timestamp = self._current_rate_info.lastTimestamp
-        current_timestamp = self._block["timestamp"]
+        current_timestamp = self._block_timestamp
         delta_time = int(current_timestamp - last_update_timestamp)
 
         protocol_fee = self._current_rate_info.feeToProtocolRate
@@ -870,30 +744,14 @@ class CompoundV3Pool(ChainBasedPoolModel):
     }
 
     async def pool_init(self, web3_provider: AsyncWeb3) -> None:
-        comet_abi_file_path = Path(__file__).parent / "abi/Comet.json"
-        comet_abi_file = comet_abi_file_path.open()
-        comet_abi = json.load(comet_abi_file)
-        comet_abi_file.close()
-
         # ctoken contract
-        ctoken_contract = web3_provider.eth.contract(abi=comet_abi, decode_tuples=True)
-        self._ctoken_contract = retry_with_backoff(ctoken_contract, address=self.contract_address)
-
-        oracle_abi_file_path = Path(__file__).parent / "abi/EACAggregatorProxy.json"
-        oracle_abi_file = oracle_abi_file_path.open()
-        oracle_abi = json.load(oracle_abi_file)
-        oracle_abi_file.close()
-
-        feed_registry_abi_file_path = Path(__file__).parent / "abi/FeedRegistry.json"
-        feed_registry_abi_file = feed_registry_abi_file_path.open()
-        feed_registry_abi = json.load(feed_registry_abi_file)
-        feed_registry_abi_file.close()
+        self._ctoken_contract = get_contract(web3_provider, "Comet", self.contract_address, decode_tuples=True)
 
         chainlink_registry_address = "0x47Fb2585D2C56Fe188D0E6ec628a38b74fCeeeDf"  # chainlink registry address on eth mainnet
         usd_address = "0x0000000000000000000000000000000000000348"  # follows: https://en.wikipedia.org/wiki/ISO_4217
-        chainlink_registry = web3_provider.eth.contract(abi=feed_registry_abi, decode_tuples=True)
-
-        chainlink_registry_contract = retry_with_backoff(chainlink_registry, address=chainlink_registry_address)
+        chainlink_registry_contract = get_contract(
+            web3_provider, "FeedRegistry", chainlink_registry_address, decode_tuples=True
+        )
 
         base_token_address = await async_retry_with_backoff(self._ctoken_contract.functions.baseToken().call)
         asset_address = self._CompoundTokenMap.get(base_token_address, base_token_address)
@@ -901,34 +759,37 @@ class CompoundV3Pool(ChainBasedPoolModel):
         base_oracle_address = await async_retry_with_backoff(
             chainlink_registry_contract.functions.getFeed(asset_address, usd_address).call,
         )
-        base_oracle_contract = web3_provider.eth.contract(abi=oracle_abi, decode_tuples=True)
-        self._base_oracle_contract = retry_with_backoff(base_oracle_contract, address=base_oracle_address)
+        self._base_oracle_contract = get_contract(web3_provider, "EACAggregatorProxy", base_oracle_address, decode_tuples=True)
 
         reward_oracle_address = "0xdbd020CAeF83eFd542f4De03e3cF0C28A4428bd5"  # TODO: COMP price feed address
-        reward_oracle_contract = web3_provider.eth.contract(abi=oracle_abi, decode_tuples=True)
-        self._reward_oracle_contract = retry_with_backoff(reward_oracle_contract, address=reward_oracle_address)
+        self._reward_oracle_contract = get_contract(
+            web3_provider, "EACAggregatorProxy", reward_oracle_address, decode_tuples=True
+        )
 
         self._initted = True
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
-        if not self._initted:
-            await self.pool_init(web3_provider)
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:  # noqa: ARG002
+        results = yield {
+            "base_decimals": self._base_oracle_contract.functions.decimals(),
+            "reward_decimals": self._reward_oracle_contract.functions.decimals(),
+            "total_borrow": self._ctoken_contract.functions.totalBorrow(),
+            "base_token_price": self._base_oracle_contract.functions.latestAnswer(),
+            "reward_token_price": self._reward_oracle_contract.functions.latestAnswer(),
+            "user_deposits": self._ctoken_contract.functions.balanceOf(self.user_address),
+            "total_supplied_assets": self._ctoken_contract.functions.totalSupply(),
+        }
 
         # get token prices - in wei
-        base_decimals = await async_retry_with_backoff(self._base_oracle_contract.functions.decimals().call)
+        base_decimals = results["base_decimals"]
         self._base_decimals = base_decimals
-        reward_decimals = await async_retry_with_backoff(self._reward_oracle_contract.functions.decimals().call)
-        self._total_borrow = await async_retry_with_backoff(self._ctoken_contract.functions.totalBorrow().call)
+        reward_decimals = results["reward_decimals"]
+        self._total_borrow = results["total_borrow"]
 
-        self._base_token_price = (
-            await async_retry_with_backoff(self._base_oracle_contract.functions.latestAnswer().call) / 10**base_decimals
-        )
-        self._reward_token_price = (
-            await async_retry_with_backoff(self._reward_oracle_contract.functions.latestAnswer().call) / 10**reward_decimals
-        )
+        self._base_token_price = results["base_token_price"] / 10**base_decimals
+        self._reward_token_price = results["reward_token_price"] / 10**reward_decimals
 
-        self._user_deposits = await async_retry_with_backoff(self._ctoken_contract.functions.balanceOf(self.user_address).call)
-        self._total_supplied_assets = await async_retry_with_backoff(self._ctoken_contract.functions.totalSupply().call)
+        self._user_deposits = results["user_deposits"]
+        self._total_supplied_assets = results["total_supplied_assets"]
 
     async def supply_rate(self, amount: int) -> int:
         # amount scaled down to the asset's decimals from 18 decimals (wei)
@@ -984,29 +845,17 @@ class DaiSavingsRate(ChainBasedPoolModel):
         return self._sdai_contract.address == other._sdai_contract.address  # type: ignore[]
 
     async def pool_init(self, web3_provider: AsyncWeb3) -> None:
-        sdai_abi_file_path = Path(__file__).parent / "abi/SavingsDai.json"
-        sdai_abi_file = sdai_abi_file_path.open()
-        sdai_abi = json.load(sdai_abi_file)
-        sdai_abi_file.close()
-
-        sdai_contract = web3_provider.eth.contract(abi=sdai_abi, decode_tuples=True)
-        self._sdai_contract = retry_with_backoff(sdai_contract, address=self.contract_address)
-
-        pot_abi_file_path = Path(__file__).parent / "abi/Pot.json"
-        pot_abi_file = pot_abi_file_path.open()
-        pot_abi = json.load(pot_abi_file)
-        pot_abi_file.close()
+        self._sdai_contract = get_contract(web3_provider, "SavingsDai", self.contract_address, decode_tuples=True)
 
         pot_address = await async_retry_with_backoff(self._sdai_contract.functions.pot().call)
 
-        pot_contract = web3_provider.eth.contract(abi=pot_abi, decode_tuples=True)
-        self._pot_contract = retry_with_backoff(pot_contract, address=pot_address)
+        self._pot_contract = get_contract(web3_provider, "Pot", pot_address, decode_tuples=True)
 
         self._initted = True
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
-        if not self._initted:
-            await self.pool_init(web3_provider)
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:  # noqa: ARG002
+        # nothing to read - the dsr is read from the pot contract when the supply rate is requested
+        yield from ()
 
     # last 256 unique calls to this will be cached for the next 60 seconds
     @alru_cache(maxsize=512, ttl=60)
@@ -1025,7 +874,6 @@ class MorphoVault(ChainBasedPoolModel):
 
     _vault_contract: AsyncContract = PrivateAttr()
     _morpho_contract: AsyncContract = PrivateAttr()
-    _irm_abi: str = PrivateAttr()
     _decimals: int = PrivateAttr()
     _DECIMALS_OFFSET: int = PrivateAttr()
     # TODO: update unit tests to check these :^)
@@ -1051,84 +899,63 @@ class MorphoVault(ChainBasedPoolModel):
         return self._vault_contract.address == other._vault_contract.address  # type: ignore[]
 
     async def pool_init(self, web3_provider: AsyncWeb3) -> None:
-        vault_abi_file_path = Path(__file__).parent / "abi/MetaMorpho.json"
-        vault_abi_file = vault_abi_file_path.open()
-        vault_abi = json.load(vault_abi_file)
-        vault_abi_file.close()
-
-        vault_contract = web3_provider.eth.contract(abi=vault_abi, decode_tuples=True)
-        self._vault_contract = retry_with_backoff(vault_contract, address=self.contract_address)
-
-        morpho_abi_file_path = Path(__file__).parent / "abi/Morpho.json"
-        morpho_abi_file = morpho_abi_file_path.open()
-        morpho_abi = json.load(morpho_abi_file)
-        morpho_abi_file.close()
+        self._vault_contract = get_contract(web3_provider, "MetaMorpho", self.contract_address, decode_tuples=True)
 
         morpho_address = await async_retry_with_backoff(self._vault_contract.functions.MORPHO().call)
 
-        morpho_contract = web3_provider.eth.contract(abi=morpho_abi, decode_tuples=True)
-        self._morpho_contract = retry_with_backoff(morpho_contract, address=morpho_address)
+        self._morpho_contract = get_contract(web3_provider, "Morpho", morpho_address, decode_tuples=True)
 
         self._decimals = await async_retry_with_backoff(self._vault_contract.functions.decimals().call)
         self._DECIMALS_OFFSET = await async_retry_with_backoff(self._vault_contract.functions.DECIMALS_OFFSET().call)
         self._asset_decimals = self._decimals - self._DECIMALS_OFFSET
 
-        irm_abi_file_path = Path(__file__).parent / "abi/AdaptiveCurveIrm.json"
-        irm_abi_file = irm_abi_file_path.open()
-        self._irm_abi = json.load(irm_abi_file)
-        irm_abi_file.close()
-
         underlying_asset_address = await async_retry_with_backoff(self._vault_contract.functions.asset().call)
 
-        erc20_abi_file_path = Path(__file__).parent / "abi/IERC20.json"
-        erc20_abi_file = erc20_abi_file_path.open()
-        erc20_abi = json.load(erc20_abi_file)
-        erc20_abi_file.close()
-
-        underlying_asset_contract = web3_provider.eth.contract(abi=erc20_abi, decode_tuples=True)
-        self._underlying_asset_contract = retry_with_backoff(
-            underlying_asset_contract,
-            address=underlying_asset_address,
-        )
+        self._underlying_asset_contract = get_contract(web3_provider, "IERC20", underlying_asset_address, decode_tuples=True)
 
         self._initted = True
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
-        if not self._initted:
-            await self.pool_init(web3_provider)
-
-        supply_queue_length = await async_retry_with_backoff(self._vault_contract.functions.supplyQueueLength().call)
-        market_ids = [
-            await async_retry_with_backoff(self._vault_contract.functions.supplyQueue(idx).call)
-            for idx in range(supply_queue_length)
-        ]
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:
+        results = yield {
+            "supply_queue_length": self._vault_contract.functions.supplyQueueLength(),
+            "total_supplied_assets": self._vault_contract.functions.totalAssets(),
+            "user_shares": self._vault_contract.functions.balanceOf(self.user_address),
+            "user_asset_balance": self._underlying_asset_contract.functions.balanceOf(
+                AsyncWeb3.to_checksum_address(self.user_address)
+            ),
+            "yield_index": self._vault_contract.functions.convertToAssets(int(1e18)),
+        }
+        supply_queue_length = results["supply_queue_length"]
+        self._total_supplied_assets = results["total_supplied_assets"]
+        self._user_asset_balance = results["user_asset_balance"]
+        self._yield_index = results["yield_index"]
+
+        results = yield {
+            "user_deposits": self._vault_contract.functions.convertToAssets(results["user_shares"]),
+            **{f"market_id_{idx}": self._vault_contract.functions.supplyQueue(idx) for idx in range(supply_queue_length)},
+        }
+        self._user_deposits = results["user_deposits"]
+        market_ids = [results[f"market_id_{idx}"] for idx in range(supply_queue_length)]
+
+        results = yield {
+            **{f"market_{idx}": self._morpho_contract.functions.market(market_id) for idx, market_id in enumerate(market_ids)},
+            **{
+                f"market_params_{idx}": self._morpho_contract.functions.idToMarketParams(market_id)
+                for idx, market_id in enumerate(market_ids)
+            },
+        }
 
         total_borrows = 0
         # get irm contracts and borrows
-        for market_id in market_ids:
-            # calculate current supply apy
-            # TODO: can we make this more efficient by making this not be called twice?
-            market = await async_retry_with_backoff(self._morpho_contract.functions.market(market_id).call)
-            market_params = await async_retry_with_backoff(self._morpho_contract.functions.idToMarketParams(market_id).call)
-            irm_address = market_params.irm
-            irm_contract_raw = web3_provider.eth.contract(abi=self._irm_abi, decode_tuples=True)
-            irm_contract = retry_with_backoff(irm_contract_raw, address=irm_address)
+        for idx, market_id in enumerate(market_ids):
+            irm_address = results[f"market_params_{idx}"].irm
+            irm_contract = get_contract(web3_provider, "AdaptiveCurveIrm", irm_address, decode_tuples=True)
             self._irm_contracts[market_id] = irm_contract
 
-            total_borrows += market.totalBorrowAssets
+            total_borrows += results[f"market_{idx}"].totalBorrowAssets
 
-        self._total_supplied_assets = await async_retry_with_backoff(self._vault_contract.functions.totalAssets().call)
-        curr_user_shares = await async_retry_with_backoff(self._vault_contract.functions.balanceOf(self.user_address).call)
-        self._user_deposits = await async_retry_with_backoff(
-            self._vault_contract.functions.convertToAssets(curr_user_shares).call
-        )
-        self._user_asset_balance = await async_retry_with_backoff(
-            self._underlying_asset_contract.functions.balanceOf(AsyncWeb3.to_checksum_address(self.user_address)).call
-        )
         self._curr_borrows = total_borrows
 
-        self._yield_index = await async_retry_with_backoff(self._vault_contract.functions.convertToAssets(int(1e18)).call)
-
     @classmethod
     def assets_to_shares_down(cls, assets: int, total_assets: int, total_shares: int) -> int:
         return (assets * (total_shares + cls._VIRTUAL_SHARES)) // (total_assets + cls._VIRTUAL_ASSETS)
@@ -1205,47 +1032,182 @@ class YearnV3Vault(ChainBasedPoolModel):
     _yield_index: int = PrivateAttr()
 
     async def pool_init(self, web3_provider: AsyncWeb3) -> None:
-        vault_abi_file_path = Path(__file__).parent / "abi/Yearn_V3_Vault.json"
-        vault_abi_file = vault_abi_file_path.open()
-        vault_abi = json.load(vault_abi_file)
-        vault_abi_file.close()
+        self._vault_contract = get_contract(web3_provider, "Yearn_V3_Vault", self.contract_address, decode_tuples=True)
 
-        vault_contract = web3_provider.eth.contract(abi=vault_abi, decode_tuples=True)
-        self._vault_contract = retry_with_backoff(vault_contract, address=self.contract_address)
+        self._apr_oracle = get_contract(web3_provider, "AprOracle", APR_ORACLE, decode_tuples=True)
 
-        apr_oracle_abi_file_path = Path(__file__).parent / "abi/AprOracle.json"
-        apr_oracle_abi_file = apr_oracle_abi_file_path.open()
-        apr_oracle_abi = json.load(apr_oracle_abi_file)
-        apr_oracle_abi_file.close()
+        asset_address = await async_retry_with_backoff(self._vault_contract.functions.asset().call)
+        self._asset = get_contract(web3_provider, "IERC20", asset_address, decode_tuples=True)
+
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:  # noqa: ARG002
+        results = yield {
+            "max_withdraw": self._vault_contract.functions.maxWithdraw(self.user_address),
+            "user_shares": self._vault_contract.functions.balanceOf(self.user_address),
+            "total_supplied_assets": self._vault_contract.functions.totalAssets(),
+            "user_asset_balance": self._asset.functions.balanceOf(self.user_address),
+            # get current price per share
+            "yield_index": self._vault_contract.functions.pricePerShare(),
+        }
+        self._max_withdraw = results["max_withdraw"]
+        self._total_supplied_assets = results["total_supplied_assets"]
+        self._user_asset_balance = results["user_asset_balance"]
+        self._yield_index = results["yield_index"]
 
-        apr_oracle = web3_provider.eth.contract(abi=apr_oracle_abi, decode_tuples=True)
-        self._apr_oracle = retry_with_backoff(apr_oracle, address=APR_ORACLE)
+        results = yield {"user_deposits": self._vault_contract.functions.convertToAssets(results["user_shares"])}
+        self._user_deposits = results["user_deposits"]
 
-        erc20_abi_file_path = Path(__file__).parent / "abi/IERC20.json"
-        erc20_abi_file = erc20_abi_file_path.open()
-        erc20_abi = json.load(erc20_abi_file)
-        erc20_abi_file.close()
+    async def supply_rate(self, amount: int) -> int:
+        delta = amount - self._user_deposits
+        return await async_retry_with_backoff(self._apr_oracle.functions.getExpectedApr(self.contract_address, delta).call)
 
-        asset_address = await async_retry_with_backoff(self._vault_contract.functions.asset().call)
-        asset_contract = web3_provider.eth.contract(abi=erc20_abi, decode_tuples=True)
-        self._asset = retry_with_backoff(asset_contract, address=asset_address)
 
-    async def sync(self, web3_provider: AsyncWeb3) -> None:
-        if not self._initted:
-            await self.pool_init(web3_provider)
+async def get_snapshot_block(provider: AsyncWeb3 | bt.AsyncSubtensor) -> int:
+    """Gets the block number to pin the reads of a sync to, so that all the state read comes from the same block"""
+    if isinstance(provider, AsyncWeb3):
+        return await async_retry_with_backoff(provider.eth.get_block_number)
+    return await provider.get_current_block()
 
-        self._max_withdraw = await async_retry_with_backoff(self._vault_contract.functions.maxWithdraw(self.user_address).call)
-        user_shares = await async_retry_with_backoff(self._vault_contract.functions.balanceOf(self.user_address).call)
-        self._user_deposits = await async_retry_with_backoff(self._vault_contract.functions.convertToAssets(user_shares).call)
-        self._total_supplied_assets: Any = await async_retry_with_backoff(self._vault_contract.functions.totalAssets().call)
-        self._user_asset_balance = await async_retry_with_backoff(self._asset.functions.balanceOf(self.user_address).call)
 
-        # get current price per share
-        self._yield_index = await async_retry_with_backoff(self._vault_contract.functions.pricePerShare().call)
+async def get_snapshot_blocks(providers: dict[str, AsyncWeb3 | bt.AsyncSubtensor]) -> dict[str, int]:
+    """
+    Gets the block number to pin all the reads of a forward step to for each of the providers, keyed by pool data provider
+    type - so that generating a challenge, reading its metadata and scoring earlier challenges all read the same state,
+    and can share their (cached) reads. Providers whose block can't be read are left out.
+    """
+    provider_types = list(providers)
+    results = await asyncio.gather(
+        *(get_snapshot_block(providers[provider_type]) for provider_type in provider_types), return_exceptions=True
+    )
+    blocks = {}
+    for provider_type, result in zip(provider_types, results, strict=True):
+        if isinstance(result, Exception):
+            bt.logging.warning(f"Failed to get the snapshot block of {provider_type}: {result}")
+            continue
+        blocks[provider_type] = result
+    return blocks
+
+
+async def multicall_sync_pools(
+    pools: list[ChainBasedPoolModel],
+    web3_provider: AsyncWeb3,
+    block_identifier: BlockIdentifier = "latest",
+    concurrency: int = POOL_SYNC_CONCURRENCY,
+) -> list[Exception | None]:
+    """
+    Syncs chain based pools which share the same web3 provider. Rather than making an eth_call per read, the reads of all
+    the pools are aggregated into a single multicall per round of reads, all of them made at `block_identifier`.
 
-    async def supply_rate(self, amount: int) -> int:
-        delta = amount - self._user_deposits
-        return await async_retry_with_backoff(self._apr_oracle.functions.getExpectedApr(self.contract_address, delta).call)
+    Returns:
+        list[Exception | None]: The error each pool failed to sync with (if any), in the same order as `pools`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def init_pool(pool: ChainBasedPoolModel) -> None:
+        async with semaphore:
+            await pool.pool_init(web3_provider)
+
+    uninitted = [pool for pool in pools if not pool._initted]
+    init_results = await asyncio.gather(*(init_pool(pool) for pool in uninitted), return_exceptions=True)
+    errors = {id(pool): err for pool, err in zip(uninitted, init_results, strict=True) if isinstance(err, Exception)}
+
+    to_sync = [pool for pool in pools if id(pool) not in errors]
+    sync_errors = await run_read_rounds(
+        web3_provider, [pool.sync_reads(web3_provider) for pool in to_sync], block_identifier=block_identifier
+    )
+    errors.update({id(pool): err for pool, err in zip(to_sync, sync_errors, strict=True) if err is not None})
+
+    return [errors.get(id(pool)) for pool in pools]
+
+
+async def sync_pools(
+    pools: Iterable[ChainBasedPoolModel | BittensorAlphaTokenPool],
+    providers: AsyncWeb3 | bt.AsyncSubtensor | dict[str, AsyncWeb3 | bt.AsyncSubtensor],
+    concurrency: int = POOL_SYNC_CONCURRENCY,
+    block_identifier: BlockIdentifier | dict[str, BlockIdentifier] | None = None,
+) -> list[Exception | None]:
+    """
+    Syncs pools concurrently, with at most `concurrency` of them syncing at once.
+
+    Args:
+        pools (Iterable[ChainBasedPoolModel | BittensorAlphaTokenPool]): The pools to sync.
+        providers (AsyncWeb3 | bt.AsyncSubtensor | dict[str, AsyncWeb3 | bt.AsyncSubtensor]): Either the data provider
+            shared by all the pools, or the data providers keyed by pool data provider type - in which case each pool is
+            synced with the provider of its `pool_data_provider_type`.
+        concurrency (int): The max. number of pools to sync at once.
+        block_identifier (BlockIdentifier | dict[str, BlockIdentifier] | None): The block to read the pools at, or the
+            blocks keyed by pool data provider type (see `get_snapshot_blocks()`). Defaults to the latest block number of
+            their provider at the time of the call, so that they're synced from a consistent snapshot. The reads of chain
+            based pools which share a provider are batched together.
+
+    Alpha token pools are synced from a snapshot of all the subnets at their block, fetched once and shared with
+    everything else reading subnets at that block. If the snapshot can't be fetched, or a subnet is missing from it, the
+    pools read their own subnet instead.
+
+    Returns:
+        list[Exception | None]: The error each pool failed to sync with (if any), in the same order as `pools`.
+    """
+    pools = list(pools)
+    errors: list[Exception | None] = [None] * len(pools)
+
+    # group the pools by the provider they should be synced with
+    groups: dict[int, tuple[AsyncWeb3 | bt.AsyncSubtensor, list[int]]] = {}
+    for idx, pool in enumerate(pools):
+        if isinstance(providers, dict):
+            provider = providers.get(pool.pool_data_provider_type)
+            if provider is None:
+                errors[idx] = ValueError(f"No data provider of type {pool.pool_data_provider_type} to sync pool with")
+                continue
+        else:
+            provider = providers
+        groups.setdefault(id(provider), (provider, []))[1].append(idx)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sync_pool(
+        pool: BittensorAlphaTokenPool, provider: bt.AsyncSubtensor, subnets: dict[int, bt.DynamicInfo]
+    ) -> None:
+        dynamic_info = subnets.get(pool.netuid)
+        if dynamic_info is not None:
+            await pool.sync(provider, dynamic_info)
+            return
+        async with semaphore:
+            await pool.sync(provider)
+
+    async def get_subnets_snapshot(subtensor: bt.AsyncSubtensor, block: int | None) -> dict[int, bt.DynamicInfo]:
+        try:
+            return await fetch_subnets_snapshot(subtensor, block if block is not None else await get_snapshot_block(subtensor))
+        except Exception as err:
+            bt.logging.warning(f"Failed to fetch subnets snapshot, syncing alpha token pools one by one: {err}")
+            return {}
+
+    async def sync_group(provider: AsyncWeb3 | bt.AsyncSubtensor, idxs: list[int]) -> list[Exception | None]:
+        group = [pools[idx] for idx in idxs]
+        group_block = block_identifier
+        if isinstance(block_identifier, dict):
+            # the pools of a group share their provider, and so their provider type
+            group_block = block_identifier.get(group[0].pool_data_provider_type)
+        if isinstance(provider, AsyncWeb3):
+            if group_block is None:
+                try:
+                    group_block = await get_snapshot_block(provider)
+                except Exception as err:
+                    return [err] * len(group)
+            return await multicall_sync_pools(group, provider, block_identifier=group_block, concurrency=concurrency)
+        subnets = await get_subnets_snapshot(provider, group_block if isinstance(group_block, int) else None)
+        return await asyncio.gather(*(sync_pool(pool, provider, subnets) for pool in group), return_exceptions=True)
+
+    group_list = list(groups.values())
+    group_errors = await asyncio.gather(*(sync_group(provider, idxs) for provider, idxs in group_list))
+    for (_, idxs), errs in zip(group_list, group_errors, strict=True):
+        for idx, err in zip(idxs, errs, strict=True):
+            errors[idx] = err
+
+    for pool, err in zip(pools, errors, strict=True):
+        if err is not None:
+            pool_id = pool.netuid if isinstance(pool, BittensorAlphaTokenPool) else pool.contract_address
+            bt.logging.error(f"Failed to sync {pool.pool_type} pool {pool_id}: {err}")
+
+    return errors
 
 
 def generate_eth_public_key(rng_gen: np.random.RandomState) -> str:
@@ -1257,22 +1219,35 @@ def generate_eth_public_key(rng_gen: np.random.RandomState) -> str:
 async def generate_challenge_data(
     chain_data_provider: AsyncWeb3 | bt.AsyncSubtensor,
     rng_gen: np.random.RandomState = np.random.RandomState(),  # noqa: B008
+    block: int | None = None,
 ) -> dict[str, dict[str, ChainBasedPoolModel | BittensorAlphaTokenPool] | int]:  # generate pools
-    if isinstance(chain_data_provider, bt.AsyncSubtensor):
-        return await gen_bt_alpha_pools(chain_data_provider, rng_gen)
+    """
+    Generates the pools of a challenge from the state of the chain at `block` (its latest block if not given) - the block
+    is returned along with them as "block", for the rest of the challenge to be read at.
+    """
+    if block is None:
+        block = await get_snapshot_block(chain_data_provider)
 
-    selected_entry = POOL_REGISTRY[rng_gen.choice(list(POOL_REGISTRY.keys()))]
-    bt.logging.debug(f"Selected pool registry entry: {selected_entry}")
+    if isinstance(chain_data_provider, bt.AsyncSubtensor):
+        challenge_data = await gen_bt_alpha_pools(chain_data_provider, rng_gen, block=block)
+    else:
+        selected_entry = POOL_REGISTRY[rng_gen.choice(list(POOL_REGISTRY.keys()))]
+        bt.logging.debug(f"Selected pool registry entry: {selected_entry}")
+        challenge_data = await gen_evm_pools_for_challenge(selected_entry, chain_data_provider, block=block)
 
-    return await gen_evm_pools_for_challenge(selected_entry, chain_data_provider)
+    challenge_data["block"] = block
+    return challenge_data
 
 
 async def gen_bt_alpha_pools(
     subtensor: bt.AsyncSubtensor,
     rng_gen: np.random.RandomState = np.random.RandomState(),  # noqa: B008
+    block: int | None = None,
 ) -> dict[str, dict[str, BittensorAlphaTokenPool] | int]:
     # Filter out root and subnets that have >= MIN_TAO_IN_POOL TAO in their pools
-    all_subnets = (await subtensor.all_subnets())[1:]
+    # the snapshot is shared with the syncs of the generated pools (if they're synced at the same block)
+    snapshot = await fetch_subnets_snapshot(subtensor, block if block is not None else await subtensor.get_current_block())
+    all_subnets = [subnet for netuid, subnet in snapshot.items() if netuid != 0]
     subnets = [s for s in all_subnets if s.tao_in.tao > MIN_TAO_IN_POOL]
     num_subnets = len(subnets)
 
@@ -1307,7 +1282,7 @@ async def gen_bt_alpha_pools(
 
 
 async def gen_evm_pools_for_challenge(
-    selected_entry, chain_data_provider: AsyncWeb3
+    selected_entry, chain_data_provider: AsyncWeb3, block: int | None = None
 ) -> dict[str, dict[str, ChainBasedPoolModel] | int]:  # generate pools
     challenge_data = {}
 
@@ -1334,16 +1309,25 @@ async def gen_evm_pools_for_challenge(
 
     if total_assets is None:
         total_assets = 0
+        synced_pool_types = (
+            POOL_TYPES.STURDY_SILO,
+            POOL_TYPES.AAVE_DEFAULT,
+            POOL_TYPES.AAVE_TARGET,
+            POOL_TYPES.MORPHO,
+            POOL_TYPES.YEARN_V3,
+        )
+        # sync all the pools we need to read from in one go
+        for err in await sync_pools(
+            [pool for pool in pools.values() if pool.pool_type in synced_pool_types],
+            chain_data_provider,
+            block_identifier=block,
+        ):
+            if err is not None:
+                raise err
+
         first_pool = pool_list[0]
         match first_pool.pool_type:
-            case T if T in (
-                POOL_TYPES.STURDY_SILO,
-                POOL_TYPES.AAVE_DEFAULT,
-                POOL_TYPES.AAVE_TARGET,
-                POOL_TYPES.MORPHO,
-                POOL_TYPES.YEARN_V3,
-            ):
-                await first_pool.sync(chain_data_provider)
+            case T if T in synced_pool_types:
                 total_assets = first_pool._user_asset_balance
             case _:
                 pass
@@ -1351,14 +1335,7 @@ async def gen_evm_pools_for_challenge(
         for pool in pools.values():
             total_asset = 0
             match pool.pool_type:
-                case T if T in (
-                    POOL_TYPES.STURDY_SILO,
-                    POOL_TYPES.AAVE_DEFAULT,
-                    POOL_TYPES.AAVE_TARGET,
-                    POOL_TYPES.MORPHO,
-                    POOL_TYPES.YEARN_V3,
-                ):
-                    await pool.sync(chain_data_provider)
+                case T if T in synced_pool_types:
                     total_asset += pool._user_deposits
                 case _:
                     pass
@@ -3,6 +3,9 @@ from enum import Enum
 import bittensor as bt
 from web3 import AsyncWeb3
 
+from sturdy.utils.rpc_cache import ETH_CALL_CACHE, construct_eth_call_cache_middleware
+from sturdy.utils.rpc_scheduler import construct_rpc_scheduler_middleware, get_rpc_scheduler
+
 
 class POOL_DATA_PROVIDER_TYPE(str, Enum):
     ETHEREUM_MAINNET = "ETHEREUM_MAINNET"
@@ -11,6 +14,18 @@ class POOL_DATA_PROVIDER_TYPE(str, Enum):
 
 
 class PoolProviderFactory:
+    @staticmethod
+    def create_web3_provider(url: str, **kwargs: any) -> AsyncWeb3:
+        """
+        Create a web3 provider whose requests are paced by its own rpc scheduler, and whose eth_calls at a specific block are
+        served from the shared eth_call cache.
+        """
+        w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(url, **kwargs))
+        w3.middleware_onion.add(construct_rpc_scheduler_middleware(get_rpc_scheduler(w3)), name="rpc_scheduler")
+        # added last so it is the outermost layer - cached responses don't take up any of the scheduler's capacity
+        w3.middleware_onion.add(construct_eth_call_cache_middleware(ETH_CALL_CACHE), name="eth_call_cache")
+        return w3
+
     @staticmethod
     async def create_pool_provider(
         provider: POOL_DATA_PROVIDER_TYPE, url: str, **kwargs: any
@@ -22,12 +37,12 @@ class PoolProviderFactory:
         :return: An instance of the specified pool provider.
         """
         if provider == POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET:
-            return AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(url, **kwargs))
+            return PoolProviderFactory.create_web3_provider(url, **kwargs)
         if provider == POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET:
             subtensor = bt.AsyncSubtensor(url)
             await subtensor.initialize()
             return subtensor
         # TODO(uniwap_v3_lp): remove this if we believe that the bittensor web3 provider is not needed
         if provider == POOL_DATA_PROVIDER_TYPE.BITTENSOR_WEB3:
-            return AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(url, **kwargs))
+            return PoolProviderFactory.create_web3_provider(url, **kwargs)
         raise ValueError(f"Unsupported provider type: {provider}")
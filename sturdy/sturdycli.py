@@ -4,6 +4,7 @@ import typer
 from rich.console import Console
 from rich.table import Table
 
+from sturdy.constants import ALLOCATION_RETENTION_DAYS, DB_ARCHIVE_BATCH_SIZE, DB_ARCHIVE_DIR, LOG_RETENTION_DAYS
 from sturdy.validator import sql
 
 cli = typer.Typer(name="Sturdy Subnet CLI")
@@ -186,6 +187,7 @@ def logs_summary() -> None:
         key = dict(key)[sql.KEY]  # noqa: PLW2901
         with sql.get_db_connection() as conn:
             logs = sql.get_all_logs_for_key(conn, key)
+            rollups = sql.get_log_rollups_for_key(conn, key)
 
         total_requests = len(logs)
         total_credits_used = sum([dict(log).get("cost", 0) for log in logs])
@@ -195,6 +197,13 @@ def logs_summary() -> None:
             endpoint = log.get(sql.ENDPOINT, "unknown_endpoint")
             global_endpoint_dict[endpoint] = global_endpoint_dict.get(endpoint, 0) + 1
 
+        # logs which have been rolled up into daily totals
+        for rollup in rollups:
+            total_requests += rollup[sql.REQUESTS]
+            total_credits_used += rollup[sql.COST]
+            endpoint = rollup[sql.ENDPOINT] or "unknown_endpoint"
+            global_endpoint_dict[endpoint] = global_endpoint_dict.get(endpoint, 0) + rollup[sql.REQUESTS]
+
         summary_table.add_row(key, str(total_requests), str(total_credits_used))
 
     console.print(summary_table)
@@ -210,5 +219,42 @@ def logs_summary() -> None:
     console.print(breakdown_table)
 
 
+@cli.command()
+def compact(
+    log_retention_days: int = LOG_RETENTION_DAYS,
+    allocation_retention_days: int = ALLOCATION_RETENTION_DAYS,
+    archive_dir: str = DB_ARCHIVE_DIR,
+) -> None:
+    """
+    Compact the validator database.
+
+    This command rolls the api request logs older than 'log_retention_days' up into daily totals per api key, and moves
+    the allocations older than 'allocation_retention_days' to gzipped JSON lines files in 'archive_dir'. The validator
+    does the same in the background.
+
+    Arguments:
+    log_retention_days: Number of days of api request logs to keep (0 to keep them all).
+    allocation_retention_days: Number of days of allocations to keep (0 to keep them all).
+    archive_dir: Directory to write the archived allocations to.
+    """
+    with sql.get_db_connection() as conn:
+        rolled_up = sql.rollup_logs(conn, log_retention_days)
+
+    archived = 0
+    while True:
+        with sql.get_db_connection() as conn:
+            num_archived = sql.archive_allocations(conn, archive_dir, allocation_retention_days, DB_ARCHIVE_BATCH_SIZE)
+        archived += num_archived
+        if num_archived < DB_ARCHIVE_BATCH_SIZE:
+            break
+
+    console = Console()
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Rolled Up Logs")
+    table.add_column("Archived Allocation Requests")
+    table.add_row(str(rolled_up), str(archived))
+    console.print(table)
+
+
 if __name__ == "__main__":
     cli()
@@ -1,31 +1,44 @@
 import asyncio
+import json
+from collections.abc import Iterable
+from pathlib import Path
 
 import bittensor as bt
 import numpy as np
+import numpy.typing as npt
 from async_lru import alru_cache
+from bittensor.utils import u16_normalized_float
 
-from sturdy.constants import MIN_DELEGATE_STAKE
+from sturdy.constants import (
+    MAX_CONCURRENT_YIELDS,
+    MIN_DELEGATE_STAKE,
+    SUBNETS_SNAPSHOT_CACHE_SIZE,
+    SUBTENSOR_READ_CACHE_SIZE,
+    VALI_EPOCH_STORE_MAX_BLOCK_AGE,
+)
 
 
-# Create tasks for fetching metagraph data
-@alru_cache(maxsize=512)
-async def fetch_metagraph(sub: bt.AsyncSubtensor, block: int, netuid: int) -> tuple[int, bt.MetagraphInfo]:
-    try:
-        metagraph = await sub.get_metagraph_info(netuid=netuid, block=block)
-        bt.logging.trace(f"Fetched data for block {block}")
-    except Exception as e:
-        bt.logging.error(f"Error fetching data for block {block}")
-        bt.logging.exception(e)
-        return block, None
-    else:
-        return block, metagraph
+@alru_cache(maxsize=SUBNETS_SNAPSHOT_CACHE_SIZE)
+async def fetch_subnets_snapshot(sub: bt.AsyncSubtensor, block: int) -> dict[int, bt.DynamicInfo]:
+    """
+    Fetches the dynamic info of every subnet at a block, keyed by netuid (in the order of `all_subnets()`) - a single
+    runtime call which is shared by everything reading subnets at that block, instead of a `subnet()` call per subnet.
+    """
+    subnets = await sub.all_subnets(block_number=block)
+    if subnets is None:
+        raise ValueError(f"Failed to fetch the subnets at block {block}")
+    return {subnet.netuid: subnet for subnet in subnets}
 
 
 # Create tasks for fetching dynamicinfo for a subnet
-@alru_cache(maxsize=512)
+@alru_cache(maxsize=SUBTENSOR_READ_CACHE_SIZE)
 async def fetch_dynamic_info(sub: bt.AsyncSubtensor, block: int, netuid: int) -> bt.DynamicInfo:
     try:
-        dynamic_info = await sub.subnet(netuid=netuid, block=block)
+        try:
+            dynamic_info = (await fetch_subnets_snapshot(sub=sub, block=block)).get(netuid)
+        except Exception as e:
+            bt.logging.warning(f"Failed to fetch subnets snapshot for block {block}, reading subnet {netuid}: {e}")
+            dynamic_info = await sub.subnet(netuid=netuid, block=block)
         bt.logging.trace(f"Fetched data for block {block}")
     except Exception as e:
         bt.logging.error(f"Error fetching data for block {block}")
@@ -35,51 +48,310 @@ async def fetch_dynamic_info(sub: bt.AsyncSubtensor, block: int, netuid: int) ->
         return dynamic_info
 
 
-# Create tasks for fetching dividends of nominator from a validator and timestamps
-@alru_cache(maxsize=512)
-async def fetch_nominator_dividends(sub: bt.AsyncSubtensor, block: int, hotkey: str, netuid: int) -> tuple[int, int]:
-    if netuid is None:
-        return block, None, None
+def get_storage_value(values: dict[str, object], key: object) -> int | None:
+    value = values.get(key.to_hex())
+    return getattr(value, "value", value)
+
+
+async def fetch_vali_epoch_samples(
+    sub: bt.AsyncSubtensor, block: int, netuid: int, hotkeys: list[str]
+) -> dict[str, tuple[float | None, float | None]]:
+    """
+    Fetches the dividends (net of the validator take) and the total nominator alpha stake of validators at a block.
+
+    Only the storage entries needed for the given hotkeys are read - their uid, take, alpha dividends and total alpha -
+    all in a single `state_queryStorageAt` call, rather than pulling the metagraph of the whole subnet. The samples of
+    hotkeys which aren't registered on the subnet, or which couldn't be read, are (None, None).
+    """
     try:
-        uid = await sub.get_uid_for_hotkey_on_subnet(
-            hotkey_ss58=hotkey,
-            netuid=netuid,
-            block=block,
+        block_hash = await sub.determine_block_hash(block)
+        storage_keys = {
+            hotkey: await asyncio.gather(
+                sub.substrate.create_storage_key("SubtensorModule", "Uids", [netuid, hotkey], block_hash),
+                sub.substrate.create_storage_key("SubtensorModule", "Delegates", [hotkey], block_hash),
+                sub.substrate.create_storage_key("SubtensorModule", "AlphaDividendsPerSubnet", [netuid, hotkey], block_hash),
+                sub.substrate.create_storage_key("SubtensorModule", "TotalHotkeyAlpha", [hotkey, netuid], block_hash),
+            )
+            for hotkey in hotkeys
+        }
+        results = await sub.substrate.query_multi(
+            [key for hotkey_keys in storage_keys.values() for key in hotkey_keys], block_hash=block_hash
         )
-        if uid is None:
-            return block, None
-        take = await sub.get_delegate_take(hotkey_ss58=hotkey, block=block)
-        _, metagraph = await fetch_metagraph(sub=sub, block=block, netuid=netuid)
-        dividends = metagraph.alpha_dividends_per_hotkey[uid][1].tao * (1 - take)  # remove validator take
-        bt.logging.trace(f"Fetched dividends for block {block}: {dividends}")
+        values = {key.to_hex(): value for key, value in results}
+
+        samples = {}
+        for hotkey, (uid_key, take_key, dividends_key, alpha_key) in storage_keys.items():
+            if get_storage_value(values, uid_key) is None:
+                samples[hotkey] = (None, None)
+                continue
+            take = get_storage_value(values, take_key)
+            # hotkeys without a take of their own have the default one
+            take = (
+                u16_normalized_float(take)
+                if take is not None
+                else await sub.get_delegate_take(hotkey_ss58=hotkey, block_hash=block_hash)
+            )
+            dividends = bt.Balance.from_rao(get_storage_value(values, dividends_key) or 0, netuid=netuid).tao
+            alpha_staked = bt.Balance.from_rao(get_storage_value(values, alpha_key) or 0, netuid=netuid).tao
+            samples[hotkey] = (dividends * (1 - take), alpha_staked)  # remove validator take
+        bt.logging.trace(f"Fetched validator dividends for block {block}: {samples}")
     except Exception as e:
-        bt.logging.error(f"Error fetching dividends for block {block}: {e}")
-        return block, None
+        bt.logging.error(f"Error fetching validator dividends for block {block}: {e}")
+        return dict.fromkeys(hotkeys, (None, None))
     else:
-        return block, dividends
+        return samples
 
 
-@alru_cache(maxsize=512)
-async def fetch_total_nominator_alpha_stake(sub: bt.AsyncSubtensor, block: int, hotkey: str, netuid: int) -> tuple[int, float]:
-    try:
-        uid = await sub.get_uid_for_hotkey_on_subnet(
-            hotkey_ss58=hotkey,
-            netuid=netuid,
-            block=block,
+async def get_epoch_blocks(
+    subtensor: bt.AsyncSubtensor, netuid: int, block: int, end_block: int, interval: int | None = None
+) -> list[int]:
+    """
+    Gets the blocks to sample a validator's dividends at, to estimate its apy between `block` and `end_block` - one per
+    epoch (`interval` blocks) over the same number of blocks, up to the last epoch before `end_block`. The blocks are
+    multiples of the interval, so the samples of overlapping ranges are shared.
+    """
+    if block >= end_block:
+        return []
+
+    dynamic_info = await fetch_dynamic_info(sub=subtensor, block=end_block, netuid=netuid)
+    if dynamic_info is None:
+        return []
+    if interval is None:
+        interval = dynamic_info.tempo
+    last_epoch_block = dynamic_info.last_step
+    lookback = end_block - block
+    starting_block = -(-(last_epoch_block - lookback) // interval) * interval
+
+    return list(range(starting_block, last_epoch_block, interval))
+
+
+def calculate_vali_apy(samples: list[tuple[float, float]], delta_alpha_tao: float = 0.0) -> float:
+    """
+    Estimates the annualized apy of delegating to a validator, as the mean of the apys implied by its (dividends, total
+    nominator stake) at each sampled epoch - with `delta_alpha_tao` more stake delegated to it.
+    """
+    if len(samples) < 1:
+        return 0
+
+    dividends, alpha_stakes = np.array(samples, dtype=np.float64).T
+    with np.errstate(all="ignore"):
+        # TODO: should "7280" be variable? - dependant on tempo (360 on all subnets)?
+        # 7280 is approx. seconds per year /avg block time/360
+        # TODO: should divs scale proportionally with increasing alpha delta?
+        nominator_apy_pct = np.where(
+            alpha_stakes > MIN_DELEGATE_STAKE, ((1 + (dividends / (alpha_stakes + delta_alpha_tao))) ** 7280) - 1, 0
+        )
+    if not np.isfinite(nominator_apy_pct).all():
+        bt.logging.debug("Error calculating alpha apy, assuming it to be 0")
+        return 0
+    return float(nominator_apy_pct.mean())
+
+
+class AlphaPoolsAMM:
+    """
+    The constant product AMMs of the alpha pools of many subnets, seeded from their reserves - simulates the slippage of
+    staking (or unstaking) a whole array of amounts at once, with the subnets along its last axis, instead of calling
+    `bt.DynamicInfo.tao_to_alpha_with_slippage()` (or `alpha_to_tao_with_slippage()`) amount by amount.
+
+    The results match bittensor's to within `SLIPPAGE_TOLERANCE_RAO`, plus `SLIPPAGE_TOLERANCE_REL` of the larger of the
+    reserve paid out of and the amount swapped (at the pool's price). Both truncate the amounts to whole rao along the way,
+    and bittensor also converts them to tao floats and back - which loses a few rao once they're in the 1e16 rao range.
+    """
+
+    SLIPPAGE_TOLERANCE_RAO = 2
+    SLIPPAGE_TOLERANCE_REL = 1e-14
+
+    def __init__(
+        self,
+        tao_in: npt.ArrayLike,
+        alpha_in: npt.ArrayLike,
+        price: npt.ArrayLike,
+        is_dynamic: npt.ArrayLike,
+    ) -> None:
+        # reserves in rao, and prices in tao per alpha
+        self.tao_in = np.asarray(tao_in, dtype=np.float64)
+        self.alpha_in = np.asarray(alpha_in, dtype=np.float64)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.is_dynamic = np.asarray(is_dynamic, dtype=bool)
+
+    @classmethod
+    def from_dynamic_infos(cls, dynamic_infos: Iterable[bt.DynamicInfo]) -> "AlphaPoolsAMM":
+        dynamic_infos = list(dynamic_infos)
+        return cls(
+            tao_in=[info.tao_in.rao for info in dynamic_infos],
+            alpha_in=[info.alpha_in.rao for info in dynamic_infos],
+            price=[info.price.tao for info in dynamic_infos],
+            is_dynamic=[info.is_dynamic for info in dynamic_infos],
+        )
+
+    def tao_to_alpha_slippage(self, tao: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """The alpha (in rao) lost to slippage when staking `tao` (in rao) into each pool."""
+        tao = np.asarray(tao, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # alpha_in - k / (tao_in + tao), without the cancellation
+            alpha_returned = np.ceil(self.alpha_in * tao / (self.tao_in + tao))
+            alpha_ideal = np.where(self.price != 0, np.trunc(tao / self.price), 0)
+            slippage = np.trunc(alpha_ideal - alpha_returned)
+        return np.where(self.is_dynamic & (self.tao_in + tao != 0), np.maximum(slippage, 0), 0)
+
+    def alpha_to_tao_slippage(self, alpha: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """The tao (in rao) lost to slippage when unstaking `alpha` (in rao) from each pool."""
+        alpha = np.asarray(alpha, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # tao_in - k / (alpha_in + alpha), without the cancellation
+            tao_returned = np.ceil(self.tao_in * alpha / (self.alpha_in + alpha))
+            tao_ideal = np.trunc(alpha * self.price)
+            slippage = np.trunc(tao_ideal - tao_returned)
+        return np.where(self.is_dynamic, np.maximum(slippage, 0), 0)
+
+
+class ValiEpochStore:
+    """
+    Time series of the dividends and total nominator stake of validators, sampled once per epoch, per (netuid, hotkey).
+
+    Only the samples which aren't stored yet are fetched from the chain, so each epoch is fetched once no matter how many
+    miners delegate to the validator, or how many scoring passes it spans. The samples are persisted to `path` (if any),
+    so that they survive restarts, and the apy over any range of blocks is calculated from them in memory. Samples more
+    than `max_block_age` blocks behind the newest one are dropped when saving.
+    """
+
+    def __init__(self, path: str | None = None, max_block_age: int = VALI_EPOCH_STORE_MAX_BLOCK_AGE) -> None:
+        self.path = path
+        self.max_block_age = max_block_age
+        # number of (netuid, block)s queried, and of (netuid, hotkey, block) samples fetched
+        self.queries = 0
+        self.fetches = 0
+        # (netuid, hotkey) -> block -> (dividends, total nominator alpha stake)
+        self._series: dict[tuple[int, str], dict[int, tuple[float, float]]] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def _read(self) -> dict[tuple[int, str], dict[int, tuple[float, float]]]:
+        if self.path is None or not Path(self.path).exists():
+            return {}
+        try:
+            rows = json.loads(Path(self.path).read_text())
+            return {
+                (netuid, hotkey): {block: (divs, stake) for block, divs, stake in samples} for netuid, hotkey, samples in rows
+            }
+        except Exception as e:
+            bt.logging.error(f"Failed to load validator epoch samples from {self.path}, starting over: {e}")
+            return {}
+
+    def _write(self, rows: list) -> None:
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(rows))
+        tmp_path.replace(path)
+
+    async def load(self) -> None:
+        if self._loaded:
+            return
+        stored = await asyncio.to_thread(self._read)
+        # keep whatever was fetched in the meantime
+        for key, samples in stored.items():
+            self._series[key] = {**samples, **self._series.get(key, {})}
+        self._loaded = True
+
+    async def save(self) -> None:
+        """Writes the samples to `path`, if any were added since the last save."""
+        if self.path is None or not self._dirty:
+            return
+        newest_block = max((max(samples) for samples in self._series.values() if len(samples) > 0), default=0)
+        oldest_block = newest_block - self.max_block_age
+        for key, samples in list(self._series.items()):
+            self._series[key] = {block: sample for block, sample in samples.items() if block >= oldest_block}
+            if len(self._series[key]) < 1:
+                del self._series[key]
+        rows = [
+            [netuid, hotkey, [[block, *sample] for block, sample in sorted(samples.items())]]
+            for (netuid, hotkey), samples in self._series.items()
+        ]
+        self._dirty = False
+        await asyncio.to_thread(self._write, rows)
+
+    async def update(
+        self,
+        subtensor: bt.AsyncSubtensor,
+        blocks: dict[tuple[int, str], Iterable[int]],
+        concurrency: int = MAX_CONCURRENT_YIELDS,
+    ) -> None:
+        """
+        Fetches the samples which aren't stored yet, given the blocks to sample each (netuid, hotkey) at. The samples of
+        all the validators of a subnet which are needed at the same block are fetched together.
+        """
+        await self.load()
+        missing_hotkeys: dict[tuple[int, int], set[str]] = {}
+        for (netuid, hotkey), hotkey_blocks in blocks.items():
+            samples = self._series.get((netuid, hotkey), {})
+            for block in hotkey_blocks:
+                if block not in samples:
+                    missing_hotkeys.setdefault((netuid, block), set()).add(hotkey)
+        if len(missing_hotkeys) < 1:
+            return
+
+        self.queries += len(missing_hotkeys)
+        self.fetches += sum(len(hotkeys) for hotkeys in missing_hotkeys.values())
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(netuid: int, block: int, hotkeys: set[str]) -> dict[str, tuple[float | None, float | None]]:
+            async with semaphore:
+                return await fetch_vali_epoch_samples(subtensor, block, netuid, sorted(hotkeys))
+
+        results = await asyncio.gather(
+            *(fetch(netuid, block, hotkeys) for (netuid, block), hotkeys in missing_hotkeys.items())
         )
-        if uid is None:
-            return block, None
-        raw_total_hotkey_alpha = await sub.query_subtensor(name="TotalHotkeyAlpha", params=[hotkey, netuid])
-        total_hotkey_alpha = bt.Balance.from_rao(getattr(raw_total_hotkey_alpha, "value", 0), netuid=netuid)
-        alpha_staked = total_hotkey_alpha.tao
+        for (netuid, block), block_samples in zip(missing_hotkeys, results, strict=True):
+            for hotkey, (dividends, alpha_stake) in block_samples.items():
+                # failed reads (and blocks where the hotkey wasn't registered) aren't stored, and are fetched again next time
+                if dividends is not None and alpha_stake is not None:
+                    self._series.setdefault((netuid, hotkey), {})[block] = (dividends, alpha_stake)
+                    self._dirty = True
+
+    def get_samples(self, netuid: int, hotkey: str, blocks: list[int]) -> list[tuple[float, float]]:
+        """The stored (dividends, total nominator alpha stake) samples of the validator at the given blocks."""
+        samples = self._series.get((netuid, hotkey), {})
+        return [samples[block] for block in blocks if block in samples]
+
+
+async def prefetch_vali_epoch_data(
+    subtensor: bt.AsyncSubtensor,
+    reads: Iterable[tuple[int, str, int]],
+    end_block: int,
+    concurrency: int = MAX_CONCURRENT_YIELDS,
+    store: ValiEpochStore | None = None,
+) -> None:
+    """
+    Warms the caches of the subtensor reads needed to calculate the yields of alpha token allocations, so that each
+    distinct read is only made once no matter how many miners need it, and persists the new validator epoch samples.
+
+    Args:
+        subtensor (bt.AsyncSubtensor): The subtensor to read from.
+        reads (Iterable[tuple[int, str, int]]): (netuid, validator hotkey, block) of each allocation to a validator.
+        end_block (int): The block the yields are calculated up to.
+        concurrency (int): The max. number of reads to make at once.
+        store (ValiEpochStore | None): The store the validator epoch samples are fetched into, if any.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def prefetch(netuid: int, hotkey: str, block: int) -> tuple[tuple[int, str], list[int]]:
+        async with semaphore:
+            await fetch_dynamic_info(sub=subtensor, block=block, netuid=netuid)
+            return (netuid, hotkey), await get_epoch_blocks(subtensor, netuid, block, end_block)
+
+    blocks: dict[tuple[int, str], set[int]] = {}
+    for key, epoch_blocks in await asyncio.gather(*(prefetch(netuid, hotkey, block) for netuid, hotkey, block in set(reads))):
+        blocks.setdefault(key, set()).update(epoch_blocks)
+    if store is None:
+        return
+    await store.update(subtensor, blocks, concurrency)
+    try:
+        await store.save()
     except Exception as e:
-        bt.logging.error(f"Error fetching total nominator alpha stake for {hotkey} at block {block}: {e}")
-        return block, 0
-    else:
-        return block, alpha_staked
+        bt.logging.error(f"Failed to save validator epoch samples: {e}")
 
 
-@alru_cache(maxsize=512)
 async def get_vali_avg_apy(
     subtensor: bt.AsyncSubtensor,
     netuid: int,
@@ -88,48 +360,15 @@ async def get_vali_avg_apy(
     end_block: int | None,
     interval: int | None = None,
     delta_alpha_tao: float = 0.0,
-) -> int:
+    store: ValiEpochStore | None = None,
+) -> float:
+    if store is None:
+        store = ValiEpochStore()
     ending_block = end_block if end_block is not None else await subtensor.block
     if block >= ending_block:
         return 0
 
-    dynamic_info = await subtensor.subnet(netuid=netuid)
-    if interval is None:
-        interval = dynamic_info.tempo
-    last_epoch_block = dynamic_info.last_step
-    lookback = ending_block - block
-    starting_block = last_epoch_block - lookback
-
-    blocks = list(range(starting_block, last_epoch_block, interval))
+    blocks = await get_epoch_blocks(subtensor, netuid, block, ending_block, interval)
+    await store.update(subtensor, {(netuid, hotkey): blocks})
 
-    # Fetch dividends concurrently
-    dividends_tasks = [fetch_nominator_dividends(sub=subtensor, block=block, hotkey=hotkey, netuid=netuid) for block in blocks]
-    dividends_results = await asyncio.gather(*dividends_tasks)
-
-    alpha_stake_tasks = [
-        fetch_total_nominator_alpha_stake(sub=subtensor, block=block, hotkey=hotkey, netuid=netuid) for block in blocks
-    ]
-    alpha_stake_results = dict(await asyncio.gather(*alpha_stake_tasks))
-
-    nominator_earnings = {block: (divs) for block, divs in dividends_results if divs is not None}
-
-    mean_apy_pct = 0
-    try:
-        nominator_apy_pct = np.array(
-            # TODO: should "7280" be variable? - dependant on tempo (360 on all subnets)?
-            # 7280 is approx. seconds per year /avg block time/360
-            # TODO: should divs scale proportionally with increasing alpha delta?
-            [
-                ((1 + (divs / (alpha_stake_results[block] + delta_alpha_tao))) ** 7280) - 1
-                if alpha_stake_results[block] > MIN_DELEGATE_STAKE and divs is not None
-                else 0
-                for block, divs in nominator_earnings.items()
-            ]
-        )
-        # debug log mean
-        mean_apy_pct = np.nan_to_num(nominator_apy_pct.mean())
-    except Exception as e:
-        bt.logging.debug(f"Error calculating alpha apy, assuming it to be 0: {e}")
-        return 0
-    else:
-        return mean_apy_pct
+    return calculate_vali_apy(store.get_samples(netuid, hotkey, blocks), delta_alpha_tao)
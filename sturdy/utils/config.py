@@ -23,7 +23,18 @@ import bittensor as bt
 from loguru import logger
 
 from sturdy import __spec_version__ as spec_version
-from sturdy.constants import DB_DIR, ALLOC_QUERY_TIMEOUT
+from sturdy.constants import (
+    ALLOC_QUERY_TIMEOUT,
+    ALLOCATION_RETENTION_DAYS,
+    DB_ARCHIVE_DIR,
+    DB_COMPACTION_INTERVAL,
+    DB_DIR,
+    LOG_RETENTION_DAYS,
+    MAX_CONCURRENT_QUERIES,
+    MAX_CONCURRENT_YIELDS,
+    MINER_TYPE_CACHE_TTL,
+    POOL_SYNC_CONCURRENCY,
+)
 
 
 def check_config(_cls, config: "bt.Config") -> None:
@@ -245,10 +256,74 @@ def add_validator_args(_cls, parser) -> None:
     parser.add_argument(
         "--validator.max_workers",
         type=int,
-        help="maximum number of workers of validator thread pool for requesting miners",
+        help="DEPRECATED: miners are queried directly on the event loop, use --validator.max_concurrent_queries instead",
         default=None,
     )
 
+    parser.add_argument(
+        "--validator.max_concurrent_queries",
+        type=int,
+        help="maximum number of miner queries that can be in flight at the same time",
+        default=MAX_CONCURRENT_QUERIES,
+    )
+
+    parser.add_argument(
+        "--validator.pool_sync_concurrency",
+        type=int,
+        help="maximum number of pools that can be synced at the same time",
+        default=POOL_SYNC_CONCURRENCY,
+    )
+
+    parser.add_argument(
+        "--validator.max_concurrent_yields",
+        type=int,
+        help="maximum number of miner yields that can be calculated at the same time when scoring",
+        default=MAX_CONCURRENT_YIELDS,
+    )
+
+    parser.add_argument(
+        "--validator.vali_epoch_store_path",
+        type=str,
+        help="file the sampled dividends and stake of validators are persisted to (defaults to one per subtensor network in"
+        " the neuron directory)",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--validator.miner_type_cache_ttl",
+        type=int,
+        help="time in seconds a miner's reported type is cached before it is queried again",
+        default=MINER_TYPE_CACHE_TTL,
+    )
+
+    parser.add_argument(
+        "--validator.log_retention_days",
+        type=int,
+        help="api request logs older than this many days are rolled up into daily totals per api key (0 to keep them all)",
+        default=LOG_RETENTION_DAYS,
+    )
+
+    parser.add_argument(
+        "--validator.allocation_retention_days",
+        type=int,
+        help="allocations older than this many days are moved out of the database into the archive (0 to keep them all)",
+        default=ALLOCATION_RETENTION_DAYS,
+    )
+
+    parser.add_argument(
+        "--validator.db_archive_dir",
+        type=str,
+        help="directory which archived allocations are written to",
+        default=DB_ARCHIVE_DIR,
+    )
+
+    parser.add_argument(
+        "--validator.db_compaction_interval",
+        type=int,
+        help="time in seconds between database compactions",
+        default=DB_COMPACTION_INTERVAL,
+    )
+
 
 def config(cls) -> bt.config:
     """
@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+from web3 import AsyncWeb3
+from web3.contract.async_contract import AsyncContract
+
+from sturdy.abi import load_abi
+from sturdy.constants import CONTRACT_CACHE_SIZE
+
+
+# keyed by (web3 provider, abi name, address, decode_tuples) - bounded, as the pools (and so the contracts) miners read
+# from are chosen by validators, and providers may be recreated
+@lru_cache(maxsize=CONTRACT_CACHE_SIZE)
+def _build_contract(web3_provider: AsyncWeb3, abi_name: str, address: str, decode_tuples: bool) -> AsyncContract:
+    return web3_provider.eth.contract(address=address, abi=load_abi(abi_name), decode_tuples=decode_tuples)
+
+
+def get_contract(web3_provider: AsyncWeb3, abi_name: str, address: str, decode_tuples: bool = False) -> AsyncContract:
+    """
+    Gets a contract instance for the contract at `address` with the abi `sturdy/abi/<abi_name>.json`. The most recently
+    used `CONTRACT_CACHE_SIZE` instances are cached, per web3 provider, so the abi is only parsed and the contract only built
+    once.
+
+    Args:
+        web3_provider (AsyncWeb3): The provider the contract uses to make calls.
+        abi_name (str): Name of the abi file, without the `.json` extension.
+        address (str): Address of the contract.
+        decode_tuples (bool): Whether tuple outputs are decoded into named tuples.
+
+    Returns:
+        AsyncContract: The contract instance.
+    """
+    return _build_contract(web3_provider, abi_name, AsyncWeb3.to_checksum_address(address), decode_tuples)
@@ -16,7 +16,6 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-import asyncio
 import time
 from collections.abc import Callable
 from datetime import datetime, timezone
@@ -36,6 +35,7 @@ from sturdy.constants import (
     SIG_FIGS,
 )
 from sturdy.utils.ethmath import wei_div, wei_mul
+from sturdy.utils.rpc_scheduler import RETRY_SCHEDULER
 
 # TODO: cleanup functions - lay them out better across files?
 
@@ -106,23 +106,7 @@ async def async_retry_with_backoff(func, *args: Any, **kwargs: Any) -> Any:
     """
     Retry a function with exponential backoff and jitter when rate limited.
     """
-    max_retries = 5  # Maximum number of retries
-    base_delay = 0.1  # Initial delay in seconds
-    max_delay = 60  # Maximum delay in seconds
-
-    retries = 0
-    while retries < max_retries:
-        try:
-            return await func(*args, **kwargs)
-        except Exception as e:
-            if "Rate limited" in str(e):
-                delay = min(base_delay * 2**retries, max_delay)
-                jitter = np.random.uniform(delay / 2, delay * 1.5)
-                asyncio.sleep(jitter)
-                retries += 1
-            else:
-                raise
-    raise Exception(f"Maximum retries ({max_retries}) exceeded for {func.__name__}")  # noqa: TRY002
+    return await RETRY_SCHEDULER.run(func, *args, **kwargs)
 
 
 def retry_with_backoff(func, *args: Any, **kwargs: Any) -> Any:
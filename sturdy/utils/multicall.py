@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+from collections.abc import Generator
+from typing import Any
+
+import bittensor as bt
+from eth_abi.exceptions import DecodingError
+from web3 import AsyncWeb3
+from web3._utils.abi import get_abi_output_types, map_abi_data, named_tree, recursive_dict_to_namedtuple
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.contract.async_contract import AsyncContract, AsyncContractFunction
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+from web3.types import BlockIdentifier
+
+from sturdy.constants import MULTICALL3_ADDRESS, MULTICALL_BATCH_SIZE
+from sturdy.utils.contracts import get_contract
+from sturdy.utils.misc import async_retry_with_backoff
+
+# A generator which yields rounds of named contract reads, and is sent back the results of each round. This lets reads
+# which depend on the results of earlier reads (i.e. reading from a contract whose address was just read) be batched
+# across many pools at once.
+ReadRounds = Generator[dict[str, AsyncContractFunction], dict[str, Any], None]
+
+
+def get_multicall3_contract(web3_provider: AsyncWeb3) -> AsyncContract:
+    return get_contract(web3_provider, "Multicall3", MULTICALL3_ADDRESS)
+
+
+def decode_call_result(web3_provider: AsyncWeb3, call: AsyncContractFunction, return_data: bytes) -> Any:
+    """
+    Decodes the return data of a contract function the same way `AsyncContractFunction.call()` would.
+    """
+    output_types = get_abi_output_types(call.abi)
+    try:
+        output_data = web3_provider.codec.decode(output_types, return_data)
+    except DecodingError as e:
+        raise BadFunctionCallOutput(
+            f"Could not decode contract function call to {call.function_identifier} with return data: {return_data!s}, "
+            f"output_types: {output_types}"
+        ) from e
+
+    normalizers = itertools.chain(BASE_RETURN_NORMALIZERS, call._return_data_normalizers)
+    normalized_data = map_abi_data(normalizers, output_types, output_data)
+
+    if call.decode_tuples:
+        decoded = named_tree(call.abi["outputs"], normalized_data)
+        normalized_data = recursive_dict_to_namedtuple(decoded)
+
+    return normalized_data[0] if len(normalized_data) == 1 else normalized_data
+
+
+async def read_individually(
+    web3_provider: AsyncWeb3, call: AsyncContractFunction, block_identifier: BlockIdentifier = "latest"
+) -> Any:
+    """Performs a contract read on its own, rather than through Multicall3."""
+    if call.address.lower() == MULTICALL3_ADDRESS.lower() and call.fn_name == "getCurrentBlockTimestamp":
+        # multicall3's reads of the block itself can't be made without it - read the block instead
+        block = await async_retry_with_backoff(web3_provider.eth.get_block, block_identifier)
+        return block["timestamp"]
+    return await async_retry_with_backoff(call.call, block_identifier=block_identifier)
+
+
+async def multicall(
+    web3_provider: AsyncWeb3,
+    calls: list[AsyncContractFunction],
+    block_identifier: BlockIdentifier = "latest",
+) -> list[Any]:
+    """
+    Performs the given contract reads in as few eth_calls as possible by aggregating them with Multicall3.
+
+    Args:
+        web3_provider (AsyncWeb3): The provider to make the calls with.
+        calls (list[AsyncContractFunction]): The contract reads, i.e. `contract.functions.balanceOf(user)`.
+        block_identifier (BlockIdentifier): The block to read at.
+
+    Returns:
+        list[Any]: The decoded result of each read, in the same order as `calls`. A read which failed is returned as the
+        exception it raised instead.
+    """
+    results = []
+    multicall_contract = get_multicall3_contract(web3_provider)
+    for start in range(0, len(calls), MULTICALL_BATCH_SIZE):
+        batch = calls[start : start + MULTICALL_BATCH_SIZE]
+        try:
+            aggregated = await async_retry_with_backoff(
+                multicall_contract.functions.aggregate3(
+                    [(call.address, True, call._encode_transaction_data()) for call in batch]
+                ).call,
+                block_identifier=block_identifier,
+            )
+        except Exception as err:
+            # i.e. multicall3 is not deployed on this chain - fall back to performing the reads individually
+            bt.logging.warning(f"Multicall failed, performing {len(batch)} reads individually: {err}")
+            results.extend(
+                await asyncio.gather(
+                    *(read_individually(web3_provider, call, block_identifier=block_identifier) for call in batch),
+                    return_exceptions=True,
+                )
+            )
+            continue
+
+        for call, (success, return_data) in zip(batch, aggregated, strict=True):
+            if not success:
+                results.append(ContractLogicError(f"execution reverted: {call.function_identifier} on {call.address}"))
+                continue
+            try:
+                results.append(decode_call_result(web3_provider, call, return_data))
+            except BadFunctionCallOutput as err:
+                results.append(err)
+
+    return results
+
+
+async def run_read_rounds(
+    web3_provider: AsyncWeb3,
+    read_rounds: list[ReadRounds],
+    block_identifier: BlockIdentifier = "latest",
+) -> list[Exception | None]:
+    """
+    Steps through all of the given read rounds in lockstep, performing the reads of every round with a single multicall.
+
+    A read which fails is thrown into the generator which requested it, so it can handle the error itself.
+
+    Returns:
+        list[Exception | None]: The exception each generator raised (if any), in the same order as `read_rounds`.
+    """
+    errors: list[Exception | None] = [None] * len(read_rounds)
+
+    def advance(idx: int, results: dict[str, Any] | None, err: Exception | None = None) -> dict | None:
+        try:
+            if err is not None:
+                return read_rounds[idx].throw(err)
+            if results is None:
+                return next(read_rounds[idx])
+            return read_rounds[idx].send(results)
+        except StopIteration:
+            return None
+        except Exception as e:
+            errors[idx] = e
+            return None
+
+    pending = {}
+    for idx in range(len(read_rounds)):
+        reads = advance(idx, None)
+        if reads is not None:
+            pending[idx] = reads
+
+    while len(pending) > 0:
+        keys = [(idx, key) for idx, reads in pending.items() for key in reads]
+        results = await multicall(web3_provider, [pending[idx][key] for idx, key in keys], block_identifier=block_identifier)
+
+        round_results: dict[int, dict[str, Any]] = {idx: {} for idx in pending}
+        round_errors: dict[int, Exception] = {}
+        for (idx, key), result in zip(keys, results, strict=True):
+            if isinstance(result, Exception):
+                round_errors.setdefault(idx, result)
+            else:
+                round_results[idx][key] = result
+
+        next_pending = {}
+        for idx in pending:
+            reads = advance(idx, round_results[idx], round_errors.get(idx))
+            if reads is not None:
+                next_pending[idx] = reads
+        pending = next_pending
+
+    return errors
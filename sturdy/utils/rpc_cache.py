@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from web3 import AsyncWeb3
+from web3.types import AsyncMiddleware, AsyncMiddlewareCoroutine, RPCEndpoint, RPCResponse
+
+from sturdy.constants import ETH_CALL_CACHE_MAX_BLOCK_AGE, ETH_CALL_CACHE_SIZE
+
+# (chain id, block number, to, calldata)
+EthCallKey = tuple[int, int, str, str]
+
+
+class EthCallCache:
+    """
+    LRU cache of `eth_call` responses. Only calls made at a specific block number are cached, as their result can never
+    change - calls made at "latest" and other block tags always go to the node.
+
+    Entries are evicted once the cache holds more than `max_entries` of them, or once they're more than `max_block_age`
+    blocks behind the newest block cached for their chain.
+    """
+
+    def __init__(self, max_entries: int = ETH_CALL_CACHE_SIZE, max_block_age: int = ETH_CALL_CACHE_MAX_BLOCK_AGE) -> None:
+        self.max_entries = max_entries
+        self.max_block_age = max_block_age
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[EthCallKey, RPCResponse] = OrderedDict()
+        self._newest_blocks: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: EthCallKey) -> RPCResponse | None:
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: EthCallKey, response: RPCResponse) -> None:
+        chain_id, block, _, _ = key
+        newest_block = self._newest_blocks.get(chain_id, block)
+        if block < newest_block - self.max_block_age:
+            return
+
+        if block > newest_block or chain_id not in self._newest_blocks:
+            self._newest_blocks[chain_id] = newest_block = max(block, newest_block)
+            stale_keys = [k for k in self._entries if k[0] == chain_id and k[1] < newest_block - self.max_block_age]
+            for stale_key in stale_keys:
+                del self._entries[stale_key]
+
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# shared by all the web3 providers created by PoolProviderFactory
+ETH_CALL_CACHE = EthCallCache()
+
+
+def get_eth_call_key(chain_id: int, params: Any) -> EthCallKey | None:
+    """Gets the cache key of an `eth_call` request, or None if it is not made at a specific block number"""
+    if len(params) != 2:  # i.e. has state overrides
+        return None
+    tx, block_identifier = params
+    if isinstance(block_identifier, int):
+        block = block_identifier
+    elif isinstance(block_identifier, str) and block_identifier.startswith("0x"):
+        block = int(block_identifier, 16)
+    else:
+        return None
+    if not isinstance(tx, dict) or "to" not in tx:
+        return None
+    return (chain_id, block, str(tx["to"]).lower(), str(tx.get("data", tx.get("input", ""))).lower())
+
+
+def construct_eth_call_cache_middleware(cache: EthCallCache = ETH_CALL_CACHE) -> AsyncMiddleware:
+    """Constructs a middleware which serves `eth_call`s made at a specific block number from `cache`"""
+
+    async def eth_call_cache_middleware(
+        make_request: Callable[[RPCEndpoint, Any], Any], async_w3: AsyncWeb3
+    ) -> AsyncMiddlewareCoroutine:
+        chain_id = None
+
+        async def middleware(method: RPCEndpoint, params: Any) -> RPCResponse:
+            nonlocal chain_id
+            if method != "eth_call":
+                return await make_request(method, params)
+
+            if chain_id is None:
+                chain_id = await async_w3.eth.chain_id
+            key = get_eth_call_key(chain_id, params)
+            if key is None:
+                return await make_request(method, params)
+
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = await make_request(method, params)
+            if "result" in response and "error" not in response:
+                cache.put(key, response)
+            return response
+
+        return middleware
+
+    return eth_call_cache_middleware
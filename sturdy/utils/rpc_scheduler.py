@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import bittensor as bt
+from web3 import AsyncWeb3
+from web3.types import AsyncMiddleware, AsyncMiddlewareCoroutine, RPCEndpoint, RPCResponse
+
+from sturdy.constants import (
+    RPC_BACKOFF_BASE_DELAY,
+    RPC_BACKOFF_MAX_DELAY,
+    RPC_BURST,
+    RPC_MAX_CONCURRENT_REQUESTS,
+    RPC_MAX_RETRIES,
+    RPC_RATE_LIMIT,
+)
+
+# JSON-RPC error codes providers use to signal that a request was rate limited
+RATE_LIMITED_ERROR_CODES = (429, -32005)
+
+
+class RateLimitedError(Exception):
+    """Raised when a provider rejects a request because it is being rate limited"""
+
+
+class RetriesExceededError(Exception):
+    """Raised when a request is still being throttled after all of its retries"""
+
+
+def is_rate_limited(err: Exception | str) -> bool:
+    if isinstance(err, RateLimitedError):
+        return True
+    message = str(err).lower()
+    return "rate limit" in message or "too many requests" in message
+
+
+@dataclass
+class RpcSchedulerStats:
+    requests: int = 0  # requests made, including retries
+    retries: int = 0  # requests retried after being throttled
+    throttles: int = 0  # requests the provider rate limited
+    failures: int = 0  # requests which were still being throttled after all of their retries
+    queue_wait: float = 0.0  # total seconds requests spent waiting for a token or a free slot
+
+
+class TokenBucket:
+    """
+    Allows up to `rate` acquisitions per second on average, with bursts of up to `capacity` acquisitions at once.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        # requests take tokens one at a time, in the order they asked for them
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def drain(self) -> None:
+        """Empties the bucket, i.e. to slow all requests down after being throttled"""
+        self._refill()
+        self._tokens = min(self._tokens, 0)
+
+
+class RpcScheduler:
+    """
+    Schedules the requests made to a provider: requests are paced by a token bucket, at most `max_concurrent_requests` of
+    them are in flight at once, and requests which get rate limited are retried with exponential backoff and jitter.
+
+    Either limit can be disabled by setting it to None.
+    """
+
+    def __init__(
+        self,
+        rate_limit: float | None = RPC_RATE_LIMIT,
+        burst: float = RPC_BURST,
+        max_concurrent_requests: int | None = RPC_MAX_CONCURRENT_REQUESTS,
+        max_retries: int = RPC_MAX_RETRIES,
+        base_delay: float = RPC_BACKOFF_BASE_DELAY,
+        max_delay: float = RPC_BACKOFF_MAX_DELAY,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = RpcSchedulerStats()
+        self._bucket = TokenBucket(rate_limit, burst) if rate_limit is not None else None
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests) if max_concurrent_requests is not None else None
+
+    def backoff_delay(self, retries: int) -> float:
+        delay = min(self.base_delay * 2**retries, self.max_delay)
+        return random.uniform(delay / 2, delay * 1.5)  # noqa: S311
+
+    async def _run_once(self, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        queued_at = time.monotonic()
+        if self._bucket is not None:
+            await self._bucket.acquire()
+        if self._semaphore is None:
+            self.stats.queue_wait += time.monotonic() - queued_at
+            self.stats.requests += 1
+            return await func(*args, **kwargs)
+        async with self._semaphore:
+            self.stats.queue_wait += time.monotonic() - queued_at
+            self.stats.requests += 1
+            return await func(*args, **kwargs)
+
+    async def run(self, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Awaits `func(*args, **kwargs)` once it is scheduled, retrying it for as long as it is rate limited"""
+        retries = 0
+        while True:
+            try:
+                return await self._run_once(func, *args, **kwargs)
+            except Exception as err:
+                if not is_rate_limited(err):
+                    raise
+                self.stats.throttles += 1
+                if retries >= self.max_retries:
+                    self.stats.failures += 1
+                    raise RetriesExceededError(
+                        f"Maximum retries ({self.max_retries}) exceeded for {getattr(func, '__name__', func)}"
+                    ) from err
+                if self._bucket is not None:
+                    self._bucket.drain()
+                delay = self.backoff_delay(retries)
+                bt.logging.trace(f"Request was throttled, retrying in {delay:.2f}s: {err}")
+                await asyncio.sleep(delay)
+                retries += 1
+                self.stats.retries += 1
+
+
+# only retries throttled requests - the requests of web3 providers created by PoolProviderFactory are also paced by the
+# scheduler of their provider
+RETRY_SCHEDULER = RpcScheduler(rate_limit=None, max_concurrent_requests=None)
+
+# the scheduler of each of the web3 providers created by PoolProviderFactory
+RPC_SCHEDULERS: dict[AsyncWeb3, RpcScheduler] = {}
+
+
+def get_rpc_scheduler(web3_provider: AsyncWeb3) -> RpcScheduler:
+    scheduler = RPC_SCHEDULERS.get(web3_provider)
+    if scheduler is None:
+        scheduler = RPC_SCHEDULERS[web3_provider] = RpcScheduler()
+    return scheduler
+
+
+def construct_rpc_scheduler_middleware(scheduler: RpcScheduler) -> AsyncMiddleware:
+    """Constructs a middleware which makes every request through `scheduler`"""
+
+    async def rpc_scheduler_middleware(
+        make_request: Callable[[RPCEndpoint, Any], Any],
+        async_w3: AsyncWeb3,  # noqa: ARG001
+    ) -> AsyncMiddlewareCoroutine:
+        async def make_scheduled_request(method: RPCEndpoint, params: Any) -> RPCResponse:
+            response = await make_request(method, params)
+            error = response.get("error")
+            if isinstance(error, dict) and (
+                error.get("code") in RATE_LIMITED_ERROR_CODES or is_rate_limited(error.get("message", ""))
+            ):
+                raise RateLimitedError(error.get("message", "rate limited"))
+            return response
+
+        async def middleware(method: RPCEndpoint, params: Any) -> RPCResponse:
+            return await scheduler.run(make_scheduled_request, method, params)
+
+        return middleware
+
+    return rpc_scheduler_middleware
@@ -1,17 +1,18 @@
 # ruff: noqa: RUF003 (ambiguous-unicode-character-comment) - for the equations :)
 import asyncio
-import json
+import itertools
 import math
 from copy import copy
 from dataclasses import dataclass
-from pathlib import Path
 
 from beautifultable import BeautifulTable
 from gql import Client, gql
+from gql.client import AsyncClientSession
 from gql.transport.aiohttp import AIOHTTPTransport
 from web3 import AsyncWeb3
 from web3.types import BlockIdentifier
 
+from sturdy.abi import load_abi
 from sturdy.constants import TAOFI_GQL_URL
 
 TRANSPORT = AIOHTTPTransport(url=TAOFI_GQL_URL)
@@ -22,10 +23,9 @@ X128 = 2**128
 X256 = 2**256
 
 QUERY_BATCH_SIZE = 1000  # Default batch size for queries
+QUERY_PARTITIONS = 1  # Default number of position id ranges to page through concurrently
 
-NFT_POS_MGR_PATH = Path(__file__).parent.parent / "abi" / "NonfungiblePositionManager.json"
-# TODO: use read_text() everywhere else?
-NFT_POS_ABI = json.loads(NFT_POS_MGR_PATH.read_text())
+NFT_POS_ABI = load_abi("NonfungiblePositionManager")
 NFT_POS_MGR_ADDR = "0x61EeA4770d7E15e7036f8632f4bcB33AF1Af1e25"
 
 
@@ -79,10 +79,22 @@ async def get_position_infos_subgraph(
         gql(POSITIONS_QUERY), variable_values={"blockNumber": block_number, "first": first, "skip": skip}
     )
 
-    positions_subgraph_info = data["positions"]
+    return parse_position_infos(data["positions"])
+
+
+def parse_position_infos(positions: list[dict]) -> dict[int, PositionFees]:
+    """
+    Parse the positions returned by the subgraph.
+
+    Args:
+        positions: The positions, as returned by the subgraph
+
+    Returns:
+        Dictionary mapping position IDs to PositionFees objects
+    """
     positions_fees = {}
 
-    for _, position in enumerate(positions_subgraph_info):
+    for position in positions:
         token0_to_token1_rate = float(position["pool"]["token1Price"])
         token_0_decimals = int(position["token0"]["decimals"])
         token_1_decimals = int(position["token1"]["decimals"])
@@ -236,8 +248,115 @@ POSITIONS_QUERY = """
 """
 
 
+POSITIONS_BY_ID_QUERY = """
+    query GetTokenPositionsById($blockNumber: Int!, $first: Int = 1000, $where: Position_filter!) {
+        positions(
+            first: $first, orderBy: id, orderDirection: asc, where: $where, block: {number: $blockNumber}
+        ) {
+            id
+            owner
+            collectedFeesToken0
+            collectedFeesToken1
+            pool {
+                liquidity
+                tick
+                token1Price
+            }
+            token0 {
+                symbol
+                id
+                decimals
+            }
+            token1 {
+                symbol
+                id
+                decimals
+            }
+            liquidity
+            transaction {
+                timestamp
+                blockNumber
+            }
+        }
+    }
+"""
+
+
+def get_position_id_ranges(partitions: int) -> list[tuple[str | None, str | None]]:
+    """
+    Split the position ids into `partitions` contiguous ranges of (id_gte, id_lt), where None is unbounded.
+
+    Position ids are `ID`s, which the subgraph compares as strings - so the ranges are split at two digit prefixes
+    ("10" to "99"), which covers every id however many positions there are. Lower leading digits are more common, so
+    the ranges aren't evenly sized.
+    """
+    prefixes = [str(prefix) for prefix in range(10, 100)]
+    partitions = max(1, min(partitions, len(prefixes)))
+    bounds = [None] + [prefixes[idx * len(prefixes) // partitions] for idx in range(1, partitions)] + [None]
+    return list(itertools.pairwise(bounds))
+
+
+async def get_position_infos_in_range(
+    session: AsyncClientSession,
+    block_number: int,
+    batch_size: int = QUERY_BATCH_SIZE,
+    id_gte: str | None = None,
+    id_lt: str | None = None,
+) -> dict[int, PositionFees]:
+    """
+    Get the position fees of every position with an id in [id_gte, id_lt) at a specific block.
+
+    The positions are paged through in order of id, with each page starting after the last id of the previous one (an
+    `id_gt` cursor) - so every page is as quick to fetch as the first, unlike with `skip`. The next page is requested
+    as soon as a page arrives, and is fetched while the page is parsed.
+
+    Args:
+        session: The connected GraphQL session to use
+        block_number: The block number to query
+        batch_size: Number of positions to fetch per request (default: 1000)
+        id_gte: The first position id of the range, or None to start from the first position
+        id_lt: The position id which ends the range, or None to go up to the last position
+
+    Returns:
+        Dictionary mapping position IDs to PositionFees objects for the positions in the range
+    """
+    where = {}
+    if id_gte is not None:
+        where["id_gte"] = id_gte
+    if id_lt is not None:
+        where["id_lt"] = id_lt
+
+    async def fetch_page(page_where: dict) -> list[dict]:
+        data = await session.execute(
+            gql(POSITIONS_BY_ID_QUERY),
+            variable_values={"blockNumber": block_number, "first": batch_size, "where": page_where},
+        )
+        return data["positions"]
+
+    position_infos = {}
+    next_page = asyncio.create_task(fetch_page(where))
+    try:
+        while next_page is not None:
+            positions = await next_page
+            next_page = None
+            # If we got as many positions as requested, there may be more
+            if len(positions) >= batch_size:
+                next_page = asyncio.create_task(fetch_page({**where, "id_gt": positions[-1]["id"]}))
+            # parse in a thread, so that the next page is fetched in the meantime
+            position_infos.update(await asyncio.to_thread(parse_position_infos, positions))
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+    return position_infos
+
+
 async def get_all_positions_infos_subgraph(
-    block_number: int, client: Client = GQL_CLIENT, batch_size: int = QUERY_BATCH_SIZE
+    block_number: int,
+    client: Client = GQL_CLIENT,
+    batch_size: int = QUERY_BATCH_SIZE,
+    use_cursor: bool = True,
+    partitions: int = QUERY_PARTITIONS,
 ) -> dict[int, PositionFees]:
     """
     Get all position fees at a specific block, handling pagination automatically.
@@ -246,10 +365,22 @@ async def get_all_positions_infos_subgraph(
         block_number: The block number to query
         client: The GraphQL client to use
         batch_size: Number of positions to fetch per request (default: 1000)
+        use_cursor: Page through the positions by id (see `get_position_infos_in_range()`), rather than with `skip`
+        partitions: Number of position id ranges to page through concurrently, when paging by id (default: 1)
 
     Returns:
         Dictionary mapping position IDs to PositionFees objects for all positions
     """
+    if use_cursor:
+        async with client as session:
+            ranges = await asyncio.gather(
+                *(
+                    get_position_infos_in_range(session, block_number, batch_size, id_gte, id_lt)
+                    for id_gte, id_lt in get_position_id_ranges(partitions)
+                )
+            )
+        return {position_id: info for position_infos in ranges for position_id, info in position_infos.items()}
+
     position_infos = {}
     skip = 0
 
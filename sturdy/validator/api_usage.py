@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import time
+from collections import deque
+from datetime import datetime
+
+import bittensor as bt
+
+from sturdy.constants import (
+    API_KEY_CACHE_TTL,
+    API_RATE_LIMIT_WINDOW,
+    API_USAGE_FLUSH_INTERVAL,
+    API_USAGE_MAX_PENDING,
+)
+from sturdy.validator import sql
+from sturdy.validator.async_sql import AsyncDatabase
+
+
+class ApiUsageLedger:
+    """
+    Keeps track of the api keys, their credits and their request rates in memory, so that checking a request doesn't touch
+    the database.
+
+    - The api keys table is cached, and reloaded every `refresh_interval` seconds - so keys which were added, updated or
+      removed (i.e. with sturdycli) take effect within that time.
+    - Rate limits are enforced over a sliding window of the last `window` seconds, from the times of the requests which
+      were charged for. These are only kept in memory, so the window starts out empty after a restart.
+    - Credits are debited from the cached balances straight away, and the debits and request logs are written to the
+      database in batches - every `flush_interval` seconds, or once `max_pending` requests have queued up.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        refresh_interval: float = API_KEY_CACHE_TTL,
+        flush_interval: float = API_USAGE_FLUSH_INTERVAL,
+        max_pending: int = API_USAGE_MAX_PENDING,
+        window: float = API_RATE_LIMIT_WINDOW,
+    ) -> None:
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.window = window
+        self._api_keys: dict[str, dict] | None = None
+        self._refreshed_at = 0.0
+        self._refresh_lock: asyncio.Lock | None = None
+        self._request_times: dict[str, deque[float]] = {}
+        # debits which haven't been written to the database yet, and the ones being written
+        self._pending_debits: dict[str, float] = {}
+        self._flushing_debits: dict[str, float] = {}
+        self._pending_logs: list[tuple] = []
+        self._flush_event: asyncio.Event | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._closing = False
+
+    def _start(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._refresh_lock = asyncio.Lock()
+            self._flush_event = asyncio.Event()
+            self._closing = False
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            # not the builtin TimeoutError on python 3.10, which validators run on
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            self._flush_event.clear()
+            try:
+                await self.flush()
+                if not self._closing and time.monotonic() - self._refreshed_at >= self.refresh_interval:
+                    await self.refresh()
+            except Exception as e:
+                bt.logging.error(f"Failed to sync api usage with the database: {e}")
+
+    def _get_debit(self, api_key: str) -> float:
+        return self._pending_debits.get(api_key, 0.0) + self._flushing_debits.get(api_key, 0.0)
+
+    async def refresh(self) -> None:
+        """Reloads the api keys from the database."""
+        rows = await self.db.read(sql.get_all_api_keys)
+        self._api_keys = {row[sql.KEY]: dict(row) for row in rows}
+        self._refreshed_at = time.monotonic()
+
+    async def get_api_key_info(self, api_key: str) -> dict | None:
+        """The info of the api key (as in `sql.get_api_key_info()`), with its balance net of any debits not yet written."""
+        self._start()
+        if self._api_keys is None:
+            async with self._refresh_lock:
+                if self._api_keys is None:
+                    await self.refresh()
+
+        info = self._api_keys.get(api_key)
+        if info is None:
+            return None
+        if info[sql.BALANCE] is None:
+            return info
+        return {**info, sql.BALANCE: info[sql.BALANCE] - self._get_debit(api_key)}
+
+    def rate_limit_exceeded(self, api_key_info: dict, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        request_times = self._request_times.get(api_key_info[sql.KEY])
+        if request_times is None:
+            return api_key_info[sql.RATE_LIMIT_PER_MINUTE] <= 0
+        while len(request_times) > 0 and request_times[0] <= now - self.window:
+            request_times.popleft()
+        return len(request_times) >= api_key_info[sql.RATE_LIMIT_PER_MINUTE]
+
+    def charge(self, api_key_info: dict, path: str, cost: float, now: float | None = None) -> None:
+        """Debits the cost of a request from the api key, and logs the request."""
+        api_key = api_key_info[sql.KEY]
+        self._request_times.setdefault(api_key, deque()).append(time.monotonic() if now is None else now)
+        self._pending_debits[api_key] = self._pending_debits.get(api_key, 0.0) + cost
+
+        info = self._api_keys.get(api_key) if self._api_keys is not None else None
+        balance = None
+        if info is not None and info[sql.BALANCE] is not None:
+            balance = info[sql.BALANCE] - self._get_debit(api_key)
+        self._pending_logs.append((api_key, path, cost, balance, datetime.now()))  # noqa: DTZ005
+
+        if len(self._pending_logs) >= self.max_pending and self._flush_event is not None:
+            self._flush_event.set()
+
+    async def flush(self) -> None:
+        """Writes the pending debits and request logs to the database."""
+        if len(self._pending_logs) == 0:
+            return
+
+        debits, logs = self._pending_debits, self._pending_logs
+        self._pending_debits, self._pending_logs = {}, []
+        self._flushing_debits = debits
+        try:
+            await self.db.write(sql.log_api_usage, debits, logs)
+        except Exception:
+            # try again with the next flush
+            for api_key, debit in debits.items():
+                self._pending_debits[api_key] = self._pending_debits.get(api_key, 0.0) + debit
+            self._pending_logs = logs + self._pending_logs
+            raise
+        else:
+            # keep the cached balances in line with the database
+            for api_key, debit in debits.items():
+                info = self._api_keys.get(api_key) if self._api_keys is not None else None
+                if info is not None and info[sql.BALANCE] is not None:
+                    info[sql.BALANCE] -= debit
+        finally:
+            self._flushing_debits = {}
+
+    async def close(self) -> None:
+        """Stops the background flushes, and writes whatever is still pending."""
+        if self._flush_task is not None:
+            # the background task makes one last flush before stopping
+            self._closing = True
+            self._flush_event.set()
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
@@ -1,3 +1,6 @@
+import bisect
+import math
+
 import bittensor as bt
 import gmpy2
 import numpy as np
@@ -14,35 +17,48 @@ from sturdy.pools import ChainBasedPoolModel
 from sturdy.protocol import AllocationsDict
 
 
-def calculate_cv_threshold(apys: list[gmpy2.mpz]) -> float:
+CV_THRESHOLD_PERCENTILES = np.arange(5, 100, 5)[::-1]
+
+
+def calculate_cv_threshold(apys: list[int]) -> float:
     """
     Calculate the coefficient of variation (CV) threshold for APYs.
     Filters out lower APYs dynamically by increasing percentile cutoff
     and returns the CV of the highest performing subset.
-    """
-    # Convert APY values to a NumPy array and clean up bad data
-    apy_array = np.nan_to_num(
-        np.array(apys, dtype=gmpy2.mpz),
-        nan=0.0,
-        posinf=0.0,
-        neginf=0.0,
-    )
-
-    # Dynamically estimate the threshold using high-percentile APYs
-    for percentile in np.arange(5, 100, 5)[::-1]:
-        threshold = np.percentile(apy_array, percentile)
-        high_apys = apy_array[apy_array > threshold]
 
-        if high_apys.size == 0:
+    The APYs are sorted once, and the subset above every percentile cutoff is a suffix of the sorted APYs - so all of the
+    cutoffs are found with a single `np.percentile()` call, and the sum and sum of squares of each subset are read off
+    cumulative sums. The sums are exact python ints, so the only rounding is in the final division and square root: the
+    returned CV is within a few ulps of the exact sample CV, however large the APYs are.
+    """
+    # bad data (i.e. nan) is treated as 0, like None APYs are
+    sorted_apys = sorted(int(apy) if np.isfinite(float(apy)) else 0 for apy in apys)
+    num_apys = len(sorted_apys)
+    if num_apys < 2:
+        return APY_BIN_THRESHOLD_FALLBACK
+
+    # suffix sums of the APYs and their squares, i.e. sums[i] == sum(sorted_apys[i:])
+    sums = [0] * (num_apys + 1)
+    squared_sums = [0] * (num_apys + 1)
+    for idx in range(num_apys - 1, -1, -1):
+        sums[idx] = sums[idx + 1] + sorted_apys[idx]
+        squared_sums[idx] = squared_sums[idx + 1] + sorted_apys[idx] * sorted_apys[idx]
+
+    # the (linearly interpolated) percentile lies between the APY at the "lower" percentile index and the next one, so the
+    # APYs above it are exactly the ones greater than the APY at the lower index
+    lower_idxs = np.percentile(np.arange(num_apys), CV_THRESHOLD_PERCENTILES, method="lower")
+    for lower_idx in lower_idxs:
+        start = bisect.bisect_right(sorted_apys, sorted_apys[lower_idx])
+        size = num_apys - start
+        if size < 2:
             continue
 
-        # manually calculate std to avoid numpy issues with gmpy2.mpz
-        std = (np.sum((high_apys - np.mean(high_apys)) ** 2) / (high_apys.size - 1)) ** 0.5
-        mean = np.mean(high_apys)
-
-        if mean > 0 and std > 0:
+        total = sums[start]
+        # n^2 * sample variance * (n - 1) / n, in exact integers
+        scaled_variance = size * squared_sums[start] - total * total
+        if total > 0 and scaled_variance > 0:
             # Calculate coefficient of variation as a dynamic threshold
-            return float(std / mean)
+            return math.sqrt(scaled_variance * size / ((size - 1) * total * total))
     return APY_BIN_THRESHOLD_FALLBACK
 
 
@@ -57,8 +73,8 @@ def create_apy_bins(apys: dict[str, int], threshold_func=calculate_cv_threshold)
     Returns:
         Dictionary mapping bin indices to lists of miner UIDs
     """
-    # convert apys to gmpy2.mpz for precision
-    apys = {uid: gmpy2.mpz(apy) if apy is not None else gmpy2.mpz(0) for uid, apy in apys.items()}
+    # python ints keep full precision, and their true division is correctly rounded
+    apys = {uid: int(apy) if apy is not None else 0 for uid, apy in apys.items()}
     # Sort APYs in descending order
     sorted_items = sorted(apys.items(), key=lambda x: x[1], reverse=True)
 
@@ -112,6 +128,12 @@ def sort_bins_by_processing_time(apy_bins: dict[int, list[str]], axon_times: dic
     return sorted_bins
 
 
+def distance_from_squared_diff_sum(squared_diff_sum: int, total_assets: int) -> float:
+    """Normalized Euclidean distance between two allocations, given the sum of their squared differences."""
+    total_assets_mpz = gmpy2.mpz(total_assets)
+    return float(gmpy2.sqrt(squared_diff_sum)) / float(total_assets_mpz * gmpy2.sqrt(2))
+
+
 def calculate_allocation_distance(alloc_a: np.ndarray, alloc_b: np.ndarray, total_assets: int) -> float:
     """Calculate normalized Euclidean distance between two allocations."""
     try:
@@ -120,23 +142,138 @@ def calculate_allocation_distance(alloc_a: np.ndarray, alloc_b: np.ndarray, tota
             diff = x - y
             squared_diff_sum += diff * diff
 
-        total_assets_mpz = gmpy2.mpz(total_assets)
-        return float(gmpy2.sqrt(squared_diff_sum)) / float(total_assets_mpz * gmpy2.sqrt(2))
+        return distance_from_squared_diff_sum(squared_diff_sum, total_assets)
     except Exception as e:
         bt.logging.error(f"Error calculating distance: {e}")
         return 1.0  # Return max distance on error
 
 
+def expand_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenates `range(start, start + length)` for each start and length."""
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def get_similar_allocation_pairs(
+    allocations: np.ndarray, total_assets: int, similarity_threshold: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the pairs of allocations which are within `similarity_threshold` of each other.
+
+    Rather than measuring the distance between every pair, allocations are sorted along the pool they differ the most in,
+    and only the ones close enough along it to possibly be similar are compared - two allocations can't be similar if
+    they differ by more than the threshold distance in any single pool. The distance of the remaining candidates is then
+    calculated exactly, the same way `calculate_allocation_distance()` does.
+
+    Args:
+        allocations: Dense miners x pools matrix of allocations, as python ints.
+        total_assets: The total assets of the request, which distances are normalized by.
+        similarity_threshold: Allocations closer than this distance are similar.
+
+    Returns:
+        The row indices (a, b) of each pair of similar allocations, with a < b.
+    """
+    num_allocs, num_pools = allocations.shape
+    no_pairs = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    if num_allocs < 2 or num_pools == 0 or total_assets <= 0:
+        return no_pairs
+
+    approx = allocations.astype(np.float64)
+    # the max. difference in any pool between similar allocations - with some room for the error in the float
+    # approximation of the allocations, so that no similar pair is missed
+    max_diff = similarity_threshold * total_assets * np.sqrt(2) * (1 + 1e-9) + 4 * np.finfo(np.float64).eps * np.max(
+        np.abs(approx)
+    )
+
+    pool = np.argmax(np.ptp(approx, axis=0))
+    order = np.argsort(approx[:, pool], kind="stable")
+    sorted_vals = approx[order, pool]
+    window_ends = np.searchsorted(sorted_vals, sorted_vals + max_diff, side="right")
+    lengths = window_ends - np.arange(num_allocs) - 1
+    left = np.repeat(np.arange(num_allocs), lengths)
+    right = expand_ranges(np.arange(1, num_allocs + 1), lengths)
+    a, b = order[left], order[right]
+
+    close = np.max(np.abs(approx[a] - approx[b]), axis=1) <= max_diff
+    a, b = a[close], b[close]
+    if len(a) == 0:
+        return no_pairs
+
+    diffs = allocations[a] - allocations[b]
+    squared_diff_sums = np.sum(diffs * diffs, axis=1)
+    distances = [distance_from_squared_diff_sum(squared_diff_sum, total_assets) for squared_diff_sum in squared_diff_sums]
+    similar = np.array(distances) < similarity_threshold
+    return np.minimum(a, b)[similar], np.maximum(a, b)[similar]
+
+
+def count_earlier_similar_allocations(
+    allocations: list[tuple[int, ...]], total_assets: int, similarity_threshold: float
+) -> np.ndarray:
+    """
+    Counts, for each allocation, how many of the allocations before it are similar to it.
+
+    Identical allocations (i.e. from copycat miners) are grouped together first, so that they're only compared once.
+
+    Args:
+        allocations: Allocations in the order they were received, as tuples of python ints.
+        total_assets: The total assets of the request, which distances are normalized by.
+        similarity_threshold: Allocations closer than this distance are similar.
+    """
+    num_allocs = len(allocations)
+    counts = np.zeros(num_allocs, dtype=np.int64)
+    if num_allocs < 2:
+        return counts
+
+    # group identical allocations
+    group_idxs: dict[tuple[int, ...], int] = {}
+    groups = np.array([group_idxs.setdefault(alloc, len(group_idxs)) for alloc in allocations], dtype=np.int64)
+    num_groups = len(group_idxs)
+    # the positions of the members of each group - in order within each group
+    members = np.argsort(groups, kind="stable")
+    sizes = np.bincount(groups, minlength=num_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    try:
+        identical_similar = total_assets > 0 and distance_from_squared_diff_sum(0, total_assets) < similarity_threshold
+    except Exception:
+        identical_similar = False
+    if identical_similar:
+        counts[members] = np.arange(num_allocs) - np.repeat(starts, sizes)
+
+    unique_allocations = np.array(list(group_idxs), dtype=object).reshape(num_groups, -1)
+    group_a, group_b = get_similar_allocation_pairs(unique_allocations, total_assets, similarity_threshold)
+    if len(group_a) == 0:
+        return counts
+
+    # members sorted by (group, position) - used to count the members of a group which came before a given position
+    member_keys = groups[members] * (num_allocs + 1) + members
+    for group, other_group in ((group_a, group_b), (group_b, group_a)):
+        group_sizes = sizes[group]
+        positions = members[expand_ranges(starts[group], group_sizes)]
+        partners = np.repeat(other_group, group_sizes)
+        earlier = np.searchsorted(member_keys, partners * (num_allocs + 1) + positions) - starts[partners]
+        np.add.at(counts, positions, earlier)
+
+    return counts
+
+
+def get_uid_index(miner_uids: list[str]) -> dict[str, int]:
+    """Maps each miner uid to its row in the reward arrays."""
+    return {uid: idx for idx, uid in enumerate(miner_uids)}
+
+
+def get_bin_rows(bins: dict[int, list[str]], uid_index: dict[str, int]) -> dict[int, np.ndarray]:
+    """Gets the rows in the reward arrays of the miners in each bin."""
+    return {bin_idx: np.array([uid_index[uid] for uid in bin_miners], dtype=np.int64) for bin_idx, bin_miners in bins.items()}
+
+
 def calculate_base_rewards(bins: dict[int, list[str]], miner_uids: list[str]) -> np.ndarray:
     """Calculate base rewards for each miner based on their bin."""
     base_rewards = np.zeros(len(miner_uids))
 
-    for bin_idx, bin_miners in bins.items():
+    for bin_idx, rows in get_bin_rows(bins, get_uid_index(miner_uids)).items():
         # Higher bins get better base rewards
-        base_reward = max(0.0, 1.0 - (bin_idx * 0.1))
-        for uid in bin_miners:
-            idx = miner_uids.index(uid)  # Get index directly from list
-            base_rewards[idx] = base_reward
+        base_rewards[rows] = max(0.0, 1.0 - (bin_idx * 0.1))
 
     return base_rewards
 
@@ -197,37 +334,26 @@ def apply_similarity_penalties(
     Penalty increases with each similar allocation found from earlier miners.
     """
     penalties = np.zeros(len(miner_uids))
-    uid_to_idx = {uid: idx for idx, uid in enumerate(miner_uids)}
+    uid_to_idx = get_uid_index(miner_uids)
 
     total_assets = assets_and_pools["total_assets"]
     allocs = format_allocations(apys_and_allocations, assets_and_pools)
+    # normalize allocations to python ints once - truncated the same way gmpy2.mpz() truncates floats
+    dense_allocs = {
+        uid: tuple(int(gmpy2.mpz(val)) for val in miner_data["allocations"].values()) for uid, miner_data in allocs.items()
+    }
 
     for bin_miners in bins.values():
         # Sort miners by axon time within each bin
         sorted_miners = sorted(bin_miners, key=lambda uid: axon_times[uid])
 
-        for i, uid_a in enumerate(sorted_miners):
-            if not allocs[uid_a] or allocs[uid_a].get("allocations") is None:
-                continue
-
-            alloc_a = np.array([gmpy2.mpz(val) for val in allocs[uid_a]["allocations"].values()], dtype=object)
-            similar_count = 0
-            max_possible_similarities = i  # Maximum number of possible similar earlier miners
-
-            # Compare with miners that responded earlier
-            for uid_b in sorted_miners[:i]:
-                if not allocs[uid_b] or allocs[uid_b].get("allocations") is None:
-                    continue
-
-                alloc_b = np.array([gmpy2.mpz(val) for val in allocs[uid_b]["allocations"].values()], dtype=object)
-                distance = calculate_allocation_distance(alloc_a, alloc_b, total_assets)
-
-                if distance < similarity_threshold:
-                    similar_count += 1
+        similar_counts = count_earlier_similar_allocations(
+            [dense_allocs[uid] for uid in sorted_miners], total_assets, similarity_threshold
+        )
 
-            # Calculate penalty based on proportion of similar allocations found
-            if max_possible_similarities > 0:
-                penalties[uid_to_idx[uid_a]] = similar_count / max_possible_similarities
+        # Calculate penalty based on proportion of similar allocations found among the miners that responded earlier
+        for i, uid in enumerate(sorted_miners[1:], start=1):
+            penalties[uid_to_idx[uid]] = similar_counts[i] / i
 
     return penalties
 
@@ -301,6 +427,7 @@ def normalize_bin_rewards(
     rewards_before = rewards_before_penalties.copy()
     rewards = rewards_after_penalties.copy()
 
+    bin_rows = get_bin_rows(bins, get_uid_index(miner_uids))
     bin_idxs = sorted(bins.keys(), reverse=True)
 
     # set prev_max_score to the min score in the last bin
@@ -308,9 +435,8 @@ def normalize_bin_rewards(
 
     # Iterate through bins in reverse order (from lowest APY to highest)
     for bin_idx in bin_idxs:
-        bin_miners = bins[bin_idx]
         # Get indices of miners in current bin
-        bin_indices = [miner_uids.index(uid) for uid in bin_miners]
+        bin_indices = bin_rows[bin_idx]
 
         # Get max score in current bin before penalties
         max_score_bin = np.max(rewards_before[bin_indices])
@@ -350,7 +476,8 @@ def calculate_bin_rewards(
 
     # Apply performance bonus to the TOP_PERFORMERS_COUNT fastest miners in bin 0
     top_miner_uids = bins[0][:TOP_PERFORMERS_COUNT]  # fastest miner is first
-    top_miner_indices = [miner_uids.index(uid) for uid in top_miner_uids if uid in miner_uids]
+    uid_index = get_uid_index(miner_uids)
+    top_miner_indices = [uid_index[uid] for uid in top_miner_uids if uid in uid_index]
     post_penalty_rewards = apply_top_performer_bonus(post_penalty_rewards, top_miner_indices)
 
     # Normalize rewards within each bin
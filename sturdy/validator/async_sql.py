@@ -0,0 +1,247 @@
+import asyncio
+import concurrent.futures
+import functools
+import sqlite3
+import threading
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+import bittensor as bt
+
+from sturdy.constants import (
+    ALLOCATION_RETENTION_DAYS,
+    DB_ARCHIVE_BATCH_SIZE,
+    DB_ARCHIVE_DIR,
+    DB_DIR,
+    DB_MAX_IDLE_READERS,
+    DB_MAX_WRITE_BATCH,
+    LOG_RETENTION_DAYS,
+)
+from sturdy.protocol import REQUEST_TYPES, AllocInfo, ChainBasedPoolModel
+from sturdy.validator import sql
+
+T = TypeVar("T")
+
+
+class BatchConnection:
+    """
+    Stand-in for the writer connection which is handed to each write of a batch - the batch is committed as a whole once
+    all of its writes have run, so the commits of the individual writes are skipped.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def commit(self) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class AsyncDatabase:
+    """
+    Runs the queries of `sql` off of the event loop, so that slow disk I/O doesn't stall miner queries or API requests.
+
+    Reads run on a small pool of threads, each using a read-only connection. Writes are queued, and a single writer task
+    runs everything which has queued up since its last commit in one transaction on a dedicated thread - so a burst of
+    writes shares a single commit (and fsync) instead of paying for one each. Each write is wrapped in a savepoint, so one
+    which fails is rolled back on its own, and raises to its caller, without affecting the rest of its batch.
+
+    Writes must not use `executescript()`, which commits on its own.
+    """
+
+    def __init__(
+        self,
+        db_dir: str = DB_DIR,
+        uri: bool = False,
+        read_threads: int = DB_MAX_IDLE_READERS,
+        max_write_batch: int = DB_MAX_WRITE_BATCH,
+    ) -> None:
+        self.db_dir = db_dir
+        self.uri = uri
+        self.read_threads = read_threads
+        self.max_write_batch = max_write_batch
+        self.writes = 0
+        self.commits = 0
+        self._read_executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._write_executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._write_queue: asyncio.Queue | None = None
+        self._writer_task: asyncio.Task | None = None
+
+    def _get_read_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._read_executor is None:
+            self._read_executor = concurrent.futures.ThreadPoolExecutor(self.read_threads, thread_name_prefix="db-reader")
+        return self._read_executor
+
+    def _start_writer(self) -> asyncio.Queue:
+        if self._writer_task is None or self._writer_task.done():
+            if self._write_executor is None:
+                self._write_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._process_writes(self._write_queue))
+        return self._write_queue
+
+    def _run_read(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with sql.get_db_connection(self.db_dir, uri=self.uri, readonly=True) as conn:
+            return func(conn, *args, **kwargs)
+
+    def _run_write_batch(self, jobs: list[tuple[Callable, tuple, dict]]) -> list[tuple[bool, Any]]:
+        results = []
+        with sql.get_db_connection(self.db_dir, uri=self.uri) as conn:
+            conn.execute("BEGIN")
+            batch_conn = BatchConnection(conn)
+            for func, args, kwargs in jobs:
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = func(batch_conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append((False, e))
+                    continue
+                conn.execute("RELEASE write")
+                results.append((True, result))
+            conn.commit()
+        return results
+
+    async def _process_writes(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_write_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            stop = batch[-1] is None
+            jobs = [job for job in batch if job is not None]
+            if len(jobs) > 0:
+                try:
+                    results = await loop.run_in_executor(
+                        self._write_executor, self._run_write_batch, [job[:3] for job in jobs]
+                    )
+                except Exception as e:
+                    bt.logging.error(f"Failed to commit {len(jobs)} database writes: {e}")
+                    results = [(False, e)] * len(jobs)
+                else:
+                    self.writes += len(jobs)
+                    self.commits += 1
+
+                for (*_, future), (success, result) in zip(jobs, results, strict=True):
+                    if future.done():
+                        continue
+                    if success:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(result)
+            if stop:
+                return
+
+    async def read(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs `func(conn, *args, **kwargs)` with a read-only connection, on a reader thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_read_executor(), functools.partial(self._run_read, func, *args, **kwargs))
+
+    async def write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs `func(conn, *args, **kwargs)` with the writer connection, as part of the next batch of writes."""
+        queue = self._start_writer()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((func, args, kwargs, future))
+        return await future
+
+    async def close(self) -> None:
+        """Waits for the queued writes to be committed, and stops the reader and writer threads."""
+        if self._writer_task is not None and not self._writer_task.done():
+            self._write_queue.put_nowait(None)
+            await self._writer_task
+        self._writer_task = None
+        self._write_queue = None
+        for executor in (self._read_executor, self._write_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._read_executor = None
+        self._write_executor = None
+
+    async def get_miner_responses(
+        self,
+        request_uid: str | None = None,
+        miner_uid: str | None = None,
+        from_ts: int | None = None,
+        to_ts: int | None = None,
+    ) -> list[dict]:
+        return await self.read(sql.get_miner_responses, request_uid, miner_uid, from_ts, to_ts)
+
+    async def get_request_info(
+        self,
+        request_uid: str | None = None,
+        from_ts: int | None = None,
+        to_ts: int | None = None,
+    ) -> list[dict]:
+        return await self.read(sql.get_request_info, request_uid, from_ts, to_ts)
+
+    async def get_active_allocs(self) -> list:
+        return await self.read(sql.get_active_allocs)
+
+    async def get_api_key_info(self, api_key: str) -> dict | None:
+        return await self.read(sql.get_api_key_info, api_key)
+
+    async def log_allocations(
+        self,
+        request_uid: str,
+        miners: list[str],
+        assets_and_pools: dict[str, dict[str, ChainBasedPoolModel] | int],
+        extra_metadata: dict,
+        allocations: dict[str, AllocInfo],
+        axon_times: dict[str, float],
+        request_type: REQUEST_TYPES,
+        scoring_period: int | None = None,
+    ) -> None:
+        await self.write(
+            sql.log_allocations,
+            request_uid,
+            miners,
+            assets_and_pools,
+            extra_metadata,
+            allocations,
+            axon_times,
+            request_type,
+            scoring_period,
+        )
+
+    async def delete_stale_active_allocs(self) -> int:
+        return await self.write(sql.delete_stale_active_allocs)
+
+    async def delete_active_allocs(self, uids_to_delete: list[str]) -> int:
+        return await self.write(sql.delete_active_allocs, uids_to_delete)
+
+    async def rollup_logs(self, retention_days: int = LOG_RETENTION_DAYS) -> int:
+        return await self.write(sql.rollup_logs, retention_days)
+
+    async def archive_allocations(
+        self,
+        archive_dir: str = DB_ARCHIVE_DIR,
+        retention_days: int = ALLOCATION_RETENTION_DAYS,
+        limit: int = DB_ARCHIVE_BATCH_SIZE,
+    ) -> int:
+        return await self.write(sql.archive_allocations, archive_dir, retention_days, limit)
+
+
+ASYNC_DATABASES: dict[tuple[str, bool], AsyncDatabase] = {}
+ASYNC_DATABASES_LOCK = threading.Lock()
+
+
+def get_async_db(db_dir: str = DB_DIR, uri: bool = False) -> AsyncDatabase:
+    with ASYNC_DATABASES_LOCK:
+        db = ASYNC_DATABASES.get((db_dir, uri))
+        if db is None:
+            db = AsyncDatabase(db_dir, uri=uri)
+            ASYNC_DATABASES[(db_dir, uri)] = db
+        return db
+
+
+async def close_async_dbs() -> None:
+    """Commits the queued writes of every database, and stops their threads."""
+    with ASYNC_DATABASES_LOCK:
+        dbs = list(ASYNC_DATABASES.values())
+        ASYNC_DATABASES.clear()
+    for db in dbs:
+        await db.close()
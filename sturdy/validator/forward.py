@@ -25,6 +25,7 @@ import bittensor as bt
 import numpy as np
 from web3 import AsyncWeb3, Web3
 from web3.constants import ADDRESS_ZERO
+from web3.types import BlockIdentifier
 
 from sturdy.constants import (
     LP_QUERY_TIMEOUT,
@@ -33,20 +34,30 @@ from sturdy.constants import (
     MIN_TOTAL_ASSETS_AMOUNT,
     MINER_GROUP_EMISSIONS,
     MINER_GROUP_THRESHOLDS,
+    POOL_SYNC_CONCURRENCY,
+    QUERY_DEADLINE_BUFFER,
     SCORING_PERIOD_STEP,
 )
-from sturdy.pools import POOL_TYPES, BittensorAlphaTokenPool, ChainBasedPoolModel, generate_challenge_data
+from sturdy.pools import (
+    POOL_TYPES,
+    BittensorAlphaTokenPool,
+    ChainBasedPoolModel,
+    generate_challenge_data,
+    get_snapshot_blocks,
+    sync_pools,
+)
 from sturdy.protocol import MINER_TYPE, REQUEST_TYPES, AllocateAssets, AllocInfo, UniswapV3PoolLiquidity
 from sturdy.providers import POOL_DATA_PROVIDER_TYPE
+from sturdy.utils.rpc_scheduler import RPC_SCHEDULERS
+from sturdy.validator.async_sql import get_async_db
 from sturdy.validator.request import Request
-from sturdy.validator.reward import filter_allocations, get_rewards_allocs, get_rewards_uniswap_v3_lp
-from sturdy.validator.sql import (
-    delete_active_allocs,
-    delete_stale_active_allocs,
-    get_active_allocs,
-    get_db_connection,
-    get_request_info,
-    log_allocations,
+from sturdy.validator.reward import (
+    filter_allocations,
+    get_pool_key,
+    get_request_pools,
+    get_rewards_allocs,
+    get_rewards_uniswap_v3_lp,
+    sync_scoring_pools,
 )
 from sturdy.validator.utils.axon import query_single_axon
 
@@ -68,16 +79,22 @@ async def forward(self) -> Any:
 
     """
 
+    # every read of the forward step (generating the challenge, syncing its pools and scoring earlier challenges) is made
+    # at the same block of each provider
+    blocks = await get_snapshot_blocks(self.pool_data_providers)
+
     while True:
         # delete stale active allocations after expiry time
         bt.logging.debug("Purging stale active allocation requests")
-        with get_db_connection(self.config.db_dir) as conn:
-            rows_affected = delete_stale_active_allocs(conn)
+        rows_affected = await get_async_db(self.config.db_dir).delete_stale_active_allocs()
         bt.logging.debug(f"Purged {rows_affected} stale active allocation requests")
 
-        chain_data_provider = np.random.choice(list(self.pool_data_providers.values()))
+        provider_types = list(self.pool_data_providers.keys())
+        provider_type = provider_types[np.random.randint(len(provider_types))]
+        chain_data_provider = self.pool_data_providers[provider_type]
         try:
-            challenge_data = await generate_challenge_data(chain_data_provider)
+            challenge_data = await generate_challenge_data(chain_data_provider, block=blocks.get(provider_type))
+            blocks[provider_type] = challenge_data["block"]
         except Exception as e:
             bt.logging.exception(f"Failed to generate challenge data: {e}")
             continue
@@ -103,6 +120,7 @@ async def forward(self) -> Any:
         chain_data_provider=chain_data_provider,
         request_type=REQUEST_TYPES.SYNTHETIC,
         user_address=user_address if user_address is not None else ADDRESS_ZERO,
+        block_identifier=blocks,
     )
 
     if not allocations:
@@ -111,32 +129,46 @@ async def forward(self) -> Any:
 
     assets_and_pools = challenge_data["assets_and_pools"]
     pools = assets_and_pools["pools"]
-    metadata = await get_metadata(pools, chain_data_provider)
+    metadata = await get_metadata(
+        pools,
+        chain_data_provider,
+        concurrency=self.config.validator.pool_sync_concurrency,
+        block_identifier=challenge_data["block"],
+    )
 
     scoring_period = get_scoring_period()
 
-    with get_db_connection(self.config.db_dir) as conn:
-        log_allocations(
-            conn,
-            request_uuid,
-            self.metagraph.hotkeys,
-            assets_and_pools,
-            metadata,
-            allocations,
-            axon_times,
-            REQUEST_TYPES.SYNTHETIC,
-            scoring_period,
-        )
+    await get_async_db(self.config.db_dir).log_allocations(
+        request_uuid,
+        self.metagraph.hotkeys,
+        assets_and_pools,
+        metadata,
+        allocations,
+        axon_times,
+        REQUEST_TYPES.SYNTHETIC,
+        scoring_period,
+    )
+
+    for provider_type, provider in self.pool_data_providers.items():
+        if provider in RPC_SCHEDULERS:
+            bt.logging.debug(f"RPC scheduler stats for {provider_type}: {RPC_SCHEDULERS[provider].stats}")
 
 
 # TODO: have a better way to determine how to obtain metadata from the inputted pools
 # for more info see TODO(provider)
 async def get_metadata(
-    pools: dict[str, ChainBasedPoolModel | BittensorAlphaTokenPool], chain_data_provider: AsyncWeb3 | bt.AsyncSubtensor
+    pools: dict[str, ChainBasedPoolModel | BittensorAlphaTokenPool],
+    chain_data_provider: AsyncWeb3 | bt.AsyncSubtensor,
+    concurrency: int = POOL_SYNC_CONCURRENCY,
+    block_identifier: BlockIdentifier | None = None,
 ) -> dict:
     metadata = {}
+    for err in await sync_pools(
+        pools.values(), chain_data_provider, concurrency=concurrency, block_identifier=block_identifier
+    ):
+        if err is not None:
+            raise err
     for pool_key, pool in pools.items():
-        await pool.sync(chain_data_provider)
         if isinstance(chain_data_provider, AsyncWeb3):
             match pool.pool_type:
                 case T if T in (POOL_TYPES.STURDY_SILO, POOL_TYPES.MORPHO, POOL_TYPES.YEARN_V3):
@@ -146,8 +178,8 @@ async def get_metadata(
                 case _:
                     pass
         else:
-            # get current bittensor block
-            block = await chain_data_provider.block
+            # get the bittensor block the pools were synced at
+            block = block_identifier if isinstance(block_identifier, int) else await chain_data_provider.block
             price_rao = pool._price_rao
             meta = {"block": block, "price_rao": price_rao}
             metadata[pool_key] = meta
@@ -172,35 +204,50 @@ async def query_multiple_miners(
     self,
     synapse: bt.Synapse,
     uids: list[str],
+    max_concurrent_queries: int | None = None,
 ) -> list[bt.Synapse]:
-    responses = []
-    for uid in uids:
+    """
+    Query multiple miners concurrently, with at most `max_concurrent_queries` requests in flight at once.
+
+    Each miner is given a hard deadline of `neuron.timeout + QUERY_DEADLINE_BUFFER` seconds. Miners which miss it are
+    treated as having timed out. Responses are returned in the same order as `uids`.
+    """
+    if max_concurrent_queries is None:
+        max_concurrent_queries = self.config.validator.max_concurrent_queries
+    semaphore = asyncio.Semaphore(max(1, max_concurrent_queries))
+    query_timeout = self.config.neuron.timeout
+    deadline = query_timeout + QUERY_DEADLINE_BUFFER
+
+    async def query_miner(uid: str) -> bt.Synapse | None:
         request = prepare_single_request(self, int(uid), synapse.model_copy())
-        if request:
+        if not request:
+            bt.logging.error(f"query_multiple_miners::Error preparing request for UID {uid}")
+            return None
+
+        async with semaphore:
             try:
-                task = asyncio.create_task(process_single_request(self, request))
-                await task
-                request.synapse.dendrite.process_time = request.response_time
-                responses.append(request.synapse)
+                await asyncio.wait_for(process_single_request(self, request), timeout=deadline)
+            except asyncio.TimeoutError:  # noqa: UP041 - validators run on python 3.10
+                bt.logging.warning(f"query_multiple_miners::UID {uid} missed its {deadline}s deadline")
+                request.response_time = query_timeout
             except Exception as e:
                 bt.logging.error(f"query_multiple_miners::Error in task for UID {uid}: {e}")
-                responses.append(None)
-        else:
-            bt.logging.error(f"query_multiple_miners::Error preparing request for UID {uid}")
-            responses.append(None)
-    return responses
+                return None
+
+        request.synapse.dendrite.process_time = request.response_time
+        return request.synapse
+
+    return await asyncio.gather(*(query_miner(uid) for uid in uids))
 
 
 async def process_single_request(self, request: Request) -> Request:
     """
     Process a single request and return the response.
+
+    The dendrite call is natively async, so it is awaited directly on the event loop.
     """
     try:
-        response = await asyncio.get_event_loop().run_in_executor(
-            self.thread_pool,
-            lambda: query_single_axon(self.dendrite, request, query_timeout=self.config.neuron.timeout),
-        )
-        response = await response
+        await query_single_axon(self.dendrite, request, query_timeout=self.config.neuron.timeout)
     except Exception as e:
         bt.logging.error(f"Error processing request for UID {request.uid}: {e}")
     return request
@@ -250,7 +297,14 @@ async def query_and_score_miners_allocs(
     chain_data_provider: Web3 | bt.AsyncSubtensor,  # TODO: we shouldn't need this here - use self.pool_data_providers
     request_type: REQUEST_TYPES = REQUEST_TYPES.SYNTHETIC,
     user_address: str = ADDRESS_ZERO,
+    block_identifier: BlockIdentifier | dict[str, BlockIdentifier] | None = None,
 ) -> tuple[list, dict[str, AllocInfo]]:
+    """
+    Queries the miners for their allocations of `assets_and_pools`, and scores the earlier allocations which are due.
+
+    The pools are read at `block_identifier` - the block, or blocks keyed by pool data provider type (see
+    `get_snapshot_blocks()`), of the forward step. They're read at the latest block of each provider otherwise.
+    """
     # The dendrite client queries the network.
     # TODO: write custom availability function later down the road
     uids_to_query = [uid for uid, t in self.miner_types.items() if t == MINER_TYPE.ALLOC]
@@ -291,47 +345,73 @@ async def query_and_score_miners_allocs(
     bt.logging.info(f"Received allocations (uid -> allocations): {allocations}")
 
     curr_pools = assets_and_pools["pools"]
-    for pool in curr_pools.values():
-        await pool.sync(chain_data_provider)
+    for err in await sync_pools(
+        curr_pools.values(),
+        chain_data_provider,
+        concurrency=self.config.validator.pool_sync_concurrency,
+        block_identifier=block_identifier,
+    ):
+        if err is not None:
+            raise err
 
     # score previously suggested miner allocations based on how well they are performing now
 
     # get all the request ids for the pools we should be scoring from the db
-    active_alloc_rows = []
-    with get_db_connection(self.config.db_dir) as conn:
-        active_alloc_rows = get_active_allocs(conn)
+    db = get_async_db(self.config.db_dir)
+    active_alloc_rows = await db.get_active_allocs()
 
     bt.logging.debug(f"Active allocs: {active_alloc_rows}")
 
+    # active allocations often cover the same set of pools - sync each distinct pool once, and score all of them against
+    # the same snapshot
+    request_uids = [active_alloc["request_uid"] for active_alloc in active_alloc_rows]
+    requests_info = await asyncio.gather(*(db.get_request_info(request_uid=request_uid) for request_uid in request_uids))
+    requests_pools = {}
+    for request_uid, request_info in zip(request_uids, requests_info, strict=True):
+        try:
+            requests_pools[request_uid] = json.loads(request_info[0]["assets_and_pools"])["pools"]
+        except Exception as e:
+            bt.logging.error(f"Failed to load the pools of request {request_uid}: {e}")
+    pool_sets = {frozenset(get_pool_key(pool) for pool in pools.values()) for pools in requests_pools.values()}
+    bt.logging.debug(f"Scoring {len(requests_pools)} active allocation requests across {len(pool_sets)} pool sets")
+    synced_pools = await sync_scoring_pools(self, requests_pools.values(), block_identifier=block_identifier)
+
     uids_to_delete = []
     for active_alloc in active_alloc_rows:
         request_uid = active_alloc["request_uid"]
-        with get_db_connection(self.config.db_dir) as conn:
+        # requests whose pools couldn't be loaded are left to get_rewards_allocs() to fail on, and are removed
+        data_provider = None
+        if request_uid in requests_pools:
             # NOTE: see TODO(provider)
-            request_info = get_request_info(conn, request_uid=request_uid)
-            data_pools = json.loads(request_info[0]["assets_and_pools"])["pools"]
-            first_entry = next(iter(data_pools.values()))
+            first_entry = next(iter(requests_pools[request_uid].values()))
             data_provider = self.pool_data_providers[first_entry["pool_data_provider_type"]]
             bt.logging.debug(f"Pool data provider to use for scoring this pool: {data_provider}")
 
-        uids_to_delete.append(request_uid)
+            # keep requests whose pools failed to sync in the db - they're scored on the next pass instead
+            if get_request_pools(requests_pools[request_uid], synced_pools) is None:
+                bt.logging.warning(f"Failed to sync pools of request {request_uid} - retrying it on the next scoring pass")
+                continue
+
         # calculate rewards for previous active allocations
-        miner_uids, rewards, should_update_scores = await get_rewards_allocs(self, active_alloc, data_provider)
+        miner_uids, rewards, should_update_scores = await get_rewards_allocs(
+            self, active_alloc, data_provider, synced_pools=synced_pools
+        )
+        uids_to_delete.append(request_uid)
         bt.logging.debug(f"sim penalities: {self.similarity_penalties}")
 
         # TODO: there may be a better way to go about this
         if len(miner_uids) < 1:
-            break
+            continue
 
         # update the moving average scores of the miners
         int_miner_uids = [int(uid) for uid in miner_uids]
         if should_update_scores:
             # Apply penalties to the lowest performing miners
             # note that "rewards" is a numpy array of floats
-            sorted_rewards = sorted(zip(int_miner_uids, rewards, strict=False), key=lambda x: x[1], reverse=True)
-            if len(sorted_rewards) > MINER_GROUP_THRESHOLDS["ALLOC"]:
-                for uid, _ in sorted_rewards[MINER_GROUP_THRESHOLDS["ALLOC"] :]:
-                    rewards[int_miner_uids.index(uid)] = 0.0
+            if len(rewards) > MINER_GROUP_THRESHOLDS["ALLOC"]:
+                # rows from best to worst reward - ties keep their original order
+                ranked_rows = np.argsort(-rewards, kind="stable")
+                rewards[ranked_rows[MINER_GROUP_THRESHOLDS["ALLOC"] :]] = 0.0
             # scale emissions by the miner group emissions
             rewards *= MINER_GROUP_EMISSIONS["ALLOC"]
             bt.logging.debug(f"miner rewards: {rewards}")
@@ -339,9 +419,8 @@ async def query_and_score_miners_allocs(
 
     # wipe these allocations from the db after scoring them
     if len(uids_to_delete) > 0:
-        with get_db_connection(self.config.db_dir) as conn:
-            rows_affected = delete_active_allocs(conn, uids_to_delete)
-            bt.logging.debug(f"Scored and removed {rows_affected} active allocation requests")
+        rows_affected = await db.delete_active_allocs(uids_to_delete)
+        bt.logging.debug(f"Scored and removed {rows_affected} active allocation requests")
 
     # before logging latest allocations
     # filter them
@@ -502,8 +581,11 @@ async def query_top_n_miners(
 
     chain_data_provider = self.pool_data_providers[first_pool.pool_data_provider_type]
     curr_pools = assets_and_pools["pools"]
-    for pool in curr_pools.values():
-        await pool.sync(chain_data_provider)
+    for err in await sync_pools(
+        curr_pools.values(), chain_data_provider, concurrency=self.config.validator.pool_sync_concurrency
+    ):
+        if err is not None:
+            raise err
 
     # filter the allocations
     axon_times, filtered_allocs, _ = filter_allocations(
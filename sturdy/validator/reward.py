@@ -16,7 +16,9 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import asyncio
 import json
+from collections.abc import Iterable
 from typing import cast
 
 import bittensor as bt
@@ -26,16 +28,25 @@ from bittensor import Balance
 from eth_account.messages import encode_defunct
 from hexbytes import HexBytes
 from web3 import AsyncWeb3, EthereumTesterProvider, Web3
+from web3.types import BlockIdentifier
 
 from sturdy.constants import ALLOC_QUERY_TIMEOUT, LP_MINER_WHITELIST
-from sturdy.pools import POOL_TYPES, ChainBasedPoolModel, PoolFactory, check_allocations
+from sturdy.pools import (
+    POOL_TYPES,
+    BittensorAlphaTokenPool,
+    ChainBasedPoolModel,
+    PoolFactory,
+    check_allocations,
+    sync_pools,
+)
 from sturdy.protocol import AllocationsDict, AllocInfo, UniswapV3PoolLiquidity
-from sturdy.utils.bt_alpha import fetch_dynamic_info, get_vali_avg_apy
+from sturdy.utils.bt_alpha import ValiEpochStore, fetch_dynamic_info, get_vali_avg_apy, prefetch_vali_epoch_data
 from sturdy.utils.ethmath import wei_div
 from sturdy.utils.misc import get_scoring_period_length
 from sturdy.utils.taofi_subgraph import PositionFees, calculate_fee_growth
 from sturdy.validator.apy_binning import calculate_bin_rewards, create_apy_bins, sort_bins_by_processing_time
-from sturdy.validator.sql import get_db_connection, get_miner_responses, get_request_info
+from sturdy.validator.async_sql import get_async_db
+from sturdy.validator.yields import alpha_slippage_losses, annualized_share_price_yields_pct
 
 # a day in blocktime
 BLOCK_ONE_DAY_AGO = 7200  # 2 hours in blocks, assuming 1 block per second
@@ -113,9 +124,15 @@ async def annualized_yield_pct(
     seconds_passed: int,
     extra_metadata: dict,
     pool_data_provider: bt.AsyncSubtensor | None = None,
+    alpha_losses: dict[str, int] | None = None,
+    vali_epoch_store: ValiEpochStore | None = None,
 ) -> int:
     """
     Calculates annualized yields of allocations in pools within scoring period
+
+    The alpha lost to slippage in alpha token pools can be given by `alpha_losses` (see `get_alpha_slippage_losses()`) -
+    it's simulated with the pool's dynamic info otherwise. The apys of the validators alpha is delegated to are
+    calculated from the samples in `vali_epoch_store` (see `ValiEpochStore`).
     """
 
     if seconds_passed < 1:
@@ -173,25 +190,27 @@ async def annualized_yield_pct(
                         last_block = metadata["block"]
                         last_price = metadata["price_rao"]
 
-                        dynamic_info: bt.DynamicInfo = await fetch_dynamic_info(
-                            sub=pool_data_provider, block=last_block, netuid=pool.netuid
-                        )
                         delta = initial_alloc - pool.current_amount
 
                         # alpha delta (in tao)
                         alpha_delta_tao = delta / (last_price + 1)
 
                         # consider slippage
-                        alpha_lost = 0
-                        if delta > 0:
-                            _, alpha_lost_bal = dynamic_info.tao_to_alpha_with_slippage(Balance.from_rao(delta))
-                            alpha_lost = alpha_lost_bal.rao
-                        elif delta < 0:
-                            alpha_num = int(abs(delta) / dynamic_info.price)
-                            _, tao_lost_bal = dynamic_info.alpha_to_tao_with_slippage(
-                                Balance.from_rao(alpha_num, netuid=pool.netuid)
+                        alpha_lost = alpha_losses.get(key) if alpha_losses is not None else None
+                        if alpha_lost is None:
+                            dynamic_info: bt.DynamicInfo = await fetch_dynamic_info(
+                                sub=pool_data_provider, block=last_block, netuid=pool.netuid
                             )
-                            alpha_lost = int(tao_lost_bal.rao / (last_price / 1e9))
+                            alpha_lost = 0
+                            if delta > 0:
+                                _, alpha_lost_bal = dynamic_info.tao_to_alpha_with_slippage(Balance.from_rao(delta))
+                                alpha_lost = alpha_lost_bal.rao
+                            elif delta < 0:
+                                alpha_num = int(abs(delta) / dynamic_info.price)
+                                _, tao_lost_bal = dynamic_info.alpha_to_tao_with_slippage(
+                                    Balance.from_rao(alpha_num, netuid=pool.netuid)
+                                )
+                                alpha_lost = int(tao_lost_bal.rao / (last_price / 1e9))
 
                         curr_price = pool._price_rao
                         annualized_alpha_apy = await get_vali_avg_apy(
@@ -201,6 +220,7 @@ async def annualized_yield_pct(
                             block=last_block,
                             end_block=current_block,
                             delta_alpha_tao=alpha_delta_tao,
+                            store=vali_epoch_store,
                         )
 
                         initial_amount_raw = int(initial_alloc / (last_price / 1e9) - alpha_lost)
@@ -238,6 +258,49 @@ async def annualized_yield_pct(
     return wei_div(total_yield, initial_balance)
 
 
+async def get_alpha_slippage_losses(
+    subtensor: bt.AsyncSubtensor,
+    miners_allocations: list[dict],
+    pools: dict[str, ChainBasedPoolModel | BittensorAlphaTokenPool],
+    extra_metadata: dict,
+) -> list[dict[str, int]]:
+    """
+    The alpha each miner loses to slippage in each alpha token pool (see `alpha_slippage_losses()`), simulated for all the
+    miners at once from the dynamic info of the pools at the block of the request.
+    """
+    alpha_pools = {key: pool for key, pool in pools.items() if pool.pool_type == POOL_TYPES.BT_ALPHA}
+    infos = await asyncio.gather(
+        *(
+            fetch_dynamic_info(sub=subtensor, block=extra_metadata[key]["block"], netuid=pool.netuid)
+            for key, pool in alpha_pools.items()
+        )
+    )
+    dynamic_infos = {key: info for key, info in zip(alpha_pools, infos, strict=True) if info is not None}
+    return alpha_slippage_losses(miners_allocations, alpha_pools, extra_metadata, dynamic_infos)
+
+
+def get_bt_alpha_reads(
+    miners_allocations: list[dict], pools: dict[str, ChainBasedPoolModel | BittensorAlphaTokenPool], extra_metadata: dict
+) -> set[tuple[int, str, int]]:
+    """
+    Gets the (netuid, validator hotkey, block) of every alpha token allocation which `annualized_yield_pct()` will read
+    the validator's dividends of.
+    """
+    reads = set()
+    for key, pool in pools.items():
+        if pool.pool_type != POOL_TYPES.BT_ALPHA:
+            continue
+        for allocations in miners_allocations:
+            try:
+                allocation = allocations[key]
+                if allocation["amount"] > 0:
+                    reads.add((pool.netuid, allocation["delegate_ss58"], extra_metadata[key]["block"]))
+            except Exception:  # noqa: S112
+                # malformed allocations are dealt with when calculating the yield
+                continue
+    return reads
+
+
 def filter_allocations(
     self,
     query: int,  # noqa: ARG001
@@ -306,10 +369,104 @@ def filter_allocations(
     return axon_times, curr_filtered_allocs, filtered_out_uids
 
 
+def get_pool_key(pool: dict) -> tuple:
+    """
+    Identifies the on-chain pool a serialized pool refers to - pools of different requests with the same key read the same
+    state when synced.
+    """
+    if pool["pool_type"] == POOL_TYPES.BT_ALPHA:
+        return (pool["pool_type"], pool["pool_data_provider_type"], int(pool["netuid"]))
+    return (
+        pool["pool_type"],
+        pool["pool_data_provider_type"],
+        pool["contract_address"].lower(),
+        pool["user_address"].lower(),
+    )
+
+
+def create_pool_from_json(self, pool: dict) -> ChainBasedPoolModel | BittensorAlphaTokenPool:
+    if pool["pool_type"] == POOL_TYPES.BT_ALPHA:
+        return PoolFactory.create_pool(
+            pool_type=pool["pool_type"],
+            netuid=int(pool["netuid"]),
+            current_amount=int(pool["current_amount"]),
+            pool_data_provider_type=pool["pool_data_provider_type"],
+        )
+    return PoolFactory.create_pool(
+        pool_type=pool["pool_type"],
+        web3_provider=self.pool_data_providers[pool["pool_data_provider_type"]],  # type: ignore[]
+        user_address=(pool["user_address"]),  # TODO: is there a cleaner way to do this?
+        contract_address=pool["contract_address"],
+        pool_data_provider_type=pool["pool_data_provider_type"],
+    )
+
+
+async def sync_scoring_pools(
+    self,
+    requests_pools: Iterable[dict[str, dict]],
+    block_identifier: BlockIdentifier | dict[str, BlockIdentifier] | None = None,
+) -> dict[tuple, ChainBasedPoolModel | BittensorAlphaTokenPool]:
+    """
+    Creates and syncs the pools of the requests being scored in a scoring pass. Requests often cover the same pools (i.e.
+    they were generated from the same pool registry entry), so each distinct pool is only synced once.
+
+    Args:
+        requests_pools (Iterable[dict[str, dict]]): The serialized pools of each request.
+        block_identifier (BlockIdentifier | dict[str, BlockIdentifier] | None): The block(s) to sync the pools at (see
+            `sync_pools()`).
+
+    Returns:
+        dict[tuple, ChainBasedPoolModel | BittensorAlphaTokenPool]: The synced pools, keyed by `get_pool_key()`. Pools
+        which failed to sync are left out.
+    """
+    pools = {}
+    for request_pools in requests_pools:
+        for pool in request_pools.values():
+            key = get_pool_key(pool)
+            if key not in pools:
+                pools[key] = create_pool_from_json(self, pool)
+
+    keys = list(pools.keys())
+    errors = await sync_pools(
+        [pools[key] for key in keys],
+        self.pool_data_providers,
+        concurrency=self.config.validator.pool_sync_concurrency,
+        block_identifier=block_identifier,
+    )
+    bt.logging.debug(f"Synced {len(keys)} distinct pools for scoring")
+    return {key: pools[key] for key, err in zip(keys, errors, strict=True) if err is None}
+
+
+def get_request_pools(
+    request_pools: dict[str, dict], synced_pools: dict[tuple, ChainBasedPoolModel | BittensorAlphaTokenPool]
+) -> dict[str, ChainBasedPoolModel | BittensorAlphaTokenPool] | None:
+    """
+    Gets the synced pools of a request from the pools synced for a scoring pass, or None if any of them failed to sync.
+    """
+    pools = {}
+    for uid, pool in request_pools.items():
+        synced_pool = synced_pools.get(get_pool_key(pool))
+        if synced_pool is None:
+            return None
+        if isinstance(synced_pool, BittensorAlphaTokenPool):
+            # the amount in the pool is specific to the request - the synced subnet state is shared
+            pools[uid] = synced_pool.model_copy(update={"current_amount": int(pool["current_amount"])})
+        else:
+            pools[uid] = synced_pool
+    return pools
+
+
 # TODO: we shouldn't need chain_data provider here, use self.pool_data_providers instead
 async def get_rewards_allocs(
-    self, active_allocation, chain_data_provider: Web3 | bt.AsyncSubtensor
+    self,
+    active_allocation,
+    chain_data_provider: Web3 | bt.AsyncSubtensor,
+    synced_pools: dict[tuple, ChainBasedPoolModel | BittensorAlphaTokenPool] | None = None,
 ) -> tuple[list, list, bool]:
+    """
+    Scores the miners' allocations of an active allocation request. The pools of the request are taken from
+    `synced_pools` (see `sync_scoring_pools()`) - they're synced on the spot if not given.
+    """
     # a dictionary, miner uids -> apy and allocations
     apys_and_allocations = {}
     miner_uids = []
@@ -323,43 +480,26 @@ async def get_rewards_allocs(
     assets_and_pools = None
     miners = None
 
-    with get_db_connection(self.config.db_dir) as conn:
-        # get assets and pools that are used to benchmark miner
-        # we get the first row entry - we assume that it is the only response from the database
-        try:
-            request_info = get_request_info(conn, request_uid=request_uid)[0]
-            assets_and_pools = json.loads(request_info["assets_and_pools"])
-        except Exception:
-            return ([], {}, False)
-
-        # obtain the miner responses for each request
-        miners = get_miner_responses(conn, request_uid=request_uid)
-        bt.logging.debug(f"filtered allocations: {miners}")
-
-    # TODO: see if we can factor this into its own subroutine
-    # if so, do the same with the same one in validator.py
-
-    pools = assets_and_pools["pools"]
-    new_pools = {}
-    for uid, pool in pools.items():
-        if pool["pool_type"] == POOL_TYPES.BT_ALPHA:
-            new_pool = PoolFactory.create_pool(
-                pool_type=pool["pool_type"],
-                netuid=int(pool["netuid"]),
-                current_amount=int(pool["current_amount"]),
-                pool_data_provider_type=pool["pool_data_provider_type"],
-            )
-        else:
-            new_pool = PoolFactory.create_pool(
-                pool_type=pool["pool_type"],
-                web3_provider=self.pool_data_providers[pool["pool_data_provider_type"]],  # type: ignore[]
-                user_address=(pool["user_address"]),  # TODO: is there a cleaner way to do this?
-                contract_address=pool["contract_address"],
-            )
+    db = get_async_db(self.config.db_dir)
+    # get assets and pools that are used to benchmark miner
+    # we get the first row entry - we assume that it is the only response from the database
+    try:
+        request_info = (await db.get_request_info(request_uid=request_uid))[0]
+        assets_and_pools = json.loads(request_info["assets_and_pools"])
+        pools = assets_and_pools["pools"]
+    except Exception:
+        return ([], {}, False)
 
-        # sync pool
-        await new_pool.sync(chain_data_provider)
-        new_pools[uid] = new_pool
+    # obtain the miner responses for each request
+    miners = await db.get_miner_responses(request_uid=request_uid)
+    bt.logging.debug(f"filtered allocations: {miners}")
+
+    if synced_pools is None:
+        synced_pools = await sync_scoring_pools(self, [pools])
+    new_pools = get_request_pools(pools, synced_pools)
+    if new_pools is None:
+        bt.logging.error(f"Failed to sync pools of request {request_uid} - skipping scoring")
+        return ([], {}, False)
 
     assets_and_pools["pools"] = new_pools
 
@@ -369,10 +509,10 @@ async def get_rewards_allocs(
         bt.logging.error("Failed to load miners to score - scoring all by default")
         miners_to_score = None
 
-    # calculate the yield the pools accrued during the scoring period
+    extra_metadata = json.loads(request_info["metadata"])
+    miners_allocations = {}
     for miner in miners:
         allocations = json.loads(miner["allocation"])["allocations"]
-        extra_metadata = json.loads(request_info["metadata"])
         miner_uid = miner["miner_uid"]
         if miners_to_score:
             try:
@@ -388,11 +528,56 @@ async def get_rewards_allocs(
                 bt.logging.error(e)
                 bt.logging.error("Failed miner hotkey check, continuing loop...")
                 continue
-        miner_apy = await annualized_yield_pct(
-            allocations, assets_and_pools, scoring_period_length, extra_metadata, chain_data_provider
+        miners_allocations[miner_uid] = (allocations, miner["axon_time"])
+
+    # calculate the yield the pools accrued during the scoring period
+    all_allocations = [allocations for allocations, _ in miners_allocations.values()]
+    if isinstance(chain_data_provider, bt.AsyncSubtensor):
+        # the subtensor reads needed to calculate the yields of alpha token pools are the same for every miner which
+        # delegates to the same validator - make each of them once before calculating the yields of all the miners
+        await prefetch_vali_epoch_data(
+            chain_data_provider,
+            get_bt_alpha_reads(all_allocations, new_pools, extra_metadata),
+            end_block=await get_subtensor_block(chain_data_provider),
+            concurrency=self.config.validator.max_concurrent_yields,
+            store=self.vali_epoch_store,
         )
-        miner_axon_time = miner["axon_time"]
 
+        # simulate the slippage of all the miners' allocations at once, rather than each of them on its own
+        try:
+            miners_alpha_losses = await get_alpha_slippage_losses(
+                chain_data_provider, all_allocations, new_pools, extra_metadata
+            )
+        except Exception as e:
+            bt.logging.error(f"Failed to simulate the slippage of alpha token pool allocations: {e}")
+            miners_alpha_losses = [None] * len(all_allocations)
+
+        semaphore = asyncio.Semaphore(self.config.validator.max_concurrent_yields)
+
+        async def miner_yield(allocations: dict, alpha_losses: dict[str, int] | None) -> int:
+            async with semaphore:
+                return await annualized_yield_pct(
+                    allocations,
+                    assets_and_pools,
+                    scoring_period_length,
+                    extra_metadata,
+                    chain_data_provider,
+                    alpha_losses,
+                    vali_epoch_store=self.vali_epoch_store,
+                )
+
+        miner_apys = await asyncio.gather(
+            *(
+                miner_yield(allocations, alpha_losses)
+                for allocations, alpha_losses in zip(all_allocations, miners_alpha_losses, strict=True)
+            )
+        )
+    else:
+        # the yields of chain based pools only depend on the synced pools - calculate them for all the miners at once
+        miner_apys = annualized_share_price_yields_pct(
+            all_allocations, assets_and_pools, scoring_period_length, extra_metadata
+        )
+    for (miner_uid, (allocations, miner_axon_time)), miner_apy in zip(miners_allocations.items(), miner_apys, strict=True):
         miner_uids.append(miner_uid)
         axon_times[miner_uid] = miner_axon_time
         apys_and_allocations[miner_uid] = {"apy": miner_apy, "allocations": allocations}
@@ -1,13 +1,31 @@
 # db_queries.py
 
+import atexit
+import gzip
 import json
+import re
 import sqlite3
+import threading
+from collections.abc import Iterator
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from fastapi.encoders import jsonable_encoder
 
-from sturdy.constants import DB_DIR, SCORING_WINDOW
+from sturdy.constants import (
+    ALLOCATION_RETENTION_DAYS,
+    DB_ARCHIVE_BATCH_SIZE,
+    DB_ARCHIVE_DIR,
+    DB_BUSY_TIMEOUT,
+    DB_CACHE_SIZE_KIB,
+    DB_DIR,
+    DB_MAX_IDLE_READERS,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_SYNCHRONOUS,
+    LOG_RETENTION_DAYS,
+    SCORING_WINDOW,
+)
 from sturdy.protocol import REQUEST_TYPES, AllocInfo, ChainBasedPoolModel
 
 BALANCE = "balance"
@@ -19,6 +37,10 @@ API_KEYS_TABLE = "api_keys"
 LOGS_TABLE = "logs"
 ENDPOINT = "endpoint"
 CREATED_AT = "created_at"
+LOG_ROLLUPS_TABLE = "log_rollups"
+DAY = "day"
+REQUESTS = "requests"
+COST = "cost"
 
 # allocations table
 ALLOCATION_REQUESTS_TABLE = "allocation_requests"
@@ -30,15 +52,124 @@ MINER_UID = "miner_uid"
 ALLOCATION = "allocation"
 
 
+class DbConnectionPool:
+    """
+    Long-lived connections to a single database.
+
+    The database is put in WAL mode, so that reads don't block writes (or each other). Writes all go through one
+    dedicated writer connection, which is handed out to one user at a time, while reads are served by a pool of
+    read-only connections. As connections stay open, sqlite3 also gets to reuse the statements it prepared on them.
+
+    Any transaction left uncommitted when a connection is handed back is rolled back, as closing the connection would.
+    """
+
+    def __init__(self, db_dir: str = DB_DIR, uri: bool = False, max_idle_readers: int = DB_MAX_IDLE_READERS) -> None:
+        self.db_dir = db_dir
+        self.uri = uri
+        self.max_idle_readers = max_idle_readers
+        self.closed = False
+        self._writer: sqlite3.Connection | None = None
+        # reentrant, so a coroutine which already holds the writer can't deadlock the event loop by asking for it again
+        self._writer_lock = threading.RLock()
+        self._idle_readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def connect(self, readonly: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_dir,
+            uri=self.uri,
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        # persisted in the database file - a no-op once it has been switched to WAL
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self.connect()
+            try:
+                yield self._writer
+            finally:
+                if self._writer.in_transaction:
+                    self._writer.rollback()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        with self._readers_lock:
+            conn = self._idle_readers.pop() if len(self._idle_readers) > 0 else None
+        if conn is None:
+            conn = self.connect(readonly=True)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._readers_lock:
+                keep = not self.closed and len(self._idle_readers) < self.max_idle_readers
+                if keep:
+                    self._idle_readers.append(conn)
+            if not keep:
+                conn.close()
+
+    def close(self) -> None:
+        with self._writer_lock:
+            self.closed = True
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._idle_readers:
+                conn.close()
+            self._idle_readers.clear()
+
+
+DB_CONNECTION_POOLS: dict[tuple[str, bool], DbConnectionPool] = {}
+DB_CONNECTION_POOLS_LOCK = threading.Lock()
+
+
+def get_db_connection_pool(db_dir: str = DB_DIR, uri: bool = False) -> DbConnectionPool:
+    with DB_CONNECTION_POOLS_LOCK:
+        pool = DB_CONNECTION_POOLS.get((db_dir, uri))
+        if pool is None:
+            pool = DbConnectionPool(db_dir, uri=uri)
+            DB_CONNECTION_POOLS[(db_dir, uri)] = pool
+        return pool
+
+
+def close_db_connections(db_dir: str | None = None) -> None:
+    """Closes the pooled connections to the given database, or to all databases if none is given."""
+    with DB_CONNECTION_POOLS_LOCK:
+        keys = [key for key in DB_CONNECTION_POOLS if db_dir is None or key[0] == db_dir]
+        pools = [DB_CONNECTION_POOLS.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+# closing the last connection to the database checkpoints its WAL into the database file
+atexit.register(close_db_connections)
+
+
 @contextmanager
-def get_db_connection(db_dir: str = DB_DIR, uri: bool = False):  # noqa: ANN201
-    conn = sqlite3.connect(db_dir, uri=uri)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    try:
+def get_db_connection(db_dir: str = DB_DIR, uri: bool = False, readonly: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    Checks out a pooled connection to the database - the writer connection by default, or a read-only connection if
+    `readonly` is set. Avoid awaiting while holding the writer, as other writes wait for it to be handed back.
+    """
+    pool = get_db_connection_pool(db_dir, uri=uri)
+    checkout = pool.reader() if readonly else pool.writer()
+    with checkout as conn:
         yield conn
-    finally:
-        conn.close()
 
 
 def get_api_key_info(conn: sqlite3.Connection, api_key: str) -> dict | None:
@@ -58,6 +189,38 @@ def get_all_logs(conn: sqlite3.Connection) -> list:
     return conn.execute(f"SELECT * FROM {LOGS_TABLE}").fetchall()
 
 
+def get_log_rollups_for_key(conn: sqlite3.Connection, api_key: str) -> list:
+    return conn.execute(f"SELECT * FROM {LOG_ROLLUPS_TABLE} WHERE {KEY} = ? ORDER BY {DAY}", (api_key,)).fetchall()
+
+
+def rollup_logs(conn: sqlite3.Connection, retention_days: int = LOG_RETENTION_DAYS) -> int:
+    """
+    Rolls the api request logs from before the last `retention_days` (whole) days up into the daily totals of requests
+    and credits used per api key and endpoint, and deletes them. Returns the number of logs which were rolled up.
+    """
+    if retention_days <= 0:
+        return 0
+
+    cutoff = (datetime.now() - timedelta(days=retention_days)).replace(hour=0, minute=0, second=0, microsecond=0)  # noqa: DTZ005
+    conn.execute(
+        f"""
+        INSERT INTO {LOG_ROLLUPS_TABLE} ({KEY}, {DAY}, {ENDPOINT}, {REQUESTS}, {COST})
+        SELECT {KEY}, date({CREATED_AT}), COALESCE({ENDPOINT}, ''), COUNT(*), COALESCE(SUM({COST}), 0)
+        FROM {LOGS_TABLE}
+        WHERE {CREATED_AT} < ?
+        GROUP BY {KEY}, date({CREATED_AT}), COALESCE({ENDPOINT}, '')
+        ON CONFLICT ({KEY}, {DAY}, {ENDPOINT}) DO UPDATE SET
+            {REQUESTS} = {REQUESTS} + excluded.{REQUESTS},
+            {COST} = {COST} + excluded.{COST}
+        """,
+        (cutoff,),
+    )
+    cur = conn.execute(f"DELETE FROM {LOGS_TABLE} WHERE {CREATED_AT} < ?", (cutoff,))
+    conn.commit()
+
+    return cur.rowcount
+
+
 def add_api_key(
     conn: sqlite3.Connection,
     api_key: str,
@@ -97,8 +260,8 @@ def delete_api_key(conn: sqlite3.Connection, api_key: str) -> None:
 
 def update_requests_and_credits(conn: sqlite3.Connection, api_key_info: dict, cost: float) -> None:
     conn.execute(
-        f"UPDATE api_keys SET {BALANCE} = {BALANCE} - {cost} WHERE {KEY} = ?",
-        (api_key_info[KEY],),
+        f"UPDATE api_keys SET {BALANCE} = {BALANCE} - ? WHERE {KEY} = ?",
+        (cost, api_key_info[KEY]),
     )
 
 
@@ -113,20 +276,36 @@ def log_request(conn: sqlite3.Connection, api_key_info: dict, path: str, cost: f
         )
 
 
+def log_api_usage(conn: sqlite3.Connection, debits: dict[str, float], logs: list[tuple]) -> None:
+    """
+    Writes a batch of api usage - the total cost of the requests made with each api key, and the request logs, as
+    (key, endpoint, cost, balance, created_at) rows. Logs of api keys which have since been deleted are dropped.
+    """
+    conn.executemany(
+        f"UPDATE {API_KEYS_TABLE} SET {BALANCE} = {BALANCE} - ? WHERE {KEY} = ?",
+        [(cost, key) for key, cost in debits.items()],
+    )
+    conn.executemany(
+        f"INSERT INTO {LOGS_TABLE} SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM {API_KEYS_TABLE} WHERE {KEY} = ?)",
+        [(*log, log[0]) for log in logs],
+    )
+    conn.commit()
+
+
 def rate_limit_exceeded(conn: sqlite3.Connection, api_key_info: dict) -> bool:
     one_minute_ago = datetime.now() - timedelta(minutes=1)  # noqa: DTZ005
 
     # Prepare a SQL statement
     query = f"""
-        SELECT *
+        SELECT COUNT(*)
         FROM logs
         WHERE {KEY} = ? AND {CREATED_AT} >= ?
     """
 
     cur = conn.execute(query, (api_key_info[KEY], one_minute_ago.strftime("%Y-%m-%d %H:%M:%S")))
-    recent_logs = cur.fetchall()
+    num_recent_logs = cur.fetchone()[0]
 
-    return len(recent_logs) >= api_key_info[RATE_LIMIT_PER_MINUTE]
+    return num_recent_logs >= api_key_info[RATE_LIMIT_PER_MINUTE]
 
 
 def to_json_string(input_data) -> str:
@@ -331,3 +510,57 @@ def get_request_info(
     cur = conn.execute(query, params)
     rows = cur.fetchall()
     return [dict(row) for row in rows]
+
+
+def archive_allocations(
+    conn: sqlite3.Connection,
+    archive_dir: str = DB_ARCHIVE_DIR,
+    retention_days: int = ALLOCATION_RETENTION_DAYS,
+    limit: int = DB_ARCHIVE_BATCH_SIZE,
+) -> int:
+    """
+    Moves up to `limit` of the oldest allocation requests from before the last `retention_days` days, along with the
+    allocations of the miners, out of the database into a gzipped JSON lines file in `archive_dir` - one line per request.
+    Requests which are still being scored are kept. Returns the number of requests which were archived.
+
+    The archive file is named after the creation times of its first and last requests, so if the deletion is rolled
+    back the same requests are written to the same file again by the next run.
+    """
+    if retention_days <= 0:
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    requests = conn.execute(
+        f"""
+        SELECT * FROM {ALLOCATION_REQUESTS_TABLE} AS r
+        WHERE r.{CREATED_AT} < ?
+        AND NOT EXISTS (SELECT 1 FROM {ACTIVE_ALLOCS} AS a WHERE a.{REQUEST_UID} = r.{REQUEST_UID})
+        ORDER BY r.{CREATED_AT}, r.{REQUEST_UID}
+        LIMIT ?
+        """,
+        (cutoff, limit),
+    ).fetchall()
+    if len(requests) < 1:
+        return 0
+
+    request_uids = json.dumps([request[REQUEST_UID] for request in requests])
+    request_uids_query = f"{REQUEST_UID} IN (SELECT value FROM json_each(?))"
+    allocations: dict[str, list[dict]] = {}
+    for row in conn.execute(f"SELECT * FROM {ALLOCATIONS_TABLE} WHERE {request_uids_query}", (request_uids,)):
+        allocations.setdefault(row[REQUEST_UID], []).append(dict(row))
+
+    Path(archive_dir).mkdir(parents=True, exist_ok=True)
+    first, last = (re.sub(r"\D", "", str(request[CREATED_AT])) for request in (requests[0], requests[-1]))
+    path = Path(archive_dir) / f"{ALLOCATIONS_TABLE}_{first}_{last}.jsonl.gz"
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for request in requests:
+            row = {**dict(request), ALLOCATIONS_TABLE: allocations.get(request[REQUEST_UID], [])}
+            f.write(json.dumps(row, default=str) + "\n")
+    tmp_path.replace(path)
+
+    conn.execute(f"DELETE FROM {ALLOCATIONS_TABLE} WHERE {request_uids_query}", (request_uids,))
+    conn.execute(f"DELETE FROM {ALLOCATION_REQUESTS_TABLE} WHERE {request_uids_query}", (request_uids,))
+    conn.commit()
+
+    return len(requests)
@@ -1,14 +1,30 @@
+import asyncio
 import traceback
+from dataclasses import dataclass
 
 import bittensor as bt
 from aiohttp.client_exceptions import InvalidUrlClientError
 
 from sturdy.constants import (
     ALLOC_QUERY_TIMEOUT,
+    MAX_CONCURRENT_QUERIES,
+    MINER_TYPE_QUERY_TIMEOUT,
 )
+from sturdy.protocol import MINER_TYPE, QueryMinerType
 from sturdy.validator.request import Request
 
 
+@dataclass
+class MinerTypeCacheEntry:
+    """
+    The last known miner type of a hotkey, along with the axon it was served from and when it was obtained.
+    """
+
+    miner_type: MINER_TYPE
+    axon: tuple[str, int]
+    probed_at: float
+
+
 async def query_single_axon(
     dendrite: bt.dendrite, request: Request, query_timeout: int = ALLOC_QUERY_TIMEOUT
 ) -> Request | None:
@@ -47,3 +63,53 @@ async def query_single_axon(
         bt.logging.error(f"Failed to query axon for UID: {request.uid}. Error: {e}")
         traceback.print_exc()
         return None
+
+
+def get_stale_miner_type_uids(
+    cache: dict[str, MinerTypeCacheEntry],
+    axons: list[bt.AxonInfo],
+    ttl: float,
+    now: float,
+) -> list[int]:
+    """
+    Get the uids whose miner type needs to be (re-)queried: hotkeys which aren't cached yet, hotkeys which are now served
+    from a different axon, and hotkeys whose cached type is older than `ttl` seconds.
+    """
+    stale_uids = []
+    for uid, axon in enumerate(axons):
+        entry = cache.get(axon.hotkey)
+        if entry is None or entry.axon != (axon.ip, axon.port) or now - entry.probed_at >= ttl:
+            stale_uids.append(uid)
+    return stale_uids
+
+
+async def query_miner_types(
+    dendrite: bt.dendrite,
+    axons: dict[int, bt.AxonInfo],
+    query_timeout: float = MINER_TYPE_QUERY_TIMEOUT,
+    max_concurrent_queries: int = MAX_CONCURRENT_QUERIES,
+) -> dict[int, QueryMinerType]:
+    """
+    Query the given axons for their miner type concurrently, with at most `max_concurrent_queries` queries in flight.
+
+    Args:
+        dendrite (bt.dendrite): The dendrite to use for querying.
+        axons (dict[int, bt.AxonInfo]): uid -> axon to query.
+
+    Returns:
+        dict[int, QueryMinerType]: uid -> response.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrent_queries))
+    synapse = QueryMinerType()
+
+    async def query_axon(axon: bt.AxonInfo) -> QueryMinerType:
+        async with semaphore:
+            return await dendrite.call(
+                target_axon=axon,
+                synapse=synapse.model_copy(),
+                timeout=query_timeout,
+                deserialize=False,
+            )
+
+    responses = await asyncio.gather(*(query_axon(axon) for axon in axons.values()))
+    return dict(zip(axons.keys(), responses, strict=True))
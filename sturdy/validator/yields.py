@@ -0,0 +1,124 @@
+from typing import cast
+
+import bittensor as bt
+import numpy as np
+import numpy.typing as npt
+
+from sturdy.pools import POOL_TYPES, BittensorAlphaTokenPool, ChainBasedPoolModel
+from sturdy.utils.bt_alpha import AlphaPoolsAMM
+from sturdy.utils.ethmath import wei_div
+
+# pools whose yield is measured by the change in their share price (see `annualized_yield_pct()`)
+SHARE_PRICE_POOL_TYPES = (
+    POOL_TYPES.STURDY_SILO,
+    POOL_TYPES.MORPHO,
+    POOL_TYPES.YEARN_V3,
+    POOL_TYPES.AAVE_DEFAULT,
+    POOL_TYPES.AAVE_TARGET,
+)
+
+SECONDS_PER_YEAR = 31536000
+
+_to_int = np.frompyfunc(int, 1, 1)
+
+
+def get_allocation_matrix(miners_allocations: list[dict], pool_keys: list[str]) -> npt.NDArray[np.object_]:
+    """
+    Builds a miners x pools matrix of allocations. Allocations are kept as python ints (object array) so that amounts in
+    wei don't overflow - a miner which did not allocate to a pool allocated 0 to it.
+    """
+    matrix = np.zeros((len(miners_allocations), len(pool_keys)), dtype=object)
+    for row, allocations in enumerate(miners_allocations):
+        for col, key in enumerate(pool_keys):
+            allocation = allocations.get(key)
+            if allocation is not None:
+                matrix[row, col] = allocation
+    return matrix
+
+
+def annualized_share_price_yields_pct(
+    miners_allocations: list[dict],
+    assets_and_pools: dict[str, dict[str, ChainBasedPoolModel] | int],
+    seconds_passed: int,
+    extra_metadata: dict,
+) -> list[int]:
+    """
+    Calculates the annualized yields of many miners' allocations to share price based pools at once. Each pool's yield is
+    computed for every miner in a single operation over a column of the allocation matrix, rather than miner by miner.
+
+    Returns the same yields as calling `annualized_yield_pct()` on each miner's allocations: the arithmetic is performed
+    elementwise on python ints and floats, in the same order.
+    """
+    if seconds_passed < 1:
+        return [0] * len(miners_allocations)
+
+    initial_balance = cast(int, assets_and_pools["total_assets"])
+    pools = cast(dict[str, ChainBasedPoolModel], assets_and_pools["pools"])
+    pool_keys = [key for key, pool in pools.items() if pool.pool_type in SHARE_PRICE_POOL_TYPES]
+
+    allocations = get_allocation_matrix(miners_allocations, pool_keys)
+    total_yields = np.zeros(len(miners_allocations), dtype=object)
+    annualization = SECONDS_PER_YEAR / seconds_passed
+
+    for col, key in enumerate(pool_keys):
+        column = allocations[:, col]
+        (rows,) = np.nonzero(column > 0)
+        if len(rows) == 0:
+            continue
+
+        pool = pools[key]
+        last_share_price = extra_metadata[key]
+        curr_share_price = pool._yield_index
+        pct_delta = float(curr_share_price - last_share_price) / float(last_share_price)
+        try:
+            # adjust for the dilution of the pool's yield caused by the miner's deposit
+            deposit_delta = column[rows] - pool._user_deposits
+            denominators = pool._total_supplied_assets + deposit_delta + 1
+            valid = denominators != 0
+            rows = rows[valid]
+            adjusted_pct_delta = pool._total_supplied_assets / denominators[valid] * pct_delta
+            annualized_pct_yield = adjusted_pct_delta * annualization
+            total_yields[rows] += _to_int(column[rows] * annualized_pct_yield)
+        except Exception as e:
+            bt.logging.error("Error calculating annualized pct yield, skipping:")
+            bt.logging.exception(e)
+
+    return [wei_div(total_yield, initial_balance) for total_yield in total_yields]
+
+
+def alpha_slippage_losses(
+    miners_allocations: list[dict],
+    pools: dict[str, BittensorAlphaTokenPool],
+    extra_metadata: dict,
+    dynamic_infos: dict[str, bt.DynamicInfo],
+) -> list[dict[str, int]]:
+    """
+    Simulates the slippage of every miner's move from the current stake of each alpha token pool to its allocation at
+    once, over a miners x pools matrix of the deltas, with each pool's AMM seeded from its `dynamic_infos` (at the block of
+    the request).
+
+    Returns the alpha (in rao) each miner loses to slippage in each pool, as calculated by `annualized_yield_pct()` - to
+    within the tolerance of `AlphaPoolsAMM`. Pools for which it can't be calculated (i.e. with a price of zero) are left
+    out, as are the ones without dynamic info.
+    """
+    pool_keys = list(dynamic_infos)
+    deltas = np.zeros((len(miners_allocations), len(pool_keys)), dtype=np.float64)
+    for row, allocations in enumerate(miners_allocations):
+        for col, key in enumerate(pool_keys):
+            allocation = allocations.get(key)
+            if allocation is not None and allocation["amount"] > 0:
+                deltas[row, col] = allocation["amount"] - pools[key].current_amount
+
+    infos = [dynamic_infos[key] for key in pool_keys]
+    amm = AlphaPoolsAMM.from_dynamic_infos(infos)
+    price_rao = np.array([info.price.rao for info in infos], dtype=np.float64)
+    last_price = np.array([extra_metadata[key]["price_rao"] for key in pool_keys], dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # tao is staked into the pools the miners add to, and the equivalent alpha is unstaked from the others
+        staked_alpha_lost = amm.tao_to_alpha_slippage(np.maximum(deltas, 0))
+        alpha_unstaked = np.floor(np.maximum(-deltas, 0) / price_rao)
+        unstaked_alpha_lost = np.trunc(amm.alpha_to_tao_slippage(alpha_unstaked) / (last_price / 1e9))
+        alpha_lost = np.where(deltas > 0, staked_alpha_lost, np.where(deltas < 0, unstaked_alpha_lost, 0))
+
+    return [{key: int(lost) for key, lost in zip(pool_keys, row, strict=True) if np.isfinite(lost)} for row in alpha_lost]
@@ -15,9 +15,11 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import asyncio
 import sqlite3
-from typing import Union
+from typing import Any, Union
 
+import bittensor as bt
 from bittensor import (
     AxonInfo,
     Balance,
@@ -31,8 +33,19 @@ from bittensor_wallet.mock import MockWallet as _MockWallet
 from bittensor_wallet.mock import get_mock_coldkey as _get_mock_coldkey
 from bittensor_wallet.mock import get_mock_hotkey as _get_mock_hotkey
 from bittensor_wallet.mock import get_mock_wallet as _get_mock_wallet
+from eth_abi import decode, encode
+from pydantic import PrivateAttr
 from rich.console import Console
 from rich.text import Text
+from web3 import AsyncWeb3
+from web3.contract.async_contract import AsyncContract
+from web3.providers.async_base import AsyncBaseProvider
+
+from sturdy.abi import load_abi
+from sturdy.constants import MULTICALL3_ADDRESS
+from sturdy.pools import ChainBasedPoolModel
+from sturdy.utils.contracts import get_contract
+from sturdy.utils.multicall import ReadRounds
 
 
 def __mock_wallet_factory__(*args, **kwargs) -> _MockWallet:
@@ -219,6 +232,137 @@ def create_tables(conn: sqlite3.Connection) -> None:
     ALTER TABLE allocations
     ADD COLUMN axon_time FLOAT NOT NULL DEFAULT 99999.0; -- large number for now
     ALTER TABLE active_allocs
-    ADD COLUMN miners text"""
+    ADD COLUMN miners text;
+
+    CREATE INDEX idx_active_allocs_scoring_period_end ON active_allocs (scoring_period_end);
+    CREATE INDEX idx_logs_key_created_at ON logs (key, created_at);
+    CREATE INDEX idx_allocations_miner_uid_created_at ON allocations (miner_uid, created_at);
+    CREATE INDEX idx_allocations_created_at ON allocations (created_at);
+    CREATE INDEX idx_allocation_requests_created_at ON allocation_requests (created_at);
+
+    CREATE TABLE log_rollups (
+        key TEXT,
+        day DATE,
+        endpoint TEXT,
+        requests INTEGER NOT NULL DEFAULT 0,
+        cost REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (key, day, endpoint),
+        FOREIGN KEY(key) REFERENCES api_keys(key) ON DELETE CASCADE
+    )"""
 
     conn.executescript(query)
+
+
+ASSET_A = "0x00000000000000000000000000000000000000AA"
+ASSET_B = "0x00000000000000000000000000000000000000bb"
+USER = "0x0000000000000000000000000000000000000001"
+
+ERC20_ABI = load_abi("IERC20")
+
+
+class FakeChainProvider(AsyncBaseProvider):
+    """
+    Stand-in provider which answers `decimals()` and `balanceOf(address)` of a couple of tokens, either directly or through
+    Multicall3's `aggregate3`, and counts how many eth_calls it receives.
+    """
+
+    def __init__(self, multicall_deployed: bool = True) -> None:
+        super().__init__()
+        self.multicall_deployed = multicall_deployed
+        self.eth_calls = 0
+        self.block_number_requests = 0
+        self.call_blocks = []
+        self.w3 = AsyncWeb3()
+        self.selectors = {
+            self.w3.keccak(text="decimals()")[:4]: "decimals",
+            self.w3.keccak(text="balanceOf(address)")[:4]: "balanceOf",
+        }
+        self.decimals = {ASSET_A.lower(): 6, ASSET_B.lower(): 18}
+        self.balances = {(ASSET_A.lower(), USER.lower()): 1000, (ASSET_B.lower(), USER.lower()): 42}
+
+    def answer(self, target: str, data: bytes) -> bytes:
+        match self.selectors[data[:4]]:
+            case "decimals":
+                return encode(["uint8"], [self.decimals[target.lower()]])
+            case "balanceOf":
+                (holder,) = decode(["address"], data[4:])
+                return encode(["uint256"], [self.balances[(target.lower(), holder.lower())]])
+
+    async def make_request(self, method: str, params: Any) -> dict:
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+        if method == "eth_getCode":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x"}
+        if method == "eth_blockNumber":
+            self.block_number_requests += 1
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x64"}
+        if method == "eth_getBlockByNumber":
+            self.call_blocks.append(params[0])
+            return {"jsonrpc": "2.0", "id": 1, "result": {"number": params[0], "timestamp": "0x6553f100"}}
+        assert method == "eth_call"
+        self.eth_calls += 1
+        self.call_blocks.append(params[1])
+        tx = params[0]
+        data = bytes.fromhex(tx["data"][2:])
+        if tx["to"].lower() == MULTICALL3_ADDRESS.lower():
+            if not self.multicall_deployed:
+                return {"jsonrpc": "2.0", "id": 1, "result": "0x"}
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [(True, self.answer(target, call_data)) for target, _, call_data in calls]
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x" + encode(["(bool,bytes)[]"], [results]).hex()}
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + self.answer(tx["to"], data).hex()}
+
+
+class FakeSubtensor:
+    """Stand-in subtensor which tracks how many subnets are being read at once"""
+
+    def __init__(self) -> None:
+        self.subnet_reads = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def subnet(self, netuid: int):  # noqa: ANN201
+        self.subnet_reads += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        return type("DynamicInfo", (), {"price": bt.Balance.from_rao(netuid)})()
+
+
+class SnapshotSubtensor(FakeSubtensor):
+    """Stand-in subtensor which can also read all the subnets at once"""
+
+    def __init__(self, netuids: list[int]) -> None:
+        super().__init__()
+        self.netuids = netuids
+        self.snapshot_reads = 0
+        self.snapshot_blocks = []
+
+    async def get_current_block(self) -> int:
+        return 100
+
+    async def all_subnets(self, block_number: int):  # noqa: ANN201
+        self.snapshot_reads += 1
+        self.snapshot_blocks.append(block_number)
+        return [type("DynamicInfo", (), {"netuid": netuid, "price": bt.Balance.from_rao(netuid)})() for netuid in self.netuids]
+
+
+class TokenPool(ChainBasedPoolModel):
+    """Minimal pool model which reads the decimals of a token, and then the user's balance of it"""
+
+    _token_contract: AsyncContract = PrivateAttr()
+    _decimals: int = PrivateAttr()
+    _user_deposits: int = PrivateAttr()
+
+    async def pool_init(self, web3_provider: AsyncWeb3) -> None:
+        self._token_contract = get_contract(web3_provider, "IERC20", self.contract_address)
+        self._initted = True
+
+    def sync_reads(self, web3_provider: AsyncWeb3) -> ReadRounds:  # noqa: ARG002
+        results = yield {"decimals": self._token_contract.functions.decimals()}
+        self._decimals = results["decimals"]
+        results = yield {"user_deposits": self._token_contract.functions.balanceOf(self.user_address)}
+        self._user_deposits = results["user_deposits"]
@@ -0,0 +1,107 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from sturdy.validator.api_usage import ApiUsageLedger
+from sturdy.validator.async_sql import AsyncDatabase
+from sturdy.validator.sql import (
+    add_api_key,
+    close_db_connections,
+    delete_api_key,
+    get_all_logs_for_key,
+    get_api_key_info,
+    get_db_connection,
+)
+from tests.helpers import create_tables
+
+
+class TestApiUsageLedger(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_dir = str(Path(self.tmp_dir.name) / "test.db")
+        with get_db_connection(self.db_dir) as conn:
+            create_tables(conn)
+            add_api_key(conn, "key", 100.0, 3, "Key")
+            add_api_key(conn, "unlimited", None, 60, "Unlimited")
+        self.db = AsyncDatabase(self.db_dir)
+        # flushes are made manually
+        self.ledger = ApiUsageLedger(self.db, flush_interval=3600, refresh_interval=3600)
+
+    async def asyncTearDown(self) -> None:
+        await self.ledger.close()
+        await self.db.close()
+        close_db_connections(self.db_dir)
+        self.tmp_dir.cleanup()
+
+    async def test_rate_limit(self) -> None:
+        info = await self.ledger.get_api_key_info("key")
+        self.assertIsNone(await self.ledger.get_api_key_info("missing"))
+
+        for now in (0.0, 10.0, 20.0):
+            self.assertFalse(self.ledger.rate_limit_exceeded(info, now=now))
+            self.ledger.charge(info, "/allocate", 1, now=now)
+        self.assertTrue(self.ledger.rate_limit_exceeded(info, now=30.0))
+        # the first request has left the window
+        self.assertFalse(self.ledger.rate_limit_exceeded(info, now=60.0))
+        # other keys are limited separately
+        self.assertFalse(self.ledger.rate_limit_exceeded(await self.ledger.get_api_key_info("unlimited"), now=30.0))
+
+    async def test_credits(self) -> None:
+        info = await self.ledger.get_api_key_info("key")
+        self.ledger.charge(info, "/allocate", 1)
+        self.ledger.charge(info, "/allocate", 1)
+        self.ledger.charge(await self.ledger.get_api_key_info("unlimited"), "/allocate", 1)
+
+        # debited straight away, but not written yet
+        self.assertEqual((await self.ledger.get_api_key_info("key"))["balance"], 98.0)
+        self.assertIsNone((await self.ledger.get_api_key_info("unlimited"))["balance"])
+        with get_db_connection(self.db_dir) as conn:
+            self.assertEqual(get_api_key_info(conn, "key")["balance"], 100.0)
+            self.assertEqual(len(get_all_logs_for_key(conn, "key")), 0)
+
+        await self.ledger.flush()
+
+        self.assertEqual((await self.ledger.get_api_key_info("key"))["balance"], 98.0)
+        with get_db_connection(self.db_dir) as conn:
+            self.assertEqual(get_api_key_info(conn, "key")["balance"], 98.0)
+            logs = get_all_logs_for_key(conn, "key")
+            self.assertEqual(
+                [(log["endpoint"], log["cost"], log["balance"]) for log in logs],
+                [
+                    ("/allocate", 1.0, 99.0),
+                    ("/allocate", 1.0, 98.0),
+                ],
+            )
+            self.assertEqual(len(get_all_logs_for_key(conn, "unlimited")), 1)
+
+        # the usage of keys which were deleted in the meantime is dropped
+        self.ledger.charge(info, "/allocate", 1)
+        with get_db_connection(self.db_dir) as conn:
+            delete_api_key(conn, "key")
+        await self.ledger.flush()
+        await self.ledger.refresh()
+        self.assertIsNone(await self.ledger.get_api_key_info("key"))
+
+    async def test_background_sync(self) -> None:
+        ledger = ApiUsageLedger(self.db, flush_interval=0.05, refresh_interval=0.05)
+        try:
+            info = await ledger.get_api_key_info("key")
+            # a flush interval passes with nothing to flush
+            await asyncio.sleep(0.2)
+            self.assertFalse(ledger._flush_task.done())
+
+            ledger.charge(info, "/allocate", 1)
+            with get_db_connection(self.db_dir) as conn:
+                add_api_key(conn, "new", 10.0, 3, "New")
+            await asyncio.sleep(0.2)
+
+            with get_db_connection(self.db_dir) as conn:
+                self.assertEqual(get_api_key_info(conn, "key")["balance"], 99.0)
+            self.assertIsNotNone(ledger._api_keys.get("new"))
+        finally:
+            await ledger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
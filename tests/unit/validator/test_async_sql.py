@@ -0,0 +1,84 @@
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sturdy.protocol import REQUEST_TYPES
+from sturdy.validator.async_sql import AsyncDatabase
+from sturdy.validator.sql import add_api_key, close_db_connections, get_db_connection, get_miner_responses
+from tests.helpers import create_tables
+
+POOL = "0x0669091F451142b3228171aE6aD794cF98288124"
+
+
+def failing_write(conn: sqlite3.Connection) -> None:
+    add_api_key(conn, "rolled_back", 1.0, 60, "Rolled Back")
+    raise ValueError("bad write")
+
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_dir = str(Path(self.tmp_dir.name) / "test.db")
+        with get_db_connection(self.db_dir) as conn:
+            create_tables(conn)
+        self.db = AsyncDatabase(self.db_dir)
+
+    async def asyncTearDown(self) -> None:
+        await self.db.close()
+        close_db_connections(self.db_dir)
+        self.tmp_dir.cleanup()
+
+    async def log_request(self, request_uid: str) -> None:
+        await self.db.log_allocations(
+            request_uid,
+            ["hotkey-0", "hotkey-1"],
+            {"total_assets": 100, "pools": {POOL: {"pool_type": "STURDY_SILO", "contract_address": POOL}}},
+            {},
+            {"0": {POOL: 100}, "1": {POOL: 50}},
+            {"0": 1.0, "1": 2.0},
+            REQUEST_TYPES.SYNTHETIC,
+            scoring_period=69,
+        )
+
+    async def test_batched_writes(self) -> None:
+        await asyncio.gather(*(self.log_request(f"request-{idx}") for idx in range(20)))
+
+        self.assertEqual(self.db.writes, 20)
+        # writes which queue up while a batch is being committed share the next commit
+        self.assertLess(self.db.commits, 20)
+        self.assertEqual(len(await self.db.get_request_info()), 20)
+
+        # same results as querying the database directly
+        responses = await self.db.get_miner_responses(request_uid="request-3")
+        with get_db_connection(self.db_dir) as conn:
+            self.assertEqual(responses, get_miner_responses(conn, request_uid="request-3"))
+        self.assertEqual([response["miner_uid"] for response in responses], ["0", "1"])
+
+    async def test_failed_write(self) -> None:
+        results = await asyncio.gather(
+            self.db.write(add_api_key, "key", 1.0, 60, "Key"),
+            self.db.write(failing_write),
+            return_exceptions=True,
+        )
+
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], ValueError)
+        # only the failed write is rolled back
+        self.assertIsNotNone(await self.db.get_api_key_info("key"))
+        self.assertIsNone(await self.db.get_api_key_info("rolled_back"))
+
+    async def test_close(self) -> None:
+        writes = [asyncio.create_task(self.log_request(f"request-{idx}")) for idx in range(5)]
+        await asyncio.sleep(0)
+        # queued writes are committed before closing
+        await self.db.close()
+
+        self.assertTrue(all(write.done() for write in writes))
+        with get_db_connection(self.db_dir) as conn:
+            self.assertEqual(len(get_miner_responses(conn)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+import bittensor as bt
+
+from sturdy.protocol import MINER_TYPE, QueryMinerType
+from sturdy.validator.utils.axon import MinerTypeCacheEntry, get_stale_miner_type_uids, query_miner_types
+
+
+def make_axon(hotkey: str, ip: str = "127.0.0.1", port: int = 8091) -> bt.AxonInfo:
+    return bt.AxonInfo(version=0, ip=ip, port=port, ip_type=4, hotkey=hotkey, coldkey="coldkey")
+
+
+class MinerTypeDendrite:
+    """Stand-in dendrite which reports a fixed miner type per hotkey and tracks how many calls are in flight."""
+
+    def __init__(self, miner_types: dict[str, MINER_TYPE], delay: float = 0.05) -> None:
+        self.miner_types = miner_types
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call(self, target_axon, synapse: QueryMinerType, timeout: float, deserialize: bool = False) -> QueryMinerType:  # noqa: ARG002, ASYNC109
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        synapse.miner_type = self.miner_types[target_axon.hotkey]
+        return synapse
+
+
+class TestQueryMinerTypes(unittest.IsolatedAsyncioTestCase):
+    async def test_query_miner_types(self) -> None:
+        miner_types = {f"hotkey-{uid}": MINER_TYPE.ALLOC if uid % 2 else MINER_TYPE.UNISWAP_V3_LP for uid in range(12)}
+        dendrite = MinerTypeDendrite(miner_types)
+        axons = {uid: make_axon(f"hotkey-{uid}") for uid in range(12)}
+
+        responses = await query_miner_types(dendrite, axons, max_concurrent_queries=3)
+
+        self.assertEqual(dendrite.max_in_flight, 3)
+        self.assertEqual(list(responses.keys()), list(range(12)))
+        for uid, response in responses.items():
+            self.assertEqual(response.miner_type, miner_types[f"hotkey-{uid}"])
+
+
+class TestGetStaleMinerTypeUids(unittest.TestCase):
+    def test_get_stale_miner_type_uids(self) -> None:
+        cache = {
+            "fresh": MinerTypeCacheEntry(miner_type=MINER_TYPE.ALLOC, axon=("127.0.0.1", 8091), probed_at=1000),
+            "expired": MinerTypeCacheEntry(miner_type=MINER_TYPE.ALLOC, axon=("127.0.0.1", 8091), probed_at=0),
+            "moved": MinerTypeCacheEntry(miner_type=MINER_TYPE.ALLOC, axon=("127.0.0.1", 8091), probed_at=1000),
+        }
+        axons = [
+            make_axon("fresh"),
+            make_axon("expired"),
+            make_axon("moved", port=8092),
+            make_axon("new"),
+        ]
+
+        stale_uids = get_stale_miner_type_uids(cache, axons, ttl=600, now=1200)
+
+        self.assertEqual(stale_uids, [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
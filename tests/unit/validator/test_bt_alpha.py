@@ -0,0 +1,131 @@
+import asyncio
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+from sturdy.utils.bt_alpha import ValiEpochStore, calculate_vali_apy, get_vali_avg_apy, prefetch_vali_epoch_data
+
+HOTKEYS = ["vali-a", "vali-b"]
+
+
+class CountingSubtensor:
+    """Stand-in subtensor which counts how many times each kind of read is made"""
+
+    def __init__(self, last_step: int = 1000) -> None:
+        self.reads = Counter()
+        self.last_step = last_step
+
+    async def all_subnets(self, block_number: int):  # noqa: ANN201, ARG002
+        self.reads["all_subnets"] += 1
+        await asyncio.sleep(0)
+        return [SimpleNamespace(netuid=netuid, tempo=10, last_step=self.last_step) for netuid in range(3)]
+
+    async def get_delegate_take(self, hotkey_ss58: str, block_hash: str) -> float:  # noqa: ARG002
+        self.reads["take"] += 1
+        return 0.18
+
+    async def determine_block_hash(self, block: int) -> str:
+        return f"0x{block:064x}"
+
+    @property
+    def substrate(self) -> "CountingSubstrate":
+        return CountingSubstrate(self.reads)
+
+
+class StorageKey(SimpleNamespace):
+    def to_hex(self) -> str:
+        return f"{self.storage_function}{self.params}"
+
+
+class CountingSubstrate:
+    """Stand-in substrate interface, serving the storage entries read for the validators' dividends"""
+
+    def __init__(self, reads: Counter) -> None:
+        self.reads = reads
+
+    async def create_storage_key(self, pallet: str, storage_function: str, params: list, block_hash: str) -> StorageKey:  # noqa: ARG002
+        return StorageKey(storage_function=storage_function, params=params)
+
+    async def query_multi(self, storage_keys: list[StorageKey], block_hash: str) -> list:  # noqa: ARG002
+        self.reads["query_multi"] += 1
+        self.reads["storage"] += len(storage_keys)
+        await asyncio.sleep(0)
+        values = {
+            "Uids": lambda netuid, hotkey: HOTKEYS.index(hotkey),  # noqa: ARG005
+            # the second validator has the default take
+            "Delegates": lambda hotkey: int(0.18 * 65535) if hotkey == HOTKEYS[0] else None,
+            "AlphaDividendsPerSubnet": lambda netuid, hotkey: int(1e9),  # noqa: ARG005
+            "TotalHotkeyAlpha": lambda hotkey, netuid: int(50_000e9),  # noqa: ARG005
+        }
+        return [(key, values[key.storage_function](*key.params)) for key in storage_keys]
+
+
+class TestPrefetchValiEpochData(unittest.IsolatedAsyncioTestCase):
+    async def test_reads_are_deduplicated(self) -> None:
+        subtensor = CountingSubtensor()
+        # many miners delegating to the same couple of validators
+        reads = [(1, HOTKEYS[miner % 2], 900) for miner in range(50)]
+
+        store = ValiEpochStore(path=None)
+        await prefetch_vali_epoch_data(subtensor, reads, end_block=1000, concurrency=4, store=store)
+        prefetched = dict(subtensor.reads)
+
+        # 10 epoch blocks: one storage query per block, reading 4 entries per validator
+        self.assertEqual(prefetched["query_multi"], 10)
+        self.assertEqual(prefetched["storage"], 80)
+        self.assertEqual(prefetched["take"], 10)
+        # the dynamic info of the subnet at the start and end blocks, each from a snapshot of all subnets
+        self.assertEqual(prefetched["all_subnets"], 2)
+        self.assertEqual(store.queries, 10)
+        self.assertEqual(store.fetches, 20)
+
+        # calculating each miner's apy afterwards is served entirely from the caches
+        apys = await asyncio.gather(
+            *(
+                get_vali_avg_apy(subtensor, netuid, hotkey, block, end_block=1000, delta_alpha_tao=miner, store=store)
+                for miner, (netuid, hotkey, block) in enumerate(reads)
+            )
+        )
+        self.assertEqual(dict(subtensor.reads), prefetched)
+        self.assertTrue(all(apy > 0 for apy in apys))
+        # more alpha delegated -> lower apy
+        self.assertGreater(apys[0], apys[-1])
+
+
+class TestValiEpochStore(unittest.IsolatedAsyncioTestCase):
+    async def test_incremental_and_persisted(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / "vali_epoch_store.json")
+            subtensor = CountingSubtensor(last_step=1000)
+            store = ValiEpochStore(path=path)
+            apy = await get_vali_avg_apy(subtensor, 1, HOTKEYS[0], 900, end_block=1000, store=store)
+            self.assertEqual(store.fetches, 10)
+            await store.save()
+
+            # a restarted validator only fetches the epochs since then
+            subtensor = CountingSubtensor(last_step=1050)
+            store = ValiEpochStore(path=path)
+            self.assertEqual(await get_vali_avg_apy(subtensor, 1, HOTKEYS[0], 950, end_block=1050, store=store), apy)
+            self.assertEqual(store.fetches, 5)
+            self.assertEqual(subtensor.reads["query_multi"], 5)
+
+            # other ranges and alpha deltas are calculated from the stored samples
+            lower_apy = await get_vali_avg_apy(
+                subtensor, 1, HOTKEYS[0], 900, end_block=1050, delta_alpha_tao=10_000, store=store
+            )
+            self.assertEqual(store.fetches, 5)
+            self.assertLess(lower_apy, apy)
+
+    def test_calculate_vali_apy(self) -> None:
+        self.assertEqual(calculate_vali_apy([]), 0)
+        # validators with too little stake are assumed to earn nothing
+        self.assertEqual(calculate_vali_apy([(1.0, 100.0)]), 0)
+        apy = calculate_vali_apy([(0.82, 50_000.0), (0.82, 50_000.0)])
+        self.assertAlmostEqual(apy, (1 + 0.82 / 50_000) ** 7280 - 1)
+        self.assertAlmostEqual(calculate_vali_apy([(0.82, 50_000.0), (1.0, 100.0)]), apy / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from web3 import AsyncWeb3
+
+from sturdy.abi import load_abi
+from sturdy.constants import CONTRACT_CACHE_SIZE
+from sturdy.utils.contracts import get_contract
+
+ADDRESS = "0x4d5F47FA6A74757f35C14fD3a6Ef8E3C9BC514E8"
+
+
+class TestContractCache(unittest.TestCase):
+    def test_load_abi(self) -> None:
+        abi = load_abi("IERC20")
+
+        self.assertIn("balanceOf", {entry.get("name") for entry in abi})
+        # only parsed once
+        self.assertIs(load_abi("IERC20"), abi)
+
+    def test_get_contract(self) -> None:
+        w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider("http://127.0.0.1:8545"))
+        other_w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider("http://127.0.0.1:8545"))
+
+        contract = get_contract(w3, "AToken", ADDRESS, decode_tuples=True)
+
+        self.assertEqual(contract.address, ADDRESS)
+        self.assertTrue(contract.decode_tuples)
+        # addresses are normalized, so the same contract is returned regardless of checksum
+        self.assertIs(get_contract(w3, "AToken", ADDRESS.lower(), decode_tuples=True), contract)
+        # different abi, decoding or provider -> different contract
+        self.assertIsNot(get_contract(w3, "IERC20", ADDRESS, decode_tuples=True), contract)
+        self.assertIsNot(get_contract(w3, "AToken", ADDRESS), contract)
+        self.assertIsNot(get_contract(other_w3, "AToken", ADDRESS, decode_tuples=True), contract)
+
+    def test_get_contract_evicts(self) -> None:
+        w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider("http://127.0.0.1:8545"))
+        contract = get_contract(w3, "IERC20", ADDRESS)
+
+        # the least recently used contracts are evicted once the cache is full
+        for idx in range(CONTRACT_CACHE_SIZE):
+            get_contract(w3, "IERC20", f"0x{idx:040x}")
+        self.assertIsNot(get_contract(w3, "IERC20", ADDRESS), contract)
+
+
+if __name__ == "__main__":
+    unittest.main()
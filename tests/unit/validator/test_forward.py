@@ -0,0 +1,93 @@
+import asyncio
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import bittensor as bt
+
+from sturdy.validator.forward import query_multiple_miners
+
+
+class EchoSynapse(bt.Synapse):
+    uid: int | None = None
+
+
+class SlowDendrite:
+    """Stand-in dendrite which answers each axon after a per-uid delay and tracks how many calls are in flight."""
+
+    def __init__(self, delays: dict[int, float]) -> None:
+        self.delays = delays
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call(self, target_axon, synapse: bt.Synapse, timeout: float, deserialize: bool = False) -> bt.Synapse:  # noqa: ARG002, ASYNC109
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays[target_axon])
+        finally:
+            self.in_flight -= 1
+        synapse.dendrite.process_time = self.delays[target_axon]
+        synapse.uid = target_axon
+        return synapse
+
+
+def make_validator(dendrite: SlowDendrite, n: int, timeout: float = 0.5, max_concurrent_queries: int = 4) -> SimpleNamespace:
+    return SimpleNamespace(
+        dendrite=dendrite,
+        # the "axon" of each uid is just the uid itself - it's what SlowDendrite uses to look up delays
+        metagraph=SimpleNamespace(axons=list(range(n))),
+        config=SimpleNamespace(
+            neuron=SimpleNamespace(timeout=timeout),
+            validator=SimpleNamespace(max_concurrent_queries=max_concurrent_queries),
+        ),
+    )
+
+
+class TestQueryMultipleMiners(unittest.IsolatedAsyncioTestCase):
+    async def test_results_keep_uid_order(self) -> None:
+        # later uids respond first
+        delays = {uid: 0.05 * (8 - uid) for uid in range(8)}
+        vali = make_validator(SlowDendrite(delays), n=8, max_concurrent_queries=8)
+        uids = [str(uid) for uid in [3, 0, 7, 5, 1, 6, 2, 4]]
+
+        responses = await query_multiple_miners(vali, EchoSynapse(), uids)
+
+        self.assertEqual([r.uid for r in responses], [int(uid) for uid in uids])
+
+    async def test_concurrency_is_bounded(self) -> None:
+        n = 16
+        dendrite = SlowDendrite(dict.fromkeys(range(n), 0.05))
+        vali = make_validator(dendrite, n=n, max_concurrent_queries=4)
+
+        start = time.monotonic()
+        responses = await query_multiple_miners(vali, EchoSynapse(), [str(uid) for uid in range(n)])
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(responses), n)
+        self.assertEqual(dendrite.max_in_flight, 4)
+        # 16 queries with 4 in flight -> ~4 rounds, far less than running them one after another
+        self.assertLess(elapsed, 0.05 * n / 2)
+
+    async def test_slow_miner_hits_deadline(self) -> None:
+        delays = {0: 0.01, 1: 10.0, 2: 0.01}
+        vali = make_validator(SlowDendrite(delays), n=3, timeout=0.1)
+
+        # shrink the deadline buffer so the test runs quickly
+        with patch.object(sys.modules[query_multiple_miners.__module__], "QUERY_DEADLINE_BUFFER", 0.1):
+            start = time.monotonic()
+            responses = await query_multiple_miners(vali, EchoSynapse(), ["0", "1", "2"])
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(responses[0].uid, 0)
+        self.assertEqual(responses[2].uid, 2)
+        # the slow miner is reported as having taken the whole timeout
+        self.assertEqual(responses[1].dendrite.process_time, 0.1)
+        self.assertIsNone(responses[1].uid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+
+from web3 import AsyncWeb3
+
+from sturdy.pools import POOL_TYPES, BittensorAlphaTokenPool, get_snapshot_blocks, sync_pools
+from sturdy.providers import POOL_DATA_PROVIDER_TYPE
+from sturdy.utils.multicall import get_multicall3_contract, multicall, run_read_rounds
+from tests.helpers import ASSET_A, ASSET_B, ERC20_ABI, USER, FakeChainProvider, FakeSubtensor, SnapshotSubtensor, TokenPool
+
+
+class TestMulticall(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.provider = FakeChainProvider()
+        self.w3 = AsyncWeb3(self.provider)
+        self.token_a = self.w3.eth.contract(address=ASSET_A, abi=ERC20_ABI)
+        self.token_b = self.w3.eth.contract(address=ASSET_B, abi=ERC20_ABI)
+
+    async def test_multicall(self) -> None:
+        calls = [
+            self.token_a.functions.decimals(),
+            self.token_a.functions.balanceOf(USER),
+            self.token_b.functions.decimals(),
+            self.token_b.functions.balanceOf(USER),
+        ]
+        results = await multicall(self.w3, calls)
+
+        self.assertEqual(results, [6, 1000, 18, 42])
+        self.assertEqual(self.provider.eth_calls, 1)
+
+    async def test_multicall_fallback(self) -> None:
+        self.provider.multicall_deployed = False
+        results = await multicall(self.w3, [self.token_a.functions.decimals(), self.token_b.functions.balanceOf(USER)])
+
+        self.assertEqual(results, [6, 42])
+        # the failed multicall + one call per read
+        self.assertEqual(self.provider.eth_calls, 3)
+
+    async def test_multicall_fallback_block_timestamp(self) -> None:
+        self.provider.multicall_deployed = False
+        timestamp_read = get_multicall3_contract(self.w3).functions.getCurrentBlockTimestamp()
+        results = await multicall(self.w3, [timestamp_read, self.token_a.functions.decimals()], block_identifier=100)
+
+        # the block timestamp is read from the block itself
+        self.assertEqual(results, [0x6553F100, 6])
+        self.assertEqual(self.provider.call_blocks, ["0x64", "0x64", "0x64"])
+
+    async def test_run_read_rounds(self) -> None:
+        synced = {}
+
+        def token_reads(name: str, token):  # noqa: ANN202
+            results = yield {"decimals": token.functions.decimals()}
+            synced[name] = {"decimals": results["decimals"]}
+            results = yield {"balance": token.functions.balanceOf(USER)}
+            synced[name]["balance"] = results["balance"]
+
+        def failing_reads():  # noqa: ANN202
+            yield {"decimals": self.token_a.functions.decimals()}
+            raise ValueError("bad pool")
+
+        errors = await run_read_rounds(
+            self.w3, [token_reads("a", self.token_a), failing_reads(), token_reads("b", self.token_b)]
+        )
+
+        self.assertEqual(synced, {"a": {"decimals": 6, "balance": 1000}, "b": {"decimals": 18, "balance": 42}})
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], ValueError)
+        self.assertIsNone(errors[2])
+        # one multicall per round - not per read or per pool
+        self.assertEqual(self.provider.eth_calls, 2)
+
+    async def test_sync_pools_pins_block(self) -> None:
+        pools = [
+            TokenPool(pool_type=POOL_TYPES.YEARN_V3, contract_address=address, user_address=USER)
+            for address in (ASSET_A, ASSET_B)
+        ]
+        await sync_pools(pools, self.w3)
+
+        self.assertEqual((pools[0]._decimals, pools[0]._user_deposits), (6, 1000))
+        self.assertEqual((pools[1]._decimals, pools[1]._user_deposits), (18, 42))
+        # the block is resolved once, and every read is made at it
+        self.assertEqual(self.provider.block_number_requests, 1)
+        self.assertEqual(self.provider.call_blocks, ["0x64", "0x64"])
+
+        # an explicitly given block is used as is
+        self.provider.call_blocks = []
+        await pools[0].sync(self.w3, block_identifier=42)
+        self.assertEqual(self.provider.block_number_requests, 1)
+        self.assertEqual(self.provider.call_blocks, ["0x2a", "0x2a"])
+
+    async def test_sync_pools_with_providers(self) -> None:
+        subtensor = FakeSubtensor()
+        providers = {POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET: self.w3, POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: subtensor}
+        token_pools = [
+            TokenPool(pool_type=POOL_TYPES.YEARN_V3, contract_address=address, user_address=USER)
+            # the last token is unknown to the chain, so reading from it fails
+            for address in (ASSET_A, ASSET_B, USER)
+        ]
+        alpha_pools = [BittensorAlphaTokenPool(netuid=netuid, current_amount=0) for netuid in range(1, 9)]
+
+        errors = await sync_pools([*token_pools, *alpha_pools], providers, concurrency=2)
+
+        self.assertEqual(subtensor.max_in_flight, 2)
+        self.assertEqual([pool._price_rao for pool in alpha_pools], list(range(1, 9)))
+        self.assertEqual((token_pools[1]._decimals, token_pools[1]._user_deposits), (18, 42))
+        # errors are collected per pool
+        self.assertIsNone(errors[0])
+        self.assertIsNone(errors[1])
+        self.assertIsInstance(errors[2], Exception)
+        self.assertEqual(errors[3:], [None] * len(alpha_pools))
+
+    async def test_sync_alpha_pools_from_snapshot(self) -> None:
+        # the last subnet is missing from the snapshot
+        subtensor = SnapshotSubtensor(netuids=list(range(8)))
+        alpha_pools = [BittensorAlphaTokenPool(netuid=netuid, current_amount=0) for netuid in range(1, 9)]
+
+        errors = await sync_pools(alpha_pools, subtensor)
+
+        self.assertEqual(errors, [None] * len(alpha_pools))
+        self.assertEqual([pool._price_rao for pool in alpha_pools], list(range(1, 9)))
+        self.assertEqual(subtensor.snapshot_reads, 1)
+        self.assertEqual(subtensor.subnet_reads, 1)
+
+        # the snapshot is shared by every sync at the same block
+        await sync_pools(alpha_pools[:3], subtensor)
+        self.assertEqual(subtensor.snapshot_reads, 1)
+        self.assertEqual(subtensor.subnet_reads, 1)
+
+    async def test_sync_pools_at_forward_step_blocks(self) -> None:
+        subtensor = SnapshotSubtensor(netuids=list(range(1, 4)))
+        providers = {POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET: self.w3, POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: subtensor}
+        blocks = await get_snapshot_blocks(providers)
+        self.assertEqual(
+            blocks, {POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET: 100, POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: 100}
+        )
+
+        # each pool is read at the block of its provider type
+        blocks = {POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET: 42, POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: 69}
+        token_pools = [
+            TokenPool(pool_type=POOL_TYPES.YEARN_V3, contract_address=address, user_address=USER)
+            for address in (ASSET_A, ASSET_B)
+        ]
+        alpha_pools = [BittensorAlphaTokenPool(netuid=netuid, current_amount=0) for netuid in range(1, 4)]
+        errors = await sync_pools([*token_pools, *alpha_pools], providers, block_identifier=blocks)
+
+        self.assertEqual(errors, [None] * 5)
+        self.assertEqual(self.provider.block_number_requests, 1)
+        self.assertEqual(self.provider.call_blocks, ["0x2a", "0x2a"])
+        self.assertEqual(subtensor.snapshot_blocks, [69])
+
+
+if __name__ == "__main__":
+    unittest.main()
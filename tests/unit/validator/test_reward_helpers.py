@@ -8,6 +8,7 @@ from web3 import AsyncWeb3
 from web3.constants import ADDRESS_ZERO
 
 from sturdy.algo import naive_algorithm
+from sturdy.constants import APY_BIN_THRESHOLD_FALLBACK
 from sturdy.pool_registry.pool_registry import POOL_REGISTRY
 from sturdy.pools import *
 from sturdy.protocol import REQUEST_TYPES, AllocateAssets
@@ -17,6 +18,7 @@ from sturdy.validator.apy_binning import (
     calculate_allocation_distance,
     calculate_base_rewards,
     calculate_bin_rewards,
+    calculate_cv_threshold,
     create_apy_bins,
     format_allocations,
     normalize_bin_rewards,
@@ -695,6 +697,18 @@ class TestApyBinning(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(bins[0]), 1)
         self.assertEqual(bins[0][0], "0")
 
+    async def test_calculate_cv_threshold(self) -> None:
+        # no subset above a percentile cutoff with more than one distinct apy
+        self.assertEqual(calculate_cv_threshold([int(1.05e18)]), APY_BIN_THRESHOLD_FALLBACK)
+        self.assertEqual(calculate_cv_threshold([1, 2]), APY_BIN_THRESHOLD_FALLBACK)
+        self.assertEqual(calculate_cv_threshold([3, 3, 3]), APY_BIN_THRESHOLD_FALLBACK)
+
+        # apys which differ far below float64 precision - the 95th percentile leaves only the top apy, so the 90th
+        # percentile's subset (the top two apys) is used
+        apys = [10**18 + i for i in range(20)]
+        expected = 0.5**0.5 / (10**18 + 18.5)
+        self.assertAlmostEqual(calculate_cv_threshold(apys) / expected, 1.0, places=12)
+
 
 class TestBinRewards(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
@@ -0,0 +1,136 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+from web3 import AsyncWeb3
+
+from sturdy.pools import POOL_TYPES, get_snapshot_blocks, sync_pools
+from sturdy.protocol import MINER_TYPE
+from sturdy.providers import POOL_DATA_PROVIDER_TYPE
+from sturdy.utils.rpc_cache import EthCallCache, construct_eth_call_cache_middleware
+from sturdy.validator.async_sql import close_async_dbs
+from sturdy.validator.forward import get_metadata, query_and_score_miners_allocs
+from sturdy.validator.sql import close_db_connections, get_db_connection
+from tests.helpers import ASSET_A, ASSET_B, USER, FakeChainProvider, TokenPool, create_tables
+
+
+class TestEthCallCache(unittest.TestCase):
+    def test_lru_eviction(self) -> None:
+        cache = EthCallCache(max_entries=2, max_block_age=10)
+        cache.put((1, 100, "0xa", "0x01"), {"result": "0x1"})
+        cache.put((1, 100, "0xa", "0x02"), {"result": "0x2"})
+        # touch the first entry, so the second one is the least recently used
+        self.assertEqual(cache.get((1, 100, "0xa", "0x01")), {"result": "0x1"})
+        cache.put((1, 100, "0xa", "0x03"), {"result": "0x3"})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get((1, 100, "0xa", "0x02")))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_block_age_eviction(self) -> None:
+        cache = EthCallCache(max_entries=100, max_block_age=10)
+        cache.put((1, 100, "0xa", "0x01"), {"result": "0x1"})
+        cache.put((2, 100, "0xa", "0x01"), {"result": "0x1"})
+        cache.put((1, 111, "0xa", "0x01"), {"result": "0x1"})
+        # too old to be worth caching
+        cache.put((1, 90, "0xa", "0x01"), {"result": "0x1"})
+
+        self.assertIsNone(cache.get((1, 100, "0xa", "0x01")))
+        self.assertIsNone(cache.get((1, 90, "0xa", "0x01")))
+        # other chains are aged separately
+        self.assertIsNotNone(cache.get((2, 100, "0xa", "0x01")))
+        self.assertIsNotNone(cache.get((1, 111, "0xa", "0x01")))
+
+
+class TestEthCallCacheMiddleware(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.cache = EthCallCache()
+        self.provider = FakeChainProvider()
+        self.w3 = AsyncWeb3(self.provider)
+        self.w3.middleware_onion.add(construct_eth_call_cache_middleware(self.cache), name="eth_call_cache")
+        self.pools = [
+            TokenPool(pool_type=POOL_TYPES.YEARN_V3, contract_address=address, user_address=USER)
+            for address in (ASSET_A, ASSET_B)
+        ]
+
+    async def test_reads_at_same_block_are_cached(self) -> None:
+        await sync_pools(self.pools, self.w3, block_identifier=100)
+        self.assertEqual(self.provider.eth_calls, 2)
+
+        # e.g. scoring after challenge generation - served entirely from the cache
+        other_pools = [
+            TokenPool(pool_type=POOL_TYPES.YEARN_V3, contract_address=address, user_address=USER)
+            for address in (ASSET_A, ASSET_B)
+        ]
+        await sync_pools(other_pools, self.w3, block_identifier=100)
+        self.assertEqual(self.provider.eth_calls, 2)
+        self.assertEqual((other_pools[1]._decimals, other_pools[1]._user_deposits), (18, 42))
+
+        # a new block is read from the node
+        await sync_pools(self.pools, self.w3, block_identifier=101)
+        self.assertEqual(self.provider.eth_calls, 4)
+
+    async def test_latest_is_not_cached(self) -> None:
+        token = self.pools[0]
+        await token.pool_init(self.w3)
+        await token._token_contract.functions.decimals().call()
+        await token._token_contract.functions.decimals().call()
+
+        self.assertEqual(self.provider.eth_calls, 2)
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestForwardStepCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_dir = str(Path(self.tmp_dir.name) / "test.db")
+        with get_db_connection(self.db_dir) as conn:
+            create_tables(conn)
+
+        self.cache = EthCallCache()
+        self.provider = FakeChainProvider()
+        self.w3 = AsyncWeb3(self.provider)
+        self.w3.middleware_onion.add(construct_eth_call_cache_middleware(self.cache), name="eth_call_cache")
+        self.vali = SimpleNamespace(
+            miner_types={"0": MINER_TYPE.ALLOC},
+            pool_data_providers={POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET: self.w3},
+            scores=np.zeros(1),
+            step=0,
+            update_scores=lambda *_: None,
+            config=SimpleNamespace(
+                db_dir=self.db_dir,
+                neuron=SimpleNamespace(timeout=10, alloc_moving_average_alpha=0.1),
+                validator=SimpleNamespace(pool_sync_concurrency=4),
+            ),
+        )
+
+    async def asyncTearDown(self) -> None:
+        await close_async_dbs()
+        close_db_connections(self.db_dir)
+        self.tmp_dir.cleanup()
+
+    async def test_challenge_reads_are_cached(self) -> None:
+        pools = {
+            address: TokenPool(pool_type=POOL_TYPES.DAI_SAVINGS, contract_address=address, user_address=USER)
+            for address in (ASSET_A, ASSET_B)
+        }
+        assets_and_pools = {"total_assets": 1000, "pools": pools}
+        blocks = await get_snapshot_blocks(self.vali.pool_data_providers)
+
+        # the challenge is synced after querying the miners, and again when reading its metadata - at the same block
+        response = SimpleNamespace(allocations={ASSET_A: 1000, ASSET_B: 0}, dendrite=SimpleNamespace(process_time=1.0))
+        with patch("sturdy.validator.forward.query_multiple_miners", return_value=[response]):
+            await query_and_score_miners_allocs(self.vali, assets_and_pools, self.w3, block_identifier=blocks)
+        eth_calls = self.provider.eth_calls
+        await get_metadata(pools, self.w3, block_identifier=blocks[POOL_DATA_PROVIDER_TYPE.ETHEREUM_MAINNET])
+
+        self.assertEqual(self.provider.eth_calls, eth_calls)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.provider.block_number_requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
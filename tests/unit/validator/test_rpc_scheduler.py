@@ -0,0 +1,121 @@
+import asyncio
+import time
+import unittest
+from typing import Any
+
+from web3 import AsyncWeb3
+
+from sturdy.utils.misc import async_retry_with_backoff
+from sturdy.utils.rpc_scheduler import RetriesExceededError, RpcScheduler, construct_rpc_scheduler_middleware
+from tests.helpers import ASSET_A, ERC20_ABI, FakeChainProvider
+
+
+class FlakyRequest:
+    """Stand-in request which is rate limited a given number of times before it succeeds"""
+
+    def __init__(self, throttled_times: int, delay: float = 0.0) -> None:
+        self.throttled_times = throttled_times
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.calls <= self.throttled_times:
+            raise ValueError("Rate limited")
+        return "ok"
+
+
+class ThrottlingChainProvider(FakeChainProvider):
+    """Fake chain provider which rate limits the first few eth_calls it receives"""
+
+    def __init__(self, throttled_calls: int) -> None:
+        super().__init__()
+        self.throttled_calls = throttled_calls
+
+    async def make_request(self, method: str, params: Any) -> dict:
+        if method == "eth_call" and self.throttled_calls > 0:
+            self.throttled_calls -= 1
+            return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "limit exceeded"}}
+        return await super().make_request(method, params)
+
+
+class TestRpcScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_retries_with_backoff(self) -> None:
+        scheduler = RpcScheduler(base_delay=0.02)
+        request = FlakyRequest(throttled_times=2)
+
+        start = time.monotonic()
+        result = await scheduler.run(request)
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(request.calls, 3)
+        # the backoff is actually waited for: >= 0.01 + 0.02 seconds with jitter
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+        self.assertEqual((scheduler.stats.retries, scheduler.stats.throttles, scheduler.stats.failures), (2, 2, 0))
+
+    async def test_retries_exceeded(self) -> None:
+        scheduler = RpcScheduler(max_retries=2, base_delay=0.001)
+        request = FlakyRequest(throttled_times=10)
+
+        with self.assertRaises(RetriesExceededError):  # noqa: PT027
+            await scheduler.run(request)
+        self.assertEqual(request.calls, 3)
+        self.assertEqual(scheduler.stats.failures, 1)
+
+    async def test_other_errors_are_not_retried(self) -> None:
+        scheduler = RpcScheduler()
+
+        async def reverts() -> None:
+            raise ValueError("execution reverted")
+
+        with self.assertRaises(ValueError):  # noqa: PT027
+            await scheduler.run(reverts)
+        self.assertEqual(scheduler.stats.retries, 0)
+
+    async def test_concurrency_cap(self) -> None:
+        scheduler = RpcScheduler(rate_limit=None, max_concurrent_requests=3)
+        request = FlakyRequest(throttled_times=0, delay=0.01)
+
+        await asyncio.gather(*(scheduler.run(request) for _ in range(10)))
+
+        self.assertEqual(request.max_in_flight, 3)
+        self.assertGreater(scheduler.stats.queue_wait, 0)
+
+    async def test_token_bucket(self) -> None:
+        scheduler = RpcScheduler(rate_limit=200, burst=1, max_concurrent_requests=None)
+        request = FlakyRequest(throttled_times=0)
+
+        start = time.monotonic()
+        await asyncio.gather(*(scheduler.run(request) for _ in range(11)))
+
+        # one request right away, then one every 5ms
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+        self.assertEqual(scheduler.stats.requests, 11)
+
+    async def test_async_retry_with_backoff(self) -> None:
+        request = FlakyRequest(throttled_times=1)
+
+        self.assertEqual(await async_retry_with_backoff(request), "ok")
+        self.assertEqual(request.calls, 2)
+
+    async def test_middleware(self) -> None:
+        scheduler = RpcScheduler(base_delay=0.001)
+        provider = ThrottlingChainProvider(throttled_calls=2)
+        w3 = AsyncWeb3(provider)
+        w3.middleware_onion.add(construct_rpc_scheduler_middleware(scheduler), name="rpc_scheduler")
+        token = w3.eth.contract(address=ASSET_A, abi=ERC20_ABI)
+
+        self.assertEqual(await token.functions.decimals().call(), 6)
+        self.assertEqual(scheduler.stats.throttles, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+
+from sturdy.pools import BittensorAlphaTokenPool
+from sturdy.protocol import MINER_TYPE, REQUEST_TYPES
+from sturdy.providers import POOL_DATA_PROVIDER_TYPE
+from sturdy.validator.async_sql import close_async_dbs, get_async_db
+from sturdy.validator.forward import query_and_score_miners_allocs
+from sturdy.validator.reward import get_pool_key, get_request_pools, get_rewards_allocs, sync_scoring_pools
+from sturdy.validator.sql import ALLOCATION_REQUESTS_TABLE, close_db_connections, get_db_connection
+from tests.helpers import FakeSubtensor, SnapshotSubtensor, create_tables
+
+
+def serialize_alpha_pools(netuids: list[int], current_amount: int) -> dict[str, dict]:
+    return {
+        str(netuid): BittensorAlphaTokenPool(netuid=netuid, current_amount=current_amount).model_dump() for netuid in netuids
+    }
+
+
+class TestScoringPools(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.subtensor = FakeSubtensor()
+        self.vali = SimpleNamespace(
+            pool_data_providers={POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: self.subtensor},
+            config=SimpleNamespace(validator=SimpleNamespace(pool_sync_concurrency=4)),
+        )
+
+    async def test_distinct_pools_are_synced_once(self) -> None:
+        requests_pools = [
+            serialize_alpha_pools([1, 2, 3], current_amount=100),
+            serialize_alpha_pools([1, 2, 3], current_amount=200),
+            serialize_alpha_pools([2, 3, 4], current_amount=300),
+        ]
+
+        synced_pools = await sync_scoring_pools(self.vali, requests_pools)
+
+        self.assertEqual(self.subtensor.subnet_reads, 4)
+        self.assertEqual(len(synced_pools), 4)
+
+        # each request gets the shared subnet state, with its own amount in the pool
+        first = get_request_pools(requests_pools[0], synced_pools)
+        second = get_request_pools(requests_pools[1], synced_pools)
+        self.assertEqual([pool._price_rao for pool in first.values()], [1, 2, 3])
+        self.assertEqual([pool.current_amount for pool in first.values()], [100] * 3)
+        self.assertEqual([pool.current_amount for pool in second.values()], [200] * 3)
+
+    async def test_missing_pools(self) -> None:
+        synced_pools = await sync_scoring_pools(self.vali, [serialize_alpha_pools([1], current_amount=0)])
+
+        self.assertIn(get_pool_key(serialize_alpha_pools([1], current_amount=5)["1"]), synced_pools)
+        self.assertIsNone(get_request_pools(serialize_alpha_pools([1, 2], current_amount=0), synced_pools))
+
+
+class TestScoringPass(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_dir = str(Path(self.tmp_dir.name) / "test.db")
+        with get_db_connection(self.db_dir) as conn:
+            create_tables(conn)
+
+        self.subtensor = SnapshotSubtensor(netuids=[1, 2, 3])
+        self.vali = SimpleNamespace(
+            miner_types={"0": MINER_TYPE.ALLOC},
+            pool_data_providers={POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: self.subtensor},
+            scores=np.zeros(1),
+            similarity_penalties={},
+            step=0,
+            update_scores=lambda *_: None,
+            config=SimpleNamespace(
+                db_dir=self.db_dir,
+                neuron=SimpleNamespace(timeout=10, alloc_moving_average_alpha=0.1),
+                validator=SimpleNamespace(pool_sync_concurrency=4),
+            ),
+        )
+
+    async def asyncTearDown(self) -> None:
+        await close_async_dbs()
+        close_db_connections(self.db_dir)
+        self.tmp_dir.cleanup()
+
+    async def log_active_alloc(self, request_uid: str, pools: dict[str, dict]) -> None:
+        # scoring periods which have just ended are up for scoring
+        await get_async_db(self.db_dir).log_allocations(
+            request_uid,
+            [],
+            {"total_assets": 100, "pools": pools},
+            {},
+            {},
+            {},
+            REQUEST_TYPES.SYNTHETIC,
+            scoring_period=-1,
+        )
+
+    async def run_scoring_pass(self) -> list[str]:
+        """Runs a scoring pass, and returns the requests which were scored. Only malformed requests are actually scored."""
+        assets_and_pools = {"total_assets": 100, "pools": {"1": BittensorAlphaTokenPool(netuid=1, current_amount=0)}}
+        response = SimpleNamespace(allocations={"1": 100}, dendrite=SimpleNamespace(process_time=1.0))
+        scored = []
+
+        # the pool of subnet 3 fails to sync for the scoring pass
+        async def sync_pools(pools: list[BittensorAlphaTokenPool], *_: Any, **__: Any) -> list[Exception | None]:
+            return [ConnectionError("failed to read subnet") if pool.netuid == 3 else None for pool in pools]
+
+        async def rewards_allocs(vali: SimpleNamespace, active_alloc: dict, *args: Any, **kwargs: Any) -> tuple:
+            scored.append(active_alloc["request_uid"])
+            return (
+                await get_rewards_allocs(vali, active_alloc, *args, **kwargs)
+                if active_alloc["request_uid"] == "malformed"
+                else ([], {}, False)
+            )
+
+        with (
+            patch("sturdy.validator.reward.sync_pools", side_effect=sync_pools),
+            patch("sturdy.validator.forward.query_multiple_miners", return_value=[response]),
+            patch("sturdy.validator.forward.get_rewards_allocs", side_effect=rewards_allocs),
+        ):
+            await query_and_score_miners_allocs(
+                self.vali,
+                assets_and_pools,
+                self.subtensor,
+                block_identifier={POOL_DATA_PROVIDER_TYPE.BITTENSOR_MAINNET: 100},
+            )
+        return scored
+
+    async def get_active_request_uids(self) -> list[str]:
+        return [active_alloc["request_uid"] for active_alloc in await get_async_db(self.db_dir).get_active_allocs()]
+
+    async def test_unsynced_requests_are_kept(self) -> None:
+        await self.log_active_alloc("unsynced", serialize_alpha_pools([2, 3], current_amount=0))
+        await self.log_active_alloc("synced", serialize_alpha_pools([1, 2], current_amount=0))
+
+        self.assertEqual(await self.run_scoring_pass(), ["synced"])
+        self.assertEqual(await self.get_active_request_uids(), ["unsynced"])
+
+    async def test_malformed_requests(self) -> None:
+        # a request whose pools can't be loaded doesn't get in the way of scoring the others - it's removed
+        await self.log_active_alloc("malformed", {})
+        await get_async_db(self.db_dir).write(
+            lambda conn: conn.execute(
+                f"UPDATE {ALLOCATION_REQUESTS_TABLE} SET assets_and_pools = json('{{}}') WHERE request_uid = 'malformed'"
+            )
+        )
+        await self.log_active_alloc("synced", serialize_alpha_pools([1, 2], current_amount=0))
+
+        self.assertEqual(await self.run_scoring_pass(), ["malformed", "synced"])
+        self.assertEqual(await self.get_active_request_uids(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import gmpy2
+import numpy as np
+
+from sturdy.validator.apy_binning import (
+    apply_similarity_penalties,
+    calculate_allocation_distance,
+    count_earlier_similar_allocations,
+    format_allocations,
+)
+
+TOTAL_ASSETS = int(1_000_000e18)
+NUM_POOLS = 6
+
+
+def pairwise_similarity_penalties(
+    bins: dict, apys_and_allocations: dict, axon_times: dict, assets_and_pools: dict, miner_uids: list, threshold: float
+) -> np.ndarray:
+    """Compares every miner with every earlier miner in its bin, one pair at a time"""
+    penalties = np.zeros(len(miner_uids))
+    allocs = format_allocations(apys_and_allocations, assets_and_pools)
+    for bin_miners in bins.values():
+        sorted_miners = sorted(bin_miners, key=lambda uid: axon_times[uid])
+        for i, uid_a in enumerate(sorted_miners):
+            alloc_a = np.array([gmpy2.mpz(val) for val in allocs[uid_a]["allocations"].values()], dtype=object)
+            similar_count = 0
+            for uid_b in sorted_miners[:i]:
+                alloc_b = np.array([gmpy2.mpz(val) for val in allocs[uid_b]["allocations"].values()], dtype=object)
+                if calculate_allocation_distance(alloc_a, alloc_b, assets_and_pools["total_assets"]) < threshold:
+                    similar_count += 1
+            if i > 0:
+                penalties[miner_uids.index(uid_a)] = similar_count / i
+    return penalties
+
+
+def make_miners(rng: np.random.RandomState, num_miners: int) -> dict:
+    pools = [f"pool{idx}" for idx in range(NUM_POOLS)]
+    originals = [rng.dirichlet(np.ones(NUM_POOLS)) * TOTAL_ASSETS for _ in range(5)]
+    apys_and_allocations = {}
+    for uid in range(num_miners):
+        base = originals[rng.randint(len(originals))]
+        match uid % 4:
+            case 0:
+                # exact copy
+                amounts = base
+            case 1:
+                # copy with a bit of noise - some within the similarity threshold, some not
+                amounts = np.clip(base + rng.normal(0, TOTAL_ASSETS * 1e-4, NUM_POOLS), 0, None)
+            case 2:
+                amounts = rng.dirichlet(np.ones(NUM_POOLS)) * TOTAL_ASSETS
+            case _:
+                amounts = base + rng.uniform(0, 1, NUM_POOLS)
+        allocations = {pool: int(amount) for pool, amount in zip(pools, amounts, strict=True)}
+        if uid % 9 == 0:
+            # float allocations and missing pools
+            allocations[pools[0]] = float(allocations[pools[0]])
+            del allocations[pools[-1]]
+        apys_and_allocations[str(uid)] = {"apy": 0, "allocations": allocations}
+    return apys_and_allocations
+
+
+class TestSimilarityPenalties(unittest.TestCase):
+    def test_matches_pairwise_comparison(self) -> None:
+        rng = np.random.RandomState(42)
+        apys_and_allocations = make_miners(rng, 300)
+        assets_and_pools = {"total_assets": TOTAL_ASSETS, "pools": {f"pool{idx}": None for idx in range(NUM_POOLS)}}
+        miner_uids = list(apys_and_allocations)
+        axon_times = {uid: float(rng.uniform(0, 10)) for uid in miner_uids}
+        bins = {0: miner_uids[:200], 1: miner_uids[200:]}
+
+        for threshold in (1e-4, 1e-3, 0.0):
+            penalties = apply_similarity_penalties(
+                bins, apys_and_allocations, axon_times, assets_and_pools, miner_uids, similarity_threshold=threshold
+            )
+            expected = pairwise_similarity_penalties(
+                bins, apys_and_allocations, axon_times, assets_and_pools, miner_uids, threshold
+            )
+            np.testing.assert_array_equal(penalties, expected)
+
+    def test_count_earlier_similar_allocations(self) -> None:
+        allocations = [(100, 0), (0, 100), (100, 0), (100, 1), (100, 0)]
+
+        counts = count_earlier_similar_allocations(allocations, total_assets=100, similarity_threshold=0.05)
+
+        self.assertEqual(counts.tolist(), [0, 0, 1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import gzip
 import json
 import sqlite3
+import tempfile
 import unittest
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -7,15 +9,20 @@ from pathlib import Path
 from sturdy.protocol import REQUEST_TYPES
 from sturdy.validator.sql import (
     add_api_key,
+    archive_allocations,
+    close_db_connections,
     delete_api_key,
     get_all_api_keys,
     get_all_logs_for_key,
     get_api_key_info,
     get_db_connection,
+    get_db_connection_pool,
+    get_log_rollups_for_key,
     get_miner_responses,
     get_request_info,
     log_allocations,
     log_request,
+    rollup_logs,
     update_api_key_balance,
     update_api_key_name,
     update_api_key_rate_limit,
@@ -28,6 +35,7 @@ TEST_DB = "test.db"
 class TestSQLFunctions(unittest.TestCase):
     def setUp(self) -> None:
         # purge sql db
+        close_db_connections(TEST_DB)
         path = Path(TEST_DB)
         if path.exists():
             path.unlink()
@@ -36,7 +44,8 @@ class TestSQLFunctions(unittest.TestCase):
             create_tables(conn)
 
     def tearDown(self) -> None:
-        # purge sql db
+        # purge sql db - closing the connections to it also checkpoints and removes its WAL
+        close_db_connections(TEST_DB)
         path = Path(TEST_DB)
         if path.exists():
             path.unlink()
@@ -128,6 +137,36 @@ class TestSQLFunctions(unittest.TestCase):
             tables = cursor.fetchall()
             self.assertGreater(len(tables), 0)
 
+    def test_db_connection_pool(self) -> None:
+        pool = get_db_connection_pool(TEST_DB)
+        with get_db_connection(TEST_DB) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            add_api_key(conn, "test_key", 100.0, 60, "Test Key")
+            writer = conn
+            # changes which aren't committed are rolled back when the connection is handed back
+            conn.execute("UPDATE api_keys SET balance = 0 WHERE key = ?", ("test_key",))
+
+        # the same writer connection is reused
+        with get_db_connection(TEST_DB) as conn:
+            self.assertIs(conn, writer)
+            self.assertFalse(conn.in_transaction)
+
+        with get_db_connection(TEST_DB, readonly=True) as conn:
+            self.assertIsNot(conn, writer)
+            reader = conn
+            self.assertEqual(get_api_key_info(conn, "test_key")["balance"], 100.0)
+            with self.assertRaises(sqlite3.OperationalError):  # noqa: PT027
+                conn.execute("DELETE FROM api_keys")
+
+        # idle readers are reused too
+        with get_db_connection(TEST_DB, readonly=True) as conn:
+            self.assertIs(conn, reader)
+        self.assertIs(get_db_connection_pool(TEST_DB), pool)
+
+        close_db_connections(TEST_DB)
+        self.assertTrue(pool.closed)
+        self.assertIsNot(get_db_connection_pool(TEST_DB), pool)
+
     def test_log_allocations(self) -> None:
         with get_db_connection(TEST_DB) as conn:
             request_uid = "sturdyrox"
@@ -212,6 +251,81 @@ class TestSQLFunctions(unittest.TestCase):
                     self.assertIn(pool_id, row["allocation"])
                     self.assertEqual(json.loads(row["allocation"])[pool_id], allocation_value)
 
+    def test_rollup_logs(self) -> None:
+        now = datetime.now()  # noqa: DTZ005
+        with get_db_connection(TEST_DB) as conn:
+            add_api_key(conn, "test_key", 100.0, 60, "Test Key")
+            logs = [
+                ("test_key", "/allocate", 1.0, 99.0, now - timedelta(days=40)),
+                ("test_key", "/allocate", 2.0, 97.0, now - timedelta(days=40)),
+                ("test_key", "/allocations", 1.0, 96.0, now - timedelta(days=40)),
+                ("test_key", "/allocate", 1.0, 95.0, now - timedelta(days=35)),
+                ("test_key", "/allocate", 1.0, 94.0, now),
+            ]
+            conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?, ?)", logs)
+            conn.commit()
+
+            self.assertEqual(rollup_logs(conn, retention_days=0), 0)
+            self.assertEqual(rollup_logs(conn, retention_days=30), 4)
+
+            # only the recent logs are kept
+            self.assertEqual([log["balance"] for log in get_all_logs_for_key(conn, "test_key")], [94.0])
+            day_40, day_35 = ((now - timedelta(days=days)).date().isoformat() for days in (40, 35))
+            rollups = [tuple(rollup) for rollup in get_log_rollups_for_key(conn, "test_key")]
+            self.assertCountEqual(
+                rollups,
+                [
+                    ("test_key", day_40, "/allocate", 2, 3.0),
+                    ("test_key", day_40, "/allocations", 1, 1.0),
+                    ("test_key", day_35, "/allocate", 1, 1.0),
+                ],
+            )
+
+            # logs of a day which has already been rolled up are added to its totals
+            conn.execute(
+                "INSERT INTO logs VALUES (?, ?, ?, ?, ?)", ("test_key", "/allocate", 1.0, 93.0, now - timedelta(days=35))
+            )
+            conn.commit()
+            self.assertEqual(rollup_logs(conn, retention_days=30), 1)
+            rollups = [tuple(rollup) for rollup in get_log_rollups_for_key(conn, "test_key")]
+            self.assertIn(("test_key", day_35, "/allocate", 2, 2.0), rollups)
+
+    def test_archive_allocations(self) -> None:
+        now = datetime.utcnow()
+        with get_db_connection(TEST_DB) as conn, tempfile.TemporaryDirectory() as archive_dir:
+            for idx, days in enumerate((50, 45, 40, 1)):
+                request_uid = f"request-{idx}"
+                created_at = now - timedelta(days=days)
+                conn.execute(
+                    "INSERT INTO allocation_requests VALUES (?, ?, ?, ?, ?)", (request_uid, "{}", created_at, 1, "{}")
+                )
+                conn.executemany(
+                    "INSERT INTO allocations VALUES (?, ?, ?, ?, ?)",
+                    [(request_uid, str(uid), json.dumps({"pool": uid}), created_at, 1.0) for uid in range(3)],
+                )
+            # still being scored
+            conn.execute("INSERT INTO active_allocs VALUES (?, ?, ?, ?)", ("request-1", now, now, "[]"))
+            conn.commit()
+
+            self.assertEqual(archive_allocations(conn, archive_dir, retention_days=0), 0)
+            self.assertEqual(archive_allocations(conn, archive_dir, retention_days=30, limit=1), 1)
+            self.assertEqual(archive_allocations(conn, archive_dir, retention_days=30, limit=1), 1)
+            self.assertEqual(archive_allocations(conn, archive_dir, retention_days=30, limit=1), 0)
+
+            remaining = [row["request_uid"] for row in conn.execute("SELECT * FROM allocation_requests ORDER BY created_at")]
+            self.assertEqual(remaining, ["request-1", "request-3"])
+            self.assertEqual(len(get_miner_responses(conn)), 6)
+
+            archived = []
+            for path in sorted(Path(archive_dir).glob("*.jsonl.gz")):
+                with gzip.open(path, "rt") as f:
+                    archived.extend(json.loads(line) for line in f)
+            self.assertEqual([request["request_uid"] for request in archived], ["request-0", "request-2"])
+            self.assertEqual(
+                [json.loads(allocation["allocation"]) for allocation in archived[0]["allocations"]],
+                [{"pool": 0}, {"pool": 1}, {"pool": 2}],
+            )
+
 
 class TestMinerResponseRequestInfo(unittest.TestCase):
     def setUp(self) -> None:
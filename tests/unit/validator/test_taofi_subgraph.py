@@ -0,0 +1,103 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from sturdy.utils.taofi_subgraph import (
+    get_all_positions_infos_subgraph,
+    get_position_id_ranges,
+    get_position_infos_in_range,
+    parse_position_infos,
+)
+
+NUM_POSITIONS = 2345
+
+
+def make_position(position_id: int) -> dict:
+    return {
+        "id": str(position_id),
+        "owner": f"0x{position_id:040x}",
+        "collectedFeesToken0": str(position_id * 10),
+        "collectedFeesToken1": str(position_id),
+        "pool": {"liquidity": "1000", "tick": "0", "token1Price": "2.0"},
+        "token0": {"symbol": "TAO", "id": "0x0", "decimals": "9"},
+        "token1": {"symbol": "USDC", "id": "0x1", "decimals": "6"},
+        "liquidity": str(position_id * 100),
+        "transaction": {"timestamp": "0", "blockNumber": "0"},
+    }
+
+
+class FakeSubgraph:
+    """Serves positions like a subgraph would - ids are compared as strings."""
+
+    def __init__(self, num_positions: int) -> None:
+        self.positions = sorted(
+            (make_position(position_id) for position_id in range(1, num_positions + 1)), key=lambda p: p["id"]
+        )
+        self.requests = []
+        # the order in which pages were requested and parsed
+        self.events = []
+
+    async def __aenter__(self) -> "FakeSubgraph":
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def execute(self, _document, variable_values: dict) -> dict:
+        self.requests.append(variable_values)
+        self.events.append("fetch")
+        where = variable_values["where"]
+        positions = [
+            position
+            for position in self.positions
+            if ("id_gte" not in where or position["id"] >= where["id_gte"])
+            and ("id_lt" not in where or position["id"] < where["id_lt"])
+            and ("id_gt" not in where or position["id"] > where["id_gt"])
+        ]
+        return {"positions": positions[: variable_values["first"]]}
+
+    async def execute_async(self, _document, variable_values: dict) -> dict:
+        self.requests.append(variable_values)
+        skip = variable_values["skip"]
+        return {"positions": self.positions[skip : skip + variable_values["first"]]}
+
+
+class TestPositionsPagination(unittest.IsolatedAsyncioTestCase):
+    def test_position_id_ranges(self) -> None:
+        self.assertEqual(get_position_id_ranges(1), [(None, None)])
+        self.assertEqual(get_position_id_ranges(3), [(None, "40"), ("40", "70"), ("70", None)])
+        # the ranges can't be split any finer than two digit prefixes
+        self.assertEqual(len(get_position_id_ranges(1000)), 90)
+
+    async def test_cursor_pagination(self) -> None:
+        client = FakeSubgraph(NUM_POSITIONS)
+        expected = await get_all_positions_infos_subgraph(69, client, batch_size=100, use_cursor=False)
+        self.assertEqual(len(expected), NUM_POSITIONS)
+
+        for partitions in (1, 4, 90):
+            client.requests.clear()
+            position_infos = await get_all_positions_infos_subgraph(69, client, batch_size=100, partitions=partitions)
+
+            self.assertEqual(position_infos, expected)
+            self.assertTrue(all("skip" not in request for request in client.requests))
+            # a page per 100 positions of each range, plus the last (short) page of each range
+            self.assertLessEqual(len(client.requests), NUM_POSITIONS // 100 + partitions)
+            self.assertEqual(position_infos[42].collected_fees_0, 420 / 1e9)
+
+    async def test_next_page_is_fetched_while_parsing(self) -> None:
+        client = FakeSubgraph(250)
+
+        def slow_parse(positions: list[dict]) -> dict:
+            time.sleep(0.05)
+            client.events.append("parse")
+            return parse_position_infos(positions)
+
+        with patch("sturdy.utils.taofi_subgraph.parse_position_infos", side_effect=slow_parse):
+            position_infos = await get_position_infos_in_range(client, 69, batch_size=100)
+
+        self.assertEqual(len(position_infos), 250)
+        self.assertEqual(client.events, ["fetch", "fetch", "parse", "fetch", "parse", "parse"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import dataclasses
+import unittest
+from types import SimpleNamespace
+
+import bittensor as bt
+import numpy as np
+from bittensor import Balance
+
+from sturdy.pools import POOL_TYPES
+from sturdy.utils.bt_alpha import AlphaPoolsAMM
+from sturdy.validator.reward import annualized_yield_pct
+from sturdy.validator.yields import alpha_slippage_losses, annualized_share_price_yields_pct, get_allocation_matrix
+
+NUM_MINERS = 256
+NUM_POOLS = 8
+TOTAL_ASSETS = int(5_000_000e18)
+
+
+def make_request(rng: np.random.RandomState) -> tuple[dict, dict, list[dict]]:
+    pool_types = [POOL_TYPES.AAVE_DEFAULT, POOL_TYPES.MORPHO, POOL_TYPES.YEARN_V3, POOL_TYPES.STURDY_SILO]
+    pools = {}
+    extra_metadata = {}
+    for idx in range(NUM_POOLS):
+        key = f"0x{idx:040x}"
+        last_share_price = int(rng.randint(10**6, 10**9)) * 10**9
+        pools[key] = SimpleNamespace(
+            pool_type=pool_types[idx % len(pool_types)],
+            _yield_index=last_share_price + int(rng.randint(0, 10**6)) * 10**9,
+            _total_supplied_assets=int(rng.randint(1, 10**9)) * 10**15,
+            _user_deposits=int(rng.randint(0, 10**6)) * 10**15,
+        )
+        extra_metadata[key] = last_share_price
+    # pools which aren't share price based don't accrue any yield
+    pools["dsr"] = SimpleNamespace(pool_type=POOL_TYPES.DAI_SAVINGS)
+
+    miners_allocations = []
+    for miner in range(NUM_MINERS):
+        amounts = rng.dirichlet(np.ones(NUM_POOLS)) * TOTAL_ASSETS
+        allocations = {key: int(amount) for key, amount in zip(pools, amounts, strict=False)}
+        if miner % 7 == 0:
+            # missing and empty allocations
+            del allocations[next(iter(pools))]
+            allocations[list(pools)[1]] = 0
+        allocations["dsr"] = 1000
+        miners_allocations.append(allocations)
+
+    return {"total_assets": TOTAL_ASSETS, "pools": pools}, extra_metadata, miners_allocations
+
+
+class TestSharePriceYields(unittest.IsolatedAsyncioTestCase):
+    def test_allocation_matrix(self) -> None:
+        matrix = get_allocation_matrix([{"a": 10**30, "b": 1}, {"b": 2}], ["a", "b"])
+
+        self.assertEqual(matrix.tolist(), [[10**30, 1], [0, 2]])
+
+    async def test_matches_annualized_yield_pct(self) -> None:
+        rng = np.random.RandomState(69)
+        assets_and_pools, extra_metadata, miners_allocations = make_request(rng)
+        seconds_passed = 3600 * 6
+
+        yields = annualized_share_price_yields_pct(miners_allocations, assets_and_pools, seconds_passed, extra_metadata)
+
+        expected = [
+            await annualized_yield_pct(allocations, assets_and_pools, seconds_passed, extra_metadata)
+            for allocations in miners_allocations
+        ]
+        self.assertEqual(yields, expected)
+
+    async def test_dilution_to_zero_is_skipped(self) -> None:
+        pool = SimpleNamespace(
+            pool_type=POOL_TYPES.YEARN_V3, _yield_index=2 * 10**18, _total_supplied_assets=0, _user_deposits=101
+        )
+        assets_and_pools = {"total_assets": 1000, "pools": {"vault": pool}}
+        # the first allocation makes the dilution adjustment divide by zero
+        miners_allocations = [{"vault": 100}, {"vault": 1000}]
+
+        yields = annualized_share_price_yields_pct(miners_allocations, assets_and_pools, 3600, {"vault": 10**18})
+
+        self.assertEqual(yields[0], 0)
+        self.assertEqual(
+            yields[1], await annualized_yield_pct(miners_allocations[1], assets_and_pools, 3600, {"vault": 10**18})
+        )
+
+    def test_no_time_passed(self) -> None:
+        self.assertEqual(annualized_share_price_yields_pct([{}, {}], {"total_assets": 1, "pools": {}}, 0, {}), [0, 0])
+
+
+def make_dynamic_info(netuid: int, tao_in: int, alpha_in: int, is_dynamic: bool = True) -> bt.DynamicInfo:
+    tao_in_bal = Balance.from_rao(tao_in)
+    alpha_in_bal = Balance.from_rao(alpha_in, netuid=netuid)
+    price = Balance.from_tao(tao_in_bal.tao / alpha_in_bal.tao if alpha_in > 0 else 1, netuid=netuid)
+    fields = dict.fromkeys(field.name for field in dataclasses.fields(bt.DynamicInfo))
+    fields.update(
+        netuid=netuid,
+        tao_in=tao_in_bal,
+        alpha_in=alpha_in_bal,
+        price=price,
+        k=tao_in * alpha_in,
+        is_dynamic=is_dynamic,
+    )
+    return bt.DynamicInfo(**fields)
+
+
+def within_tolerance(actual: float, expected: int, scale: float) -> bool:
+    return abs(actual - expected) <= AlphaPoolsAMM.SLIPPAGE_TOLERANCE_RAO + AlphaPoolsAMM.SLIPPAGE_TOLERANCE_REL * scale
+
+
+class TestAlphaSlippage(unittest.TestCase):
+    def test_matches_bittensor(self) -> None:
+        rng = np.random.default_rng(69)
+        infos = [
+            make_dynamic_info(netuid, int(10 ** rng.uniform(11, 16)), int(10 ** rng.uniform(11, 17)))
+            for netuid in range(1, 33)
+        ]
+        infos.append(make_dynamic_info(0, 10**15, 10**15, is_dynamic=False))
+        amounts = (10 ** rng.uniform(3, 16, size=(64, len(infos)))).astype(np.int64)
+
+        amm = AlphaPoolsAMM.from_dynamic_infos(infos)
+        tao_to_alpha = amm.tao_to_alpha_slippage(amounts)
+        alpha_to_tao = amm.alpha_to_tao_slippage(amounts)
+
+        for row, col in np.ndindex(amounts.shape):
+            info = infos[col]
+            amount = int(amounts[row, col])
+            _, expected = info.tao_to_alpha_with_slippage(Balance.from_rao(amount))
+            scale = max(info.alpha_in.rao, amount / info.price.tao)
+            self.assertTrue(within_tolerance(tao_to_alpha[row, col], expected.rao, scale), (row, col))
+            _, expected = info.alpha_to_tao_with_slippage(Balance.from_rao(amount, netuid=info.netuid))
+            scale = max(info.tao_in.rao, amount * info.price.tao)
+            self.assertTrue(within_tolerance(alpha_to_tao[row, col], expected.rao, scale), (row, col))
+
+        # no slippage on the root subnet
+        self.assertTrue((tao_to_alpha[:, -1] == 0).all())
+        self.assertTrue((alpha_to_tao[:, -1] == 0).all())
+
+    def test_alpha_slippage_losses(self) -> None:
+        rng = np.random.default_rng(42)
+        dynamic_infos = {
+            f"pool-{netuid}": make_dynamic_info(netuid, int(10 ** rng.uniform(12, 15)), int(10 ** rng.uniform(13, 16)))
+            for netuid in range(1, 9)
+        }
+        pools = {
+            key: SimpleNamespace(pool_type=POOL_TYPES.BT_ALPHA, netuid=info.netuid, current_amount=int(rng.integers(10**12)))
+            for key, info in dynamic_infos.items()
+        }
+        extra_metadata = {
+            key: {"price_rao": info.price.rao + int(rng.integers(-1000, 1000))} for key, info in dynamic_infos.items()
+        }
+        # unstaking from a pool without a price can't be simulated
+        dynamic_infos["pool-8"] = make_dynamic_info(8, 0, 10**15)
+        pools["pool-8"].current_amount = 10**13
+        miners_allocations = [
+            {key: {"amount": int(rng.integers(10**12)), "delegate_ss58": "vali"} for key in pools} for _ in range(32)
+        ]
+        del miners_allocations[0]["pool-1"]
+        miners_allocations[1]["pool-2"]["amount"] = 0
+
+        losses = alpha_slippage_losses(miners_allocations, pools, extra_metadata, dynamic_infos)
+
+        for allocations, miner_losses in zip(miners_allocations, losses, strict=True):
+            self.assertNotIn("pool-8", miner_losses)
+            for key, allocation in allocations.items():
+                if key == "pool-8":
+                    continue
+                info = dynamic_infos[key]
+                last_price = extra_metadata[key]["price_rao"]
+                # as in `annualized_yield_pct()`
+                delta = allocation["amount"] - pools[key].current_amount
+                expected, scale = 0, 0
+                if allocation["amount"] > 0 and delta > 0:
+                    _, alpha_lost = info.tao_to_alpha_with_slippage(Balance.from_rao(delta))
+                    expected, scale = alpha_lost.rao, max(info.alpha_in.rao, delta / info.price.tao)
+                elif allocation["amount"] > 0 and delta < 0:
+                    alpha_num = int(abs(delta) / info.price)
+                    _, tao_lost = info.alpha_to_tao_with_slippage(Balance.from_rao(alpha_num, netuid=info.netuid))
+                    expected = int(tao_lost.rao / (last_price / 1e9))
+                    scale = max(info.tao_in.rao, alpha_num * info.price.tao) * 1e9 / last_price
+                self.assertTrue(within_tolerance(miner_losses[key], expected, scale))
+
+
+if __name__ == "__main__":
+    unittest.main()